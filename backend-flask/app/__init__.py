@@ -3,7 +3,6 @@ from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text, inspect
 from flask_jwt_extended import JWTManager
-from flask_bcrypt import Bcrypt
 from flask_migrate import Migrate
 from config import config_by_name
 import os
@@ -15,7 +14,6 @@ import sys
 # 初始化扩展
 db = SQLAlchemy()
 jwt = JWTManager()
-bcrypt = Bcrypt()
 migrate = Migrate()
 
 def create_app(config_name='development'):
@@ -77,14 +75,13 @@ def create_app(config_name='development'):
         CORS(app, 
             supports_credentials=True,  # 支持跨域Cookie
             origins=["http://localhost:3000", "http://localhost:8080", "http://124.222.106.161:3000", "http://124.222.106.161:8080", "http://127.0.0.1:3000", "http://127.0.0.1:8080"],  # 指定允许的源
-            allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept"],
+            allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Idempotency-Key"],
             methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-            expose_headers=["Content-Disposition", "Set-Cookie"]  # 添加Set-Cookie到暴露的头部
+            expose_headers=["Content-Disposition", "Set-Cookie", "Idempotent-Replayed"]  # 添加Set-Cookie到暴露的头部
         )
         app.config['CORS_ALREADY_INITIALIZED'] = True
     
     jwt.init_app(app)
-    bcrypt.init_app(app)
     
     # 注册蓝图
     from app.api import api_bp
@@ -94,6 +91,41 @@ def create_app(config_name='development'):
     from app.auth import auth_bp
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     
+    # 确保新增的数据表已创建（create_all只会创建缺失的表，不会修改已有表）
+    with app.app_context():
+        from app import models
+        new_database = not inspect(db.engine).has_table('courses')
+        db.create_all()
+        
+        # 创建全文搜索索引和同步触发器（仅SQLite）
+        try:
+            from app.utils.search import ensure_search_index
+            ensure_search_index()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"创建全文搜索索引失败: {str(e)}")
+        
+        # 课程摘要读模型为空时从源表重建（首次升级到读模型时）
+        try:
+            from app.models.projections import ensure_course_summaries
+            ensure_course_summaries()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"重建课程摘要读模型失败: {str(e)}")
+        
+        # 新数据库由 create_all 直接建成最新结构，迁移全部记为已执行；已有数据库提示尚未执行的迁移
+        try:
+            from app.utils.migrations import stamp_migrations, pending_migrations
+            if new_database:
+                stamp_migrations()
+            else:
+                pending = pending_migrations()
+                if pending:
+                    app.logger.warning(f"有 {len(pending)} 个数据库迁移尚未执行，请运行 python manage.py migrate")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"检查数据库迁移失败: {str(e)}")
+    
     # 注册根路由
     @app.route('/')
     def index():
@@ -142,5 +174,12 @@ def create_app(config_name='development'):
             'error': 'missing_token'
         }), 401
     
+    # 密码哈希排队已满（未在接口内处理时）
+    from app.utils.passwords import PasswordHasherBusy, password_hasher_busy
+    
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy_callback(error):
+        return password_hasher_busy()
+    
     app.logger.info('应用初始化完成')
     return app 
\ No newline at end of file
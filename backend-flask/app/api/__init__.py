@@ -3,4 +3,4 @@ from flask import Blueprint
 api_bp = Blueprint('api', __name__)
 
 # 导入API模块
-from app.api import routes 
\ No newline at end of file
+from app.api import routes, schedule, sync, analytics, planning, recommendations, search, calendar, exports, history, backups 
\ No newline at end of file
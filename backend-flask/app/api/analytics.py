@@ -0,0 +1,116 @@
+from flask import jsonify, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.models.course import Course, Booking
+from app.models.user import User
+from app.utils.cache import TTLCache
+from app.utils.occupancy import compute_occupancy_stats
+from app.utils.semester import semester_key, semester_range
+from app import db
+from datetime import date
+
+# 满员率统计缓存，按（学期, 舞种）区分
+_occupancy_cache = TTLCache(maxsize=64)
+
+# 已结束学期的数据基本不再变化，缓存一天
+PAST_SEMESTER_CACHE_SECONDS = 86400
+
+def _load_occupancy_stats(start_date, end_date, dance_type):
+    """批量取出学期内的课程和有效预订列，交给 numpy 统计"""
+    course_query = db.session.query(
+        Course.id, Course.dance_type, Course.course_date, Course.time_slot,
+        Course.max_capacity, Course.created_at
+    ).filter(
+        Course.course_date >= start_date,
+        Course.course_date <= end_date
+    )
+    booking_query = db.session.query(Booking.course_id, Booking.created_at).join(
+        Course, Course.id == Booking.course_id
+    ).filter(
+        Course.course_date >= start_date,
+        Course.course_date <= end_date,
+        Booking.status == 'confirmed'
+    )
+    if dance_type == 'public':
+        course_query = course_query.filter(Course.dance_type.is_(None))
+        booking_query = booking_query.filter(Course.dance_type.is_(None))
+    elif dance_type:
+        course_query = course_query.filter(Course.dance_type == dance_type)
+        booking_query = booking_query.filter(Course.dance_type == dance_type)
+
+    return compute_occupancy_stats(
+        course_query.all(), booking_query.all(), current_app.config['CALENDAR_TIMEZONE']
+    )
+
+@api_bp.route('/analytics/occupancy', methods=['GET'])
+@jwt_required()
+def get_occupancy_analytics():
+    """获取学期的课程满员率和预约速度统计（管理员和领队）
+
+    请求参数:
+        semester: 学期，如 2025-fall（8月至次年1月）、2026-spring（2月至7月），默认为当前学期
+        danceType: 舞种，可选；领队只能查看自己的舞种（未设置舞种的领队只能查看公共课程），缺省时即为该范围
+
+    返回:
+        满员率分布、按舞种统计、星期×时间段热力图、按周趋势和预约速度
+    """
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+
+    # 检查用户权限
+    if not current_user or current_user.role not in ['admin', 'leader']:
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    dance_type = request.args.get('danceType') or None
+    if current_user.role == 'leader':
+        # None 表示全部舞种，只有管理员可以查看；未设置舞种的领队只能查看公共课程
+        leader_scope = current_user.dance_type or 'public'
+        if dance_type and dance_type != leader_scope:
+            return jsonify({
+                'success': False,
+                'message': '无权查看此舞种的统计'
+            }), 403
+        dance_type = leader_scope
+
+    today = date.today()
+    semester = request.args.get('semester') or semester_key(today)
+    try:
+        start_date, end_date = semester_range(semester)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    if end_date < today:
+        ttl = PAST_SEMESTER_CACHE_SECONDS
+    else:
+        ttl = current_app.config['ANALYTICS_CACHE_TTL_SECONDS']
+
+    try:
+        stats = _occupancy_cache.get_or_load(
+            (semester, dance_type),
+            ttl,
+            lambda: _load_occupancy_stats(start_date, end_date, dance_type)
+        )
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取统计数据失败: {str(e)}'
+        }), 500
+
+    data = {
+        'semester': semester,
+        'startDate': start_date.isoformat(),
+        'endDate': end_date.isoformat(),
+        'danceType': dance_type or 'all'
+    }
+    data.update(stats)
+
+    return jsonify({
+        'success': True,
+        'data': data
+    }), 200
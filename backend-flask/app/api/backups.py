@@ -0,0 +1,94 @@
+from flask import jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.models.user import User
+from app.utils.backup import (
+    BackupInProgress, database_path, backup_options, create_backup, list_backups, read_manifest, verify_backup
+)
+import os
+
+def _is_admin():
+    current_user = User.query.get(get_jwt_identity())
+    return current_user is not None and current_user.role == 'admin'
+
+@api_bp.route('/admin/backups', methods=['GET'])
+@jwt_required()
+def get_backups():
+    """备份列表，按时间倒序（仅管理员）"""
+    if not _is_admin():
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    return jsonify({
+        'success': True,
+        'data': list_backups(current_app.config['BACKUP_DIR'])
+    }), 200
+
+@api_bp.route('/admin/backups', methods=['POST'])
+@jwt_required()
+def create_database_backup():
+    """立即备份数据库（仅管理员）
+
+    使用 SQLite 在线备份接口分步复制，期间预约等写入照常进行；
+    完成后校验副本、压缩保存，并删除超出保留数量的旧备份。
+    """
+    if not _is_admin():
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    config = current_app.config
+    try:
+        source_path = database_path(config['SQLALCHEMY_DATABASE_URI'])
+        manifest = create_backup(source_path, config['BACKUP_DIR'], **backup_options(config))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except BackupInProgress as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 409
+    except Exception as e:
+        current_app.logger.error(f"数据库备份失败: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'数据库备份失败: {str(e)}'
+        }), 500
+
+    current_app.logger.info(f"数据库已备份到 {manifest['file']}")
+    return jsonify({
+        'success': True,
+        'message': '备份完成',
+        'data': manifest
+    }), 201
+
+@api_bp.route('/admin/backups/<file_name>/verify', methods=['POST'])
+@jwt_required()
+def verify_database_backup(file_name):
+    """恢复校验：把备份恢复到临时文件，检查完整性并与清单中的行数比对（仅管理员）"""
+    if not _is_admin():
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    backup_dir = current_app.config['BACKUP_DIR']
+    backup_path = os.path.join(backup_dir, file_name)
+    if os.path.basename(file_name) != file_name or not os.path.isfile(backup_path) or read_manifest(backup_path) is None:
+        return jsonify({
+            'success': False,
+            'message': '备份不存在'
+        }), 404
+
+    result = verify_backup(backup_path)
+    return jsonify({
+        'success': True,
+        'message': '备份校验通过' if result['ok'] else '备份校验未通过',
+        'data': result
+    }), 200
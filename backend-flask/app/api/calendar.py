@@ -0,0 +1,196 @@
+from flask import jsonify, request, current_app, Response, url_for, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.http import is_resource_modified
+from app.api import api_bp
+from app.models.user import User
+from app.models.course import Course, Booking
+from app.models.calendar import CalendarToken
+from app.utils.ical import calendar_header, calendar_footer, course_event, FEED_FORMAT_VERSION
+from app import db
+from datetime import date, datetime, time, timedelta, timezone
+
+# 流式生成日历时每批从数据库读取的课程数
+CALENDAR_FETCH_SIZE = 200
+
+def _feed_window():
+    """订阅包含的日期范围（含两端）"""
+    today = date.today()
+    return (
+        today - timedelta(days=current_app.config['CALENDAR_FEED_PAST_DAYS']),
+        today + timedelta(days=current_app.config['CALENDAR_FEED_FUTURE_DAYS'])
+    )
+
+def _latest_change(query, seq_column):
+    """按同步序号索引取最近一次变化的 (序号, 时间)，没有记录时返回 (0, None)"""
+    row = query.order_by(seq_column.desc()).first()
+    if row is None:
+        return 0, None
+    return row.change_seq or 0, row.updated_at or row.created_at
+
+def _latest_course_change():
+    # 软删除、改期的课程同样会改变订阅内容，需要包含墓碑
+    return _latest_change(Course.query.execution_options(include_deleted=True), Course.change_seq)
+
+def _feed_response(etag, changed_times, window_start, name, courses_query, public):
+    """生成订阅响应：内容未变化时返回304，否则流式输出日历
+
+    ETag 由课程/预订的同步序号、日期范围和输出格式版本组成，Last-Modified 取相关记录最近的修改时间，
+    二者都只需按索引读取一行，无需生成日历即可判断是否变化。
+    日期范围每天滚动一次，因此 Last-Modified 不早于范围起点变化的时刻（本地零点）。
+    """
+    window_changed = datetime.combine(date.today(), time.min).astimezone(timezone.utc)
+    last_modified = max(
+        [value.replace(tzinfo=timezone.utc) for value in changed_times if value] + [window_changed]
+    ).replace(microsecond=0)
+    etag = f'{etag}-{window_start.strftime("%Y%m%d")}-v{FEED_FORMAT_VERSION}'
+
+    headers = {
+        'Cache-Control': f"{'public' if public else 'private'}, max-age={current_app.config['CALENDAR_FEED_MAX_AGE_SECONDS']}"
+    }
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304, headers=headers)
+    else:
+        tz_name = current_app.config['CALENDAR_TIMEZONE']
+
+        def generate():
+            yield calendar_header(name, tz_name)
+            for course in courses_query.yield_per(CALENDAR_FETCH_SIZE):
+                yield course_event(course, tz_name)
+            yield calendar_footer()
+
+        response = Response(stream_with_context(generate()), mimetype='text/calendar', headers=headers)
+        response.headers['Content-Disposition'] = 'inline; filename="calendar.ics"'
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response
+
+def _feed_urls(calendar_token):
+    return {
+        'token': calendar_token.token,
+        'url': url_for('api.get_personal_calendar', token=calendar_token.token, _external=True),
+        'clubUrl': url_for('api.get_club_calendar', _external=True),
+        'createdAt': calendar_token.created_at.isoformat() if calendar_token.created_at else None
+    }
+
+@api_bp.route('/users/calendar-feed', methods=['GET'])
+@jwt_required()
+def get_calendar_feed():
+    """获取当前用户的日历订阅地址，首次访问时生成订阅令牌"""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+
+    try:
+        calendar_token = CalendarToken.for_user(current_user)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'获取日历订阅地址失败: {str(e)}'
+        }), 500
+
+    return jsonify({
+        'success': True,
+        'data': _feed_urls(calendar_token)
+    }), 200
+
+@api_bp.route('/users/calendar-feed/reset', methods=['POST'])
+@jwt_required()
+def reset_calendar_feed():
+    """重新生成当前用户的订阅令牌，旧的订阅地址立即失效（地址泄露时使用）"""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+
+    try:
+        calendar_token = CalendarToken.for_user(current_user, regenerate=True)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'重新生成订阅地址失败: {str(e)}'
+        }), 500
+
+    return jsonify({
+        'success': True,
+        'message': '订阅地址已重新生成，请在日历应用中更新订阅',
+        'data': _feed_urls(calendar_token)
+    }), 200
+
+@api_bp.route('/calendar/<string:token>.ics', methods=['GET'])
+def get_personal_calendar(token):
+    """个人日历订阅：当前日期范围内已确认预约的课程（iCalendar格式）
+
+    日历应用无法携带JWT，通过地址中的令牌识别用户。支持 If-None-Match / If-Modified-Since，
+    预约和课程都没有变化时返回304。
+    """
+    calendar_token = CalendarToken.query.filter_by(token=token).first()
+    if not calendar_token:
+        return jsonify({
+            'success': False,
+            'message': '订阅地址无效或已重新生成'
+        }), 404
+
+    user = calendar_token.user
+    start_date, end_date = _feed_window()
+
+    # 用户自己的预订变化（按 user_id + change_seq 索引）和任意课程的变化都会使订阅失效
+    booking_seq, booking_changed = _latest_change(Booking.query.filter_by(user_id=user.id), Booking.change_seq)
+    course_seq, course_changed = _latest_course_change()
+
+    courses_query = Course.query.join(Booking, Booking.course_id == Course.id).filter(
+        Booking.user_id == user.id,
+        Booking.status == 'confirmed',
+        Course.course_date >= start_date,
+        Course.course_date <= end_date
+    ).order_by(Course.course_date, Course.time_slot)
+
+    return _feed_response(
+        f'user{user.id}-{booking_seq}-{course_seq}',
+        [booking_changed, course_changed],
+        start_date,
+        f'{user.name}的街舞课程',
+        courses_query,
+        public=False
+    )
+
+@api_bp.route('/calendar/club.ics', methods=['GET'])
+def get_club_calendar():
+    """社团公共课表订阅（iCalendar格式）
+
+    请求参数:
+        danceType: 舞种，传入时只包含该舞种的课程和公共课程
+    """
+    start_date, end_date = _feed_window()
+    dance_type = request.args.get('danceType')
+
+    course_seq, course_changed = _latest_course_change()
+
+    courses_query = Course.query.filter(
+        Course.course_date >= start_date,
+        Course.course_date <= end_date
+    )
+    if dance_type:
+        courses_query = courses_query.filter((Course.dance_type == dance_type) | (Course.dance_type.is_(None)))
+    courses_query = courses_query.order_by(Course.course_date, Course.time_slot)
+
+    return _feed_response(
+        f'club-{course_seq}',
+        [course_changed],
+        start_date,
+        f'街舞社课表（{dance_type}）' if dance_type else '街舞社课表',
+        courses_query,
+        public=True
+    )
@@ -0,0 +1,201 @@
+from flask import jsonify, request, current_app, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.models.user import User
+from app.models.export import ExportJob
+from app.utils.exports import REPORTS, EXPORT_FORMATS, export_runner, purge_expired_exports
+from app.utils.semester import semester_key, semester_range
+from app import db
+from datetime import date
+import json
+import os
+
+# 每个用户同时进行中的导出任务上限
+EXPORT_MAX_ACTIVE_JOBS_PER_USER = 3
+
+def _get_export_user():
+    """当前用户（仅管理员和领队可使用导出），无权限时返回 None"""
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role not in ['admin', 'leader']:
+        return None
+    return current_user
+
+def _get_visible_job(current_user, job_id):
+    """管理员可查看所有任务，领队只能查看自己创建的任务"""
+    job = ExportJob.query.get(job_id)
+    if job is None or (not current_user.is_admin() and job.created_by != current_user.id):
+        return None
+    return job
+
+@api_bp.route('/admin/exports', methods=['POST'])
+@jwt_required()
+def create_export():
+    """创建报表导出任务（管理员和领队）
+
+    请求体:
+        kind: 报表类型，bookings（预约明细）或 attendance（课程出勤汇总）
+        format: csv 或 xlsx，默认csv
+        semester: 学期，如 2026-fall，默认为当前学期
+        danceType: 舞种，可选，public 表示公共课程；领队只能导出自己的舞种，缺省时即为自己的舞种
+
+    返回:
+        202，任务在后台执行，通过 /api/admin/exports/<id> 查询进度
+    """
+    current_user = _get_export_user()
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    data = request.get_json() or {}
+    kind = data.get('kind')
+    file_format = data.get('format', 'csv')
+    if kind not in REPORTS:
+        return jsonify({
+            'success': False,
+            'message': f"报表类型必须是: {', '.join(REPORTS)}"
+        }), 400
+    if file_format not in EXPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'message': f"导出格式必须是: {', '.join(EXPORT_FORMATS)}"
+        }), 400
+
+    semester = data.get('semester') or semester_key(date.today())
+    try:
+        semester_range(semester)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    dance_type = data.get('danceType') or None
+    if current_user.role == 'leader':
+        if dance_type and dance_type != current_user.dance_type:
+            return jsonify({
+                'success': False,
+                'message': '无权导出此舞种的数据'
+            }), 403
+        dance_type = current_user.dance_type
+
+    params = json.dumps({'semester': semester, 'danceType': dance_type}, sort_keys=True)
+
+    try:
+        purge_expired_exports(current_app.config['EXPORT_RETENTION_HOURS'])
+
+        active_jobs = ExportJob.query.filter(
+            ExportJob.created_by == current_user.id,
+            ExportJob.status.in_(['pending', 'running'])
+        ).all()
+        # 相同条件的任务正在进行时直接返回该任务，避免重复点击生成多份文件
+        for job in active_jobs:
+            if job.kind == kind and job.file_format == file_format and job.params == params:
+                db.session.commit()
+                return jsonify({
+                    'success': True,
+                    'message': '相同的导出任务正在进行中',
+                    'data': job.to_dict()
+                }), 202
+        if len(active_jobs) >= EXPORT_MAX_ACTIVE_JOBS_PER_USER:
+            db.session.commit()
+            return jsonify({
+                'success': False,
+                'message': f'同时进行的导出任务不能超过{EXPORT_MAX_ACTIVE_JOBS_PER_USER}个，请稍后再试'
+            }), 429
+
+        job = ExportJob(kind=kind, file_format=file_format, params=params, created_by=current_user.id)
+        db.session.add(job)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'创建导出任务失败: {str(e)}'
+        }), 500
+
+    export_runner.submit(current_app._get_current_object(), job.id)
+
+    return jsonify({
+        'success': True,
+        'message': '导出任务已创建',
+        'data': job.to_dict()
+    }), 202
+
+@api_bp.route('/admin/exports', methods=['GET'])
+@jwt_required()
+def get_exports():
+    """获取导出任务列表（管理员可查看全部，领队只能查看自己创建的），按创建时间倒序"""
+    current_user = _get_export_user()
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    query = ExportJob.query
+    if not current_user.is_admin():
+        query = query.filter(ExportJob.created_by == current_user.id)
+    jobs = query.order_by(ExportJob.created_at.desc(), ExportJob.id.desc()).limit(50).all()
+
+    return jsonify({
+        'success': True,
+        'data': [job.to_dict() for job in jobs]
+    }), 200
+
+@api_bp.route('/admin/exports/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_export(job_id):
+    """查询导出任务状态和进度"""
+    current_user = _get_export_user()
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    job = _get_visible_job(current_user, job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'message': '导出任务不存在'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'data': job.to_dict()
+    }), 200
+
+@api_bp.route('/admin/exports/<int:job_id>/download', methods=['GET'])
+@jwt_required()
+def download_export(job_id):
+    """下载已完成的导出文件"""
+    current_user = _get_export_user()
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    job = _get_visible_job(current_user, job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'message': '导出任务不存在'
+        }), 404
+
+    if job.status != 'completed':
+        return jsonify({
+            'success': False,
+            'message': '导出任务尚未完成',
+            'data': job.to_dict()
+        }), 409
+
+    if not job.file_path or not os.path.exists(job.file_path):
+        return jsonify({
+            'success': False,
+            'message': '导出文件已过期，请重新导出'
+        }), 410
+
+    return send_file(job.file_path, as_attachment=True, download_name=job.download_name())
@@ -0,0 +1,257 @@
+from flask import jsonify, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.api.schedule import invalidate_schedule_cache
+from app.models.user import User
+from app.models.archive import ArchiveRun, ArchivedCourse, ArchivedBooking
+from app.utils.archive import archive_cutoff, run_archive
+from app import db
+from datetime import date
+
+# 历史记录每页最多条数
+HISTORY_MAX_PAGE_SIZE = 100
+
+def _parse_page_args():
+    """解析分页参数，返回 (页码, 每页条数, 错误信息)"""
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        page_size = min(max(int(request.args.get('pageSize', 20)), 1), HISTORY_MAX_PAGE_SIZE)
+    except ValueError:
+        return None, None, '分页参数必须是整数'
+    return page, page_size, None
+
+def _can_view_roster(user, course):
+    """管理员可查看所有往期课程的预约名单，领队可查看自己舞种或自己负责的课程"""
+    if user.is_admin():
+        return True
+    return user.is_leader() and (
+        course.leader_id == user.id or (course.dance_type and course.dance_type == user.dance_type)
+    )
+
+@api_bp.route('/history/semesters', methods=['GET'])
+@jwt_required()
+def get_history_semesters():
+    """已归档的学期列表及每个学期的课程数，按学期倒序"""
+    semesters = db.session.query(
+        ArchivedCourse.semester, db.func.count(ArchivedCourse.id)
+    ).group_by(ArchivedCourse.semester).order_by(ArchivedCourse.semester.desc()).all()
+
+    return jsonify({
+        'success': True,
+        'data': [{'semester': semester, 'courseCount': count} for semester, count in semesters]
+    }), 200
+
+@api_bp.route('/history/courses', methods=['GET'])
+@jwt_required()
+def get_history_courses():
+    """查询已归档的往期课程（只读）
+
+    请求参数:
+        semester: 学期，如 2025-fall，可选
+        danceType: 舞种，public 表示公共课程，可选
+        page: 页码，默认1
+        pageSize: 每页条数，默认20，最多100
+    """
+    page, page_size, error = _parse_page_args()
+    if error:
+        return jsonify({
+            'success': False,
+            'message': error
+        }), 400
+
+    query = ArchivedCourse.query
+    semester = request.args.get('semester')
+    if semester:
+        query = query.filter(ArchivedCourse.semester == semester)
+    dance_type = request.args.get('danceType')
+    if dance_type == 'public':
+        query = query.filter(ArchivedCourse.dance_type.is_(None))
+    elif dance_type:
+        query = query.filter(ArchivedCourse.dance_type == dance_type)
+
+    total = query.count()
+    courses = query.order_by(
+        ArchivedCourse.course_date, ArchivedCourse.time_slot, ArchivedCourse.id
+    ).offset((page - 1) * page_size).limit(page_size).all()
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'items': [course.to_dict() for course in courses],
+            'total': total,
+            'page': page,
+            'pageSize': page_size
+        }
+    }), 200
+
+@api_bp.route('/history/courses/<int:archived_course_id>', methods=['GET'])
+@jwt_required()
+def get_history_course(archived_course_id):
+    """往期课程详情；管理员和对应舞种的领队可同时看到预约名单"""
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+
+    course = ArchivedCourse.query.get(archived_course_id)
+    if not course:
+        return jsonify({
+            'success': False,
+            'message': '往期课程不存在'
+        }), 404
+
+    data = course.to_dict()
+    if _can_view_roster(current_user, course):
+        roster = db.session.query(
+            ArchivedBooking.user_id, User.name, User.username, ArchivedBooking.created_at
+        ).outerjoin(User, User.id == ArchivedBooking.user_id).filter(
+            ArchivedBooking.archived_course_id == course.id,
+            ArchivedBooking.status == 'confirmed'
+        ).order_by(ArchivedBooking.created_at)
+        data['bookedBy'] = [
+            {
+                'id': user_id,
+                'name': name,
+                'username': username,
+                'bookingTime': booking_time.isoformat() + 'Z' if booking_time else None
+            }
+            for user_id, name, username, booking_time in roster
+        ]
+
+    return jsonify({
+        'success': True,
+        'data': data
+    }), 200
+
+@api_bp.route('/history/bookings', methods=['GET'])
+@jwt_required()
+def get_history_bookings():
+    """查询自己已归档的往期预订（管理员可通过 userId 查询任意用户），按课程日期倒序
+
+    请求参数:
+        semester: 学期，可选
+        userId: 用户ID，仅管理员可用
+        page / pageSize: 分页
+    """
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+
+    page, page_size, error = _parse_page_args()
+    if error:
+        return jsonify({
+            'success': False,
+            'message': error
+        }), 400
+
+    user_id = current_user.id
+    if request.args.get('userId'):
+        try:
+            user_id = int(request.args['userId'])
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': '无效的用户ID'
+            }), 400
+        if user_id != current_user.id and not current_user.is_admin():
+            return jsonify({
+                'success': False,
+                'message': '无权查看其他用户的预订记录'
+            }), 403
+
+    query = ArchivedBooking.query.filter(ArchivedBooking.user_id == user_id)
+    semester = request.args.get('semester')
+    if semester:
+        query = query.filter(ArchivedBooking.semester == semester)
+
+    total = query.count()
+    bookings = query.order_by(
+        ArchivedBooking.course_date.desc(), ArchivedBooking.id.desc()
+    ).offset((page - 1) * page_size).limit(page_size).all()
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'items': [booking.to_dict() for booking in bookings],
+            'total': total,
+            'page': page,
+            'pageSize': page_size
+        }
+    }), 200
+
+@api_bp.route('/admin/archive', methods=['POST'])
+@jwt_required()
+def archive_past_data():
+    """归档往期课程和预订，并清理过期墓碑和未验证账号（仅管理员）
+
+    请求体:
+        dryRun: 为 true 时只统计将被处理的数量
+        keepSemesters: 除当前学期外热表中保留的学期数，默认为 ARCHIVE_KEEP_SEMESTERS
+    """
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role != 'admin':
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    data = request.get_json(silent=True) or {}
+    config = current_app.config
+    try:
+        keep_semesters = int(data.get('keepSemesters', config['ARCHIVE_KEEP_SEMESTERS']))
+        if keep_semesters < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': 'keepSemesters 必须是非负整数'
+        }), 400
+
+    try:
+        report = run_archive(
+            archive_cutoff(date.today(), keep_semesters),
+            canceled_days=config['ARCHIVE_CANCELED_BOOKING_DAYS'],
+            unverified_days=config['ARCHIVE_UNVERIFIED_USER_DAYS'],
+            tombstone_days=config['SYNC_TOMBSTONE_RETENTION_DAYS'],
+            batch_size=config['ARCHIVE_BATCH_SIZE'],
+            dry_run=bool(data.get('dryRun')),
+            created_by=current_user.id
+        )
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"归档失败: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'归档失败: {str(e)}'
+        }), 500
+
+    if not report['dryRun']:
+        invalidate_schedule_cache()
+
+    return jsonify({
+        'success': True,
+        'message': '归档预览' if report['dryRun'] else '归档完成',
+        'data': report
+    }), 200
+
+@api_bp.route('/admin/archive/runs', methods=['GET'])
+@jwt_required()
+def get_archive_runs():
+    """最近的归档记录（仅管理员）"""
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role != 'admin':
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    runs = ArchiveRun.query.order_by(ArchiveRun.id.desc()).limit(50).all()
+    return jsonify({
+        'success': True,
+        'data': [run.to_dict() for run in runs]
+    }), 200
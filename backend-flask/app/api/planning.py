@@ -0,0 +1,176 @@
+from flask import jsonify, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.models.user import User
+from app.utils.rooms import room_index, parse_time_slot, format_minutes
+from app.utils.timetable import TimetableProblem, format_solution
+from datetime import date, timedelta
+
+# 场地空闲查询单次最多覆盖的天数（可覆盖一个完整学期）
+ROOM_AVAILABILITY_MAX_DAYS = 200
+
+@api_bp.route('/admin/rooms/availability', methods=['GET'])
+@jwt_required()
+def get_room_availability():
+    """查询各场地在日期范围内的空闲时间段（管理员和领队）
+
+    请求参数:
+        from: 开始日期，格式为YYYY-MM-DD，默认为今天
+        to: 结束日期（含），默认为开始日期后6天
+        minDuration: 最短空闲时长（分钟），默认30
+        locations: 地点，多个用逗号分隔，默认为所有已有课程的地点
+        window: 每天可排课的时间窗口，格式如 08:00-22:00，默认取配置
+
+    返回:
+        每个地点每天满足最短时长的空闲区间
+    """
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+
+    # 检查用户权限
+    if not current_user or not current_user.is_admin() and not current_user.is_leader():
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    try:
+        start_date = date.fromisoformat(request.args.get('from', date.today().isoformat()))
+        end_date = date.fromisoformat(request.args.get('to', (start_date + timedelta(days=6)).isoformat()))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': '日期格式错误，请使用YYYY-MM-DD格式'
+        }), 400
+
+    if end_date < start_date:
+        return jsonify({
+            'success': False,
+            'message': '结束日期不能早于开始日期'
+        }), 400
+
+    if (end_date - start_date).days + 1 > ROOM_AVAILABILITY_MAX_DAYS:
+        return jsonify({
+            'success': False,
+            'message': f'查询范围不能超过{ROOM_AVAILABILITY_MAX_DAYS}天'
+        }), 400
+
+    try:
+        min_duration = int(request.args.get('minDuration', 30))
+        if min_duration <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': '最短时长必须是正整数（分钟）'
+        }), 400
+
+    window = parse_time_slot(request.args.get('window', current_app.config['ROOM_DAY_WINDOW']))
+    if window is None:
+        return jsonify({
+            'success': False,
+            'message': '时间窗口格式无效，请使用HH:MM-HH:MM格式'
+        }), 400
+
+    try:
+        room_index.sync(current_app.config['ROOM_SLOT_MINUTES'])
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'查询场地空闲时间失败: {str(e)}'
+        }), 500
+
+    locations = request.args.get('locations')
+    if locations:
+        locations = [location.strip() for location in locations.split(',') if location.strip()]
+    else:
+        locations = room_index.locations()
+
+    free = room_index.free_intervals(locations, start_date, end_date, min_duration, *window)
+
+    result = [
+        {
+            'location': location,
+            'days': [
+                {
+                    'date': day.isoformat(),
+                    'free': [
+                        {
+                            'start': format_minutes(start),
+                            'end': format_minutes(end),
+                            'minutes': end - start
+                        }
+                        for start, end in intervals
+                    ]
+                }
+                for day, intervals in days
+            ]
+        }
+        for location, days in free.items()
+    ]
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'from': start_date.isoformat(),
+            'to': end_date.isoformat(),
+            'minDuration': min_duration,
+            'slotMinutes': room_index.slot_minutes,
+            'locations': result
+        }
+    }), 200
+
+@api_bp.route('/admin/timetable/solve', methods=['POST'])
+@jwt_required()
+def solve_timetable():
+    """自动生成无冲突的排课建议（仅管理员）
+
+    请求体包含日期范围、可用地点和待排课程（时长、可用地点、偏好时间窗口、教练和领队），
+    返回每门课每周的上课星期、时间段和地点，不会与已有课程、其他待排课程的地点或人员冲突。
+    只返回建议，不会创建课程。
+    """
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+
+    # 检查用户权限
+    if not current_user or not current_user.is_admin():
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+
+    data = request.get_json() or {}
+    try:
+        problem = TimetableProblem.from_dict(
+            data,
+            current_app.config['ROOM_DAY_WINDOW'],
+            current_app.config['ROOM_SLOT_MINUTES']
+        )
+        try:
+            time_budget = float(data.get('timeBudget', current_app.config['TIMETABLE_MAX_BUDGET_SECONDS']))
+        except (TypeError, ValueError):
+            time_budget = 0
+        if time_budget <= 0:
+            raise ValueError('时间预算必须是大于0的秒数')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    time_budget = min(time_budget, current_app.config['TIMETABLE_MAX_BUDGET_SECONDS'])
+
+    try:
+        if not data.get('ignoreExisting'):
+            problem.load_existing_courses()
+        solution = problem.solve(time_budget)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'生成排课建议失败: {str(e)}'
+        }), 500
+
+    return jsonify({
+        'success': True,
+        'data': format_solution(problem, solution)
+    }), 200
@@ -0,0 +1,58 @@
+from flask import jsonify, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.models.user import User
+from app.utils.recommendations import recommendation_index
+
+@api_bp.route('/courses/recommended', methods=['GET'])
+@jwt_required()
+def get_recommended_courses():
+    """根据预约共现为当前用户推荐即将开始的课程
+
+    请求参数:
+        limit: 返回数量，默认10，取值范围 1 到配置的 RECOMMENDATION_TOP_K
+
+    返回:
+        推荐课程列表，score 为与用户已预约系列的相似度得分，0 表示按热门程度补足
+    """
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+
+    top_k = current_app.config['RECOMMENDATION_TOP_K']
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        limit = 10
+    if limit <= 0:
+        limit = 10
+    limit = min(max(limit, 1), top_k)
+
+    try:
+        recommendation_index.ensure_fresh(
+            current_app._get_current_object(),
+            current_app.config['RECOMMENDATION_REFRESH_SECONDS'],
+            top_k,
+            current_app.config['RECOMMENDATION_HORIZON_DAYS']
+        )
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取推荐课程失败: {str(e)}'
+        }), 500
+
+    result = []
+    for course, score in recommendation_index.recommend(current_user.id, limit):
+        data = dict(course)
+        data['score'] = score
+        result.append(data)
+
+    return jsonify({
+        'success': True,
+        'data': result
+    }), 200
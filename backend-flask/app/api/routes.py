@@ -1,14 +1,74 @@
-from flask import jsonify, request
+from flask import jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import api_bp
-from app.models.course import Course, Booking
+from app.models.course import Course, Booking, SeatHold
 from app.models.user import User
+from app.models.projections import CourseSummary, mark_courses_changed
+from app.models.sync import touch_courses
+from app.models.archive import ArchivedBooking
+from app.models.user_import import UserImportJob
+from app.api.schedule import invalidate_schedule_cache
+from app.utils.seat_events import record_seat_events
+from app.utils.cache import TTLCache
+from app.utils.user_import import parse_user_csv, import_users, user_import_runner, purge_expired_user_imports
+from app.utils.passwords import password_hasher
+from app.utils.course_import import parse_course_csv, parse_course_ics, import_courses
+from app.utils.idempotency import idempotent
 from app import db
 from sqlalchemy.exc import IntegrityError
 import os
 from datetime import datetime, date, timedelta
 import sys
 
+# 批量接口单次最多处理的课程数量
+BATCH_MAX_COURSES = 50
+
+# 课程分配统计的缓存（按日期区分，课程、预订或领队变化时清空）
+_assignments_cache = TTLCache(maxsize=8)
+
+def _parse_course_ids(raw_ids):
+    """解析批量接口的课程ID列表（去重并保持顺序）
+    
+    Returns:
+        (course_ids, error_message)，解析失败时 course_ids 为 None
+    """
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return None, '请提供课程ID列表: courseIds'
+    
+    course_ids = []
+    for raw_id in raw_ids:
+        # 只接受整数或纯数字字符串；int() 会把 true 和 1.7 这样的值转换成课程ID
+        if isinstance(raw_id, int) and not isinstance(raw_id, bool):
+            course_id = raw_id
+        elif isinstance(raw_id, str) and raw_id.isascii() and raw_id.isdigit():
+            course_id = int(raw_id)
+        else:
+            return None, f'无效的课程ID: {raw_id}'
+        if course_id not in course_ids:
+            course_ids.append(course_id)
+    
+    if len(course_ids) > BATCH_MAX_COURSES:
+        return None, f'单次最多处理{BATCH_MAX_COURSES}门课程'
+    return course_ids, None
+
+def _notify_schedule_change(course_ids=None):
+    """课程或预订的写入提交后调用，使依赖课表和座位数的缓存失效
+    
+    Args:
+        course_ids: 受影响的课程ID列表，None 表示无法确定（按全部课程处理）
+    """
+    invalidate_schedule_cache()
+    _assignments_cache.clear()
+    
+    if course_ids:
+        # 写入座位变化事件，由各worker的转发线程推送给实时订阅者
+        # 业务数据已经提交，事件写入失败只记录日志，不影响本次请求
+        try:
+            record_seat_events(course_ids)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"记录座位变化事件失败: {str(e)}")
+
 @api_bp.route('/info')
 def info():
     """返回街舞社基本信息"""
@@ -64,6 +124,73 @@ def get_user_bookings():
         'data': [course.to_dict() for course in booked_courses]
     }), 200
 
+@api_bp.route('/users/booking-status', methods=['GET'])
+@jwt_required()
+def get_bulk_booking_status():
+    """批量查询当前用户对多门课程的预订状态
+    
+    请求参数（二选一）:
+        courseIds: 逗号分隔的课程ID，如 1,2,3
+        date: 日期字符串，格式为YYYY-MM-DD，查询该日期所在周的全部课程
+        
+    返回:
+        每门课程的预订状态，由一条课程左连接预订的索引查询得到；不存在的课程不会出现在结果中
+    """
+    current_user_id = get_jwt_identity()
+    
+    query = db.session.query(
+        Course.id, Course.name, Booking.id, Booking.status, Booking.created_at
+    ).outerjoin(
+        Booking,
+        db.and_(Booking.course_id == Course.id, Booking.user_id == current_user_id)
+    )
+    
+    if request.args.get('courseIds'):
+        course_ids, error_message = _parse_course_ids(request.args['courseIds'].split(','))
+        if error_message:
+            return jsonify({
+                'success': False,
+                'message': error_message
+            }), 400
+        query = query.filter(Course.id.in_(course_ids))
+    elif request.args.get('date'):
+        try:
+            target_date = date.fromisoformat(request.args['date'])
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': '日期格式错误，请使用YYYY-MM-DD格式'
+            }), 400
+        week_start, week_end = Course.get_week_range(target_date)
+        query = query.filter(Course.course_date >= week_start, Course.course_date <= week_end)
+    else:
+        return jsonify({
+            'success': False,
+            'message': '请提供 courseIds 或 date 参数'
+        }), 400
+    
+    result = []
+    for course_id, course_name, booking_id, status, booking_time in query.order_by(Course.id):
+        if booking_id is None:
+            result.append({
+                'courseId': course_id,
+                'status': 'not_booked',
+                'courseName': course_name
+            })
+        else:
+            result.append({
+                'courseId': course_id,
+                'status': status,
+                'bookingId': booking_id,
+                'courseName': course_name,
+                'bookingTime': booking_time.isoformat()
+            })
+    
+    return jsonify({
+        'success': True,
+        'data': result
+    }), 200
+
 @api_bp.route('/users/booking-status/<int:course_id>', methods=['GET'])
 @jwt_required()
 def get_booking_status(course_id):
@@ -246,6 +373,7 @@ def get_course(course_id):
 
 @api_bp.route('/courses/<int:course_id>/book', methods=['POST'])
 @jwt_required()
+@idempotent
 def book_course(course_id):
     """预订课程"""
     current_user_id = get_jwt_identity()
@@ -277,44 +405,45 @@ def book_course(course_id):
         course_id=course_id
     ).first()
     
-    if existing_booking:
-        if existing_booking.status == 'confirmed':
-            # 已有确认状态的预约
-            return jsonify({
-                'success': False,
-                'message': '您已预订此课程'
-            }), 400
-        elif existing_booking.status == 'canceled':
-            # 已取消的预约，可以重新激活
-            try:
-                # 更新状态为已确认
-                existing_booking.status = 'confirmed'
-                db.session.commit()
-                
-                return jsonify({
-                    'success': True,
-                    'data': existing_booking.to_dict(),
-                    'message': '重新预订成功'
-                }), 200
-            except Exception as e:
-                db.session.rollback()
-                return jsonify({
-                    'success': False,
-                    'message': f'重新预订失败: {str(e)}'
-                }), 500
-    
-    # 检查课程是否已满
-    current_bookings = Booking.query.filter_by(
-        course_id=course_id,
-        status='confirmed'
-    ).count()
+    if existing_booking and existing_booking.status == 'confirmed':
+        # 已有确认状态的预约
+        return jsonify({
+            'success': False,
+            'message': '您已预订此课程'
+        }), 400
     
-    if current_bookings >= course.max_capacity:
+    # 检查课程是否已满（已确认的预订 + 其他用户未过期的座位保留）
+    # 用户自己的保留不计入，因此持有保留的用户总能完成预订
+    taken_seats = Course.count_taken_seats(course_id, exclude_user_id=int(current_user_id))
+    if taken_seats >= course.max_capacity:
         return jsonify({
             'success': False,
             'message': '课程已满员'
         }), 400
     
+    # 预订成功后用户对该课程的座位保留随之失效
+    SeatHold.query.filter_by(user_id=current_user_id, course_id=course_id).delete()
+    
+    if existing_booking and existing_booking.status == 'canceled':
+        # 已取消的预约，可以重新激活
+        try:
+            # 更新状态为已确认
+            existing_booking.status = 'confirmed'
+            db.session.commit()
+            _notify_schedule_change([course_id])
+            
+            return jsonify({
+                'success': True,
+                'data': existing_booking.to_dict(),
+                'message': '重新预订成功'
+            }), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': f'重新预订失败: {str(e)}'
+            }), 500
+    
     # 创建预订
     booking = Booking(
         user_id=current_user_id,
@@ -325,6 +454,7 @@ def book_course(course_id):
     try:
         db.session.add(booking)
         db.session.commit()
+        _notify_schedule_change([course_id])
         
         return jsonify({
             'success': True,
@@ -338,6 +468,189 @@ def book_course(course_id):
             'message': f'预订失败: {str(e)}'
         }), 500
 
+@api_bp.route('/courses/<int:course_id>/hold', methods=['POST'])
+@jwt_required()
+@idempotent
+def hold_seat(course_id):
+    """限时保留课程座位
+    
+    保留期内座位计入课程容量，用户需在过期前确认（转为预订）或主动释放。
+    重复请求会延长已有保留的有效期，而不会占用第二个座位。
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+    
+    if not user.can_book_course():
+        return jsonify({
+            'success': False,
+            'message': '您的用户角色无权预约课程'
+        }), 403
+    
+    course = Course.query.get(course_id)
+    if not course:
+        return jsonify({
+            'success': False,
+            'message': '课程不存在'
+        }), 404
+    
+    existing_booking = Booking.query.filter_by(
+        user_id=current_user_id,
+        course_id=course_id,
+        status='confirmed'
+    ).first()
+    if existing_booking:
+        return jsonify({
+            'success': False,
+            'message': '您已预订此课程'
+        }), 400
+    
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=current_app.config['SEAT_HOLD_TTL_SECONDS'])
+    
+    hold = SeatHold.query.filter_by(user_id=current_user_id, course_id=course_id).first()
+    if hold and not hold.is_expired(now):
+        # 已有未过期的保留，仅延长有效期
+        hold.expires_at = expires_at
+        status_code = 200
+    else:
+        taken_seats = Course.count_taken_seats(course_id, exclude_user_id=int(current_user_id), now=now)
+        if taken_seats >= course.max_capacity:
+            return jsonify({
+                'success': False,
+                'message': '课程已满员'
+            }), 400
+        
+        # 惰性清理：借助写事务顺带删除所有已过期的保留（包括该用户自己的旧保留）
+        SeatHold.purge_expired(now)
+        hold = SeatHold(
+            user_id=current_user_id,
+            course_id=course_id,
+            expires_at=expires_at
+        )
+        db.session.add(hold)
+        status_code = 201
+    
+    try:
+        db.session.commit()
+        _notify_schedule_change([course_id])
+        
+        return jsonify({
+            'success': True,
+            'data': hold.to_dict(),
+            'message': '座位保留成功，请在有效期内确认预订'
+        }), status_code
+    except IntegrityError:
+        # 并发请求已为该用户创建了保留
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': '座位保留已存在，请勿重复提交'
+        }), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'座位保留失败: {str(e)}'
+        }), 500
+
+@api_bp.route('/holds/<int:hold_id>/confirm', methods=['POST'])
+@jwt_required()
+@idempotent
+def confirm_seat_hold(hold_id):
+    """将座位保留确认为正式预订（座位已计入容量，无需再次检查）"""
+    current_user_id = get_jwt_identity()
+    
+    hold = SeatHold.query.get(hold_id)
+    if not hold or hold.user_id != int(current_user_id):
+        return jsonify({
+            'success': False,
+            'message': '座位保留不存在'
+        }), 404
+    
+    if hold.is_expired():
+        try:
+            db.session.delete(hold)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': '座位保留已过期，请重新预订'
+        }), 410
+    
+    booking = Booking.query.filter_by(
+        user_id=current_user_id,
+        course_id=hold.course_id
+    ).first()
+    
+    if booking and booking.status == 'confirmed':
+        message = '您已预订此课程'
+    elif booking:
+        # 已取消的预约，重新激活
+        booking.status = 'confirmed'
+        message = '重新预订成功'
+    else:
+        booking = Booking(
+            user_id=current_user_id,
+            course_id=hold.course_id,
+            status='confirmed'
+        )
+        db.session.add(booking)
+        message = '预订成功'
+    
+    try:
+        db.session.delete(hold)
+        db.session.commit()
+        _notify_schedule_change([booking.course_id])
+        
+        return jsonify({
+            'success': True,
+            'data': booking.to_dict(),
+            'message': message
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'确认预订失败: {str(e)}'
+        }), 500
+
+@api_bp.route('/holds/<int:hold_id>', methods=['DELETE'])
+@jwt_required()
+def release_seat_hold(hold_id):
+    """释放座位保留"""
+    current_user_id = get_jwt_identity()
+    
+    hold = SeatHold.query.get(hold_id)
+    if not hold or hold.user_id != int(current_user_id):
+        return jsonify({
+            'success': False,
+            'message': '座位保留不存在'
+        }), 404
+    
+    course_id = hold.course_id
+    try:
+        db.session.delete(hold)
+        db.session.commit()
+        _notify_schedule_change([course_id])
+        
+        return jsonify({
+            'success': True,
+            'message': '座位保留已释放'
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'释放座位保留失败: {str(e)}'
+        }), 500
+
 @api_bp.route('/courses/<int:course_id>/cancel', methods=['DELETE'])
 @jwt_required()
 def cancel_booking(course_id):
@@ -374,6 +687,7 @@ def cancel_booking(course_id):
         # 更新状态为取消
         booking.status = 'canceled'
         db.session.commit()
+        _notify_schedule_change([course_id])
         
         return jsonify({
             'success': True,
@@ -386,6 +700,185 @@ def cancel_booking(course_id):
             'message': f'取消预订失败: {str(e)}'
         }), 500
 
+@api_bp.route('/courses/batch/book', methods=['POST'])
+@jwt_required()
+@idempotent
+def batch_book_courses():
+    """批量预订课程
+    
+    请求体: {"courseIds": [1, 2, 3]}
+    所有课程在同一事务中处理，逐项返回预订结果；单项失败不影响其他课程。
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+    
+    if not user.can_book_course():
+        return jsonify({
+            'success': False,
+            'message': '您的用户角色无权预约课程'
+        }), 403
+    
+    data = request.get_json(silent=True) or {}
+    course_ids, error_message = _parse_course_ids(data.get('courseIds'))
+    if error_message:
+        return jsonify({
+            'success': False,
+            'message': error_message
+        }), 400
+    
+    # 一次IN查询加载课程和用户已有的预约，容量按课程分组统计
+    courses = {course.id: course for course in Course.query.filter(Course.id.in_(course_ids))}
+    existing_bookings = {
+        booking.course_id: booking
+        for booking in Booking.query.filter(
+            Booking.user_id == current_user_id,
+            Booking.course_id.in_(course_ids)
+        )
+    }
+    taken_seats = Course.count_taken_seats_bulk(course_ids, exclude_user_id=int(current_user_id))
+    
+    results = []
+    booked_ids = []
+    for course_id in course_ids:
+        course = courses.get(course_id)
+        booking = existing_bookings.get(course_id)
+        
+        if not course:
+            results.append({'courseId': course_id, 'success': False, 'message': '课程不存在'})
+        elif booking and booking.status == 'confirmed':
+            results.append({'courseId': course_id, 'success': False, 'message': '您已预订此课程'})
+        elif taken_seats[course_id] >= course.max_capacity:
+            results.append({'courseId': course_id, 'success': False, 'message': '课程已满员'})
+        else:
+            if booking:
+                # 已取消的预约，重新激活
+                booking.status = 'confirmed'
+                message = '重新预订成功'
+            else:
+                booking = Booking(
+                    user_id=current_user_id,
+                    course_id=course_id,
+                    status='confirmed'
+                )
+                db.session.add(booking)
+                message = '预订成功'
+            booked_ids.append(course_id)
+            results.append({'courseId': course_id, 'success': True, 'message': message, 'booking': booking})
+    
+    if not booked_ids:
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': results,
+                'bookedCount': 0,
+                'failedCount': len(results)
+            },
+            'message': '没有课程预订成功'
+        }), 200
+    
+    try:
+        # 预订成功的课程，用户对其的座位保留随之失效
+        SeatHold.query.filter(
+            SeatHold.user_id == current_user_id,
+            SeatHold.course_id.in_(booked_ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        _notify_schedule_change(booked_ids)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'批量预订失败: {str(e)}'
+        }), 500
+    
+    for result in results:
+        if 'booking' in result:
+            result['data'] = result.pop('booking').to_dict()
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'results': results,
+            'bookedCount': len(booked_ids),
+            'failedCount': len(results) - len(booked_ids)
+        },
+        'message': f'成功预订{len(booked_ids)}门课程'
+    }), 200
+
+@api_bp.route('/courses/batch/cancel', methods=['POST'])
+@jwt_required()
+@idempotent
+def batch_cancel_bookings():
+    """批量取消预订
+    
+    请求体: {"courseIds": [1, 2, 3]}
+    所有课程在同一事务中处理，逐项返回取消结果。
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({
+            'success': False,
+            'message': '用户不存在'
+        }), 404
+    
+    data = request.get_json(silent=True) or {}
+    course_ids, error_message = _parse_course_ids(data.get('courseIds'))
+    if error_message:
+        return jsonify({
+            'success': False,
+            'message': error_message
+        }), 400
+    
+    bookings = {
+        booking.course_id: booking
+        for booking in Booking.query.filter(
+            Booking.user_id == current_user_id,
+            Booking.course_id.in_(course_ids)
+        )
+    }
+    
+    results = []
+    canceled_ids = []
+    for course_id in course_ids:
+        booking = bookings.get(course_id)
+        if not booking:
+            results.append({'courseId': course_id, 'success': False, 'message': '未找到预订记录'})
+        elif booking.status == 'canceled':
+            results.append({'courseId': course_id, 'success': True, 'message': '预订已经是取消状态'})
+        else:
+            booking.status = 'canceled'
+            canceled_ids.append(course_id)
+            results.append({'courseId': course_id, 'success': True, 'message': '取消预订成功'})
+    
+    try:
+        if canceled_ids:
+            db.session.commit()
+            _notify_schedule_change(canceled_ids)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'批量取消预订失败: {str(e)}'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'results': results,
+            'canceledCount': len(canceled_ids),
+            'failedCount': sum(1 for result in results if not result['success'])
+        },
+        'message': f'成功取消{len(canceled_ids)}门课程的预订'
+    }), 200
+
 @api_bp.route('/leaders', methods=['GET'])
 def get_all_leaders():
     """获取所有舞种领队"""
@@ -515,13 +1008,14 @@ def get_weekly_schedule():
         # 解析日期
         target_date = date.fromisoformat(date_str)
         
-        # 获取该周的所有课程
-        week_courses = Course.get_week_courses(target_date)
-        
         # 计算一周起始日和结束日
-        weekday = target_date.weekday()
-        week_start = target_date - timedelta(days=weekday)  # 周一
-        week_end = week_start + timedelta(days=6)  # 周日
+        week_start, week_end = Course.get_week_range(target_date)
+        
+        # 从课程摘要读模型获取该周的所有课程（单表索引查询，预约名单已冗余存储）
+        week_courses = CourseSummary.query.filter(
+            CourseSummary.course_date >= week_start,
+            CourseSummary.course_date <= week_end
+        ).order_by(CourseSummary.course_date, CourseSummary.time_slot).all()
         
         # 按日期分组课程
         date_groups = {}
@@ -564,6 +1058,7 @@ def get_weekly_schedule():
 
 @api_bp.route('/admin/courses', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_course():
     """创建课程"""
     current_user_id = get_jwt_identity()
@@ -662,6 +1157,7 @@ def create_course():
     try:
         db.session.add(new_course)
         db.session.commit()
+        _notify_schedule_change([new_course.id])
         
         return jsonify({
             'success': True,
@@ -675,8 +1171,98 @@ def create_course():
             'message': f'创建课程失败: {str(e)}'
         }), 500
 
+@api_bp.route('/admin/courses/import', methods=['POST'])
+@jwt_required()
+@idempotent
+def import_courses_file():
+    """从CSV或iCalendar文件批量导入课程（管理员和领队）
+    
+    上传 multipart 表单的 file 字段，或直接把文件内容作为请求体。
+    CSV 表头与创建课程接口的字段相同: name,instructor,location,courseDate,timeSlot,maxCapacity,description,danceType,leaderId
+    
+    请求参数:
+        format: csv 或 ics，默认按文件名或内容判断
+        dryRun: 为 true 时只检查，不创建课程
+        instructor: ICS 事件中没有教练信息时使用的教练
+        
+    返回:
+        创建数量、逐行的错误报告和完整的冲突列表；有错误或冲突的行被跳过，其余课程照常创建
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user or not user.is_admin() and not user.is_leader():
+        return jsonify({
+            'success': False,
+            'message': '权限不足，您无权创建课程'
+        }), 403
+    
+    upload = request.files.get('file')
+    raw = upload.read() if upload else request.get_data()
+    try:
+        content = raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return jsonify({
+            'success': False,
+            'message': '导入文件必须是UTF-8编码'
+        }), 400
+    
+    file_format = request.values.get('format')
+    if not file_format:
+        filename = (upload.filename or '').lower() if upload else ''
+        is_ics = filename.endswith('.ics') or content.lstrip('\ufeff').lstrip().upper().startswith('BEGIN:VCALENDAR')
+        file_format = 'ics' if is_ics else 'csv'
+    
+    try:
+        if file_format == 'ics':
+            rows = parse_course_ics(content, current_app.config['CALENDAR_TIMEZONE'], request.values.get('instructor', ''))
+        elif file_format == 'csv':
+            rows = parse_course_csv(content)
+        else:
+            raise ValueError('导入格式必须是 csv 或 ics')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    if not rows:
+        return jsonify({
+            'success': False,
+            'message': '导入文件中没有课程数据'
+        }), 400
+    
+    max_rows = current_app.config['COURSE_IMPORT_MAX_ROWS']
+    if len(rows) > max_rows:
+        return jsonify({
+            'success': False,
+            'message': f'单次最多导入{max_rows}门课程'
+        }), 400
+    
+    dry_run = str(request.values.get('dryRun', '')).lower() in ['1', 'true', 'yes']
+    
+    try:
+        report = import_courses(rows, user, dry_run=dry_run)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'课程导入失败: {str(e)}'
+        }), 500
+    
+    if not dry_run and report['courses']:
+        _notify_schedule_change([course['id'] for course in report['courses']])
+    
+    return jsonify({
+        'success': True,
+        'message': f"{'检查完成' if dry_run else '导入完成'}：成功 {report['created']} 门，失败 {report['failed']} 门，冲突 {len(report['conflicts'])} 处",
+        'data': report
+    }), 200
+
 @api_bp.route('/admin/courses/<int:course_id>', methods=['PUT'])
 @jwt_required()
+@idempotent
 def update_course(course_id):
     """更新课程"""
     current_user_id = get_jwt_identity()
@@ -786,6 +1372,7 @@ def update_course(course_id):
     
     try:
         db.session.commit()
+        _notify_schedule_change([course_id])
         
         return jsonify({
             'success': True,
@@ -801,6 +1388,7 @@ def update_course(course_id):
 
 @api_bp.route('/admin/courses/<int:course_id>', methods=['DELETE'])
 @jwt_required()
+@idempotent
 def delete_course(course_id):
     """删除课程（管理员可删除任何课程，领队只能删除自己舞种的课程）"""
     current_user_id = get_jwt_identity()
@@ -829,12 +1417,15 @@ def delete_course(course_id):
         }), 403
     
     try:
-        # 删除课程前先删除所有相关预订
-        Booking.query.filter_by(course_id=course_id).delete()
+        # 相关预订改为取消状态（逐条修改以分配同步序号，客户端可同步到变化），座位保留直接删除
+        for booking in Booking.query.filter_by(course_id=course_id, status='confirmed'):
+            booking.status = 'canceled'
+        SeatHold.query.filter_by(course_id=course_id).delete()
         
-        # 删除课程
-        db.session.delete(course)
+        # 软删除课程：保留为增量同步的墓碑，普通查询会自动排除
+        course.deleted_at = datetime.utcnow()
         db.session.commit()
+        _notify_schedule_change([course_id])
         
         return jsonify({
             'success': True,
@@ -847,6 +1438,60 @@ def delete_course(course_id):
             'message': f'课程删除失败: {str(e)}'
         }), 500
 
+def _course_stats_columns(today):
+    """课程摘要上的聚合列：课程数、有效预订总数、平均满员率、未开始课程数"""
+    return (
+        db.func.count(CourseSummary.course_id),
+        db.func.coalesce(db.func.sum(CourseSummary.booked_count), 0),
+        db.func.avg(CourseSummary.booked_count * 1.0 / db.func.nullif(CourseSummary.max_capacity, 0)),
+        db.func.count(db.case((CourseSummary.course_date >= today, CourseSummary.course_id)))
+    )
+
+def _course_stats_dict(course_count, booking_count, avg_fill_rate, upcoming_count):
+    return {
+        'courseCount': course_count,
+        'bookingCount': booking_count,
+        'avgFillRate': round(avg_fill_rate or 0.0, 4),
+        'upcomingCount': upcoming_count
+    }
+
+def _load_course_assignments(today):
+    """统计每个领队及公共课程的课程分配情况
+    
+    固定两条聚合查询：领队左连接课程摘要后按领队分组（舞种相同或由其负责的课程，
+    同时满足的只计一次），公共课程单独聚合。查询数与领队、舞种数量无关。
+    舞种按 IS NOT DISTINCT FROM 比较：未设置舞种的领队与原先逐个查询时一样，计入未设置舞种的课程。
+    """
+    leader_rows = db.session.query(
+        User.id, User.name, User.dance_type, *_course_stats_columns(today)
+    ).outerjoin(
+        CourseSummary,
+        CourseSummary.dance_type.is_not_distinct_from(User.dance_type) | (CourseSummary.leader_id == User.id)
+    ).filter(
+        User.role == 'leader'
+    ).group_by(User.id).order_by(User.id).all()
+    
+    result = []
+    for leader_id, leader_name, dance_type, *stats in leader_rows:
+        data = {
+            'leaderId': leader_id,
+            'leaderName': leader_name,
+            'danceType': dance_type
+        }
+        data.update(_course_stats_dict(*stats))
+        result.append(data)
+    
+    # 公共课程
+    public_stats = db.session.query(*_course_stats_columns(today)).filter(
+        CourseSummary.dance_type.is_(None),
+        CourseSummary.leader_id.is_(None)
+    ).one()
+    data = {'danceType': 'public'}
+    data.update(_course_stats_dict(*public_stats))
+    result.append(data)
+    
+    return result
+
 @api_bp.route('/admin/courses/assignments', methods=['GET'])
 @jwt_required()
 def get_course_assignments():
@@ -861,31 +1506,12 @@ def get_course_assignments():
             'message': '无权访问此接口'
         }), 403
     
-    # 获取所有课程和领队
-    leaders = User.query.filter_by(role='leader').all()
-    
-    # 统计每个舞种的课程数
-    result = []
-    for leader in leaders:
-        # 该领队的课程数
-        course_count = Course.query.filter(
-            (Course.dance_type == leader.dance_type) | 
-            (Course.leader_id == leader.id)
-        ).count()
-        
-        result.append({
-            'leaderId': leader.id,
-            'leaderName': leader.name,
-            'danceType': leader.dance_type,
-            'courseCount': course_count
-        })
-    
-    # 公共课程数
-    public_count = Course.query.filter(Course.dance_type.is_(None), Course.leader_id.is_(None)).count()
-    result.append({
-        'danceType': 'public',
-        'courseCount': public_count
-    })
+    today = date.today()
+    result = _assignments_cache.get_or_load(
+        today.isoformat(),
+        current_app.config['ASSIGNMENTS_CACHE_TTL_SECONDS'],
+        lambda: _load_course_assignments(today)
+    )
     
     return jsonify({
         'success': True,
@@ -953,6 +1579,7 @@ def assign_course(course_id):
     
     try:
         db.session.commit()
+        _notify_schedule_change([course_id])
         
         return jsonify({
             'success': True,
@@ -1103,6 +1730,7 @@ def update_user_password():
 
 @api_bp.route('/users', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_user():
     """创建新用户（仅管理员可创建用户）"""
     current_user_id = get_jwt_identity()
@@ -1182,6 +1810,131 @@ def create_user():
             'message': f'用户创建失败: {str(e)}'
         }), 500
 
+@api_bp.route('/users/import', methods=['POST'])
+@jwt_required()
+@idempotent
+def import_users_csv():
+    """从CSV批量导入用户（仅管理员）
+    
+    上传 multipart 表单的 file 字段，或直接以 text/csv 作为请求体。
+    表头: username,name,email,password,role,dance_type（role 默认为 member）
+    
+    请求参数:
+        dryRun: 为 true 时只校验，不创建用户
+        
+    返回:
+        dryRun 时直接返回逐行的校验报告；否则返回202和导入任务，导入（哈希密码耗时较长）在后台执行，
+        通过 /api/users/import/<id> 查询进度和最终报告
+    """
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    # 检查权限
+    if not current_user or current_user.role != 'admin':
+        return jsonify({
+            'success': False,
+            'message': '无权创建用户'
+        }), 403
+    
+    upload = request.files.get('file')
+    raw = upload.read() if upload else request.get_data()
+    try:
+        rows = parse_user_csv(raw.decode('utf-8'))
+    except UnicodeDecodeError:
+        return jsonify({
+            'success': False,
+            'message': '导入文件必须是UTF-8编码'
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    if not rows:
+        return jsonify({
+            'success': False,
+            'message': '导入文件中没有用户数据'
+        }), 400
+    
+    max_rows = current_app.config['USER_IMPORT_MAX_ROWS']
+    if len(rows) > max_rows:
+        return jsonify({
+            'success': False,
+            'message': f'单次最多导入{max_rows}个用户'
+        }), 400
+    
+    dry_run = str(request.values.get('dryRun', '')).lower() in ['1', 'true', 'yes']
+    
+    if dry_run:
+        # 只校验不哈希，几千行也很快，直接返回报告
+        try:
+            report = import_users(rows, rounds=password_hasher.rounds(), dry_run=True)
+            db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': f'用户导入失败: {str(e)}'
+            }), 500
+        
+        return jsonify({
+            'success': True,
+            'message': f"校验完成：成功 {report['created']} 行，失败 {report['failed']} 行",
+            'data': report
+        }), 200
+    
+    try:
+        purge_expired_user_imports(current_app.config['USER_IMPORT_RETENTION_HOURS'])
+        job = UserImportJob(total_rows=len(rows), created_by=current_user.id)
+        db.session.add(job)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'创建导入任务失败: {str(e)}'
+        }), 500
+    
+    def on_complete(report):
+        if any(user['role'] == 'leader' for user in report['users']):
+            _assignments_cache.clear()
+    
+    user_import_runner.submit(
+        current_app._get_current_object(), job.id, rows, password_hasher.rounds(), on_complete
+    )
+    
+    return jsonify({
+        'success': True,
+        'message': '导入任务已创建',
+        'data': job.to_dict()
+    }), 202
+
+@api_bp.route('/users/import/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_user_import(job_id):
+    """查询用户导入任务的进度，完成后 result 中为逐行的导入报告（仅管理员）"""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user or current_user.role != 'admin':
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+    
+    job = UserImportJob.query.get(job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'message': '导入任务不存在'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job.to_dict()
+    }), 200
+
 @api_bp.route('/users/<int:user_id>/role', methods=['PUT'])
 @jwt_required()
 def update_user_role(user_id):
@@ -1256,6 +2009,8 @@ def update_user_role(user_id):
     
     try:
         db.session.commit()
+        # 角色和舞种影响课程分配统计
+        _assignments_cache.clear()
         
         return jsonify({
             'success': True,
@@ -1299,20 +2054,32 @@ def delete_user(user_id):
         }), 404
     
     try:
-        # 先删除用户关联的预订
+        # 记录受影响的课程，用于删除后通知座位数变化
+        affected_course_ids = [
+            course_id for course_id, in db.session.query(Booking.course_id).filter_by(user_id=user_id)
+        ] + [
+            course_id for course_id, in db.session.query(SeatHold.course_id).filter_by(user_id=user_id)
+        ]
+        
+        # 先删除用户关联的预订和座位保留（批量删除不经过会话钩子，需显式标记课程摘要待刷新）
+        mark_courses_changed(affected_course_ids)
+        touch_courses(affected_course_ids)
         Booking.query.filter_by(user_id=user_id).delete()
+        SeatHold.query.filter_by(user_id=user_id).delete()
+        ArchivedBooking.query.filter_by(user_id=user_id).delete()
         
         # 如果是领队，需要处理其负责的课程
         if target_user.role == 'leader':
             # 将该领队的课程重置为公共课程（可选：或者删除这些课程）
-            Course.query.filter_by(leader_id=user_id).update({
-                'leader_id': None,
-                'dance_type': None
-            })
+            # 逐条修改以分配同步序号
+            for course in Course.query.filter_by(leader_id=user_id):
+                course.leader_id = None
+                course.dance_type = None
         
         # 删除用户
         db.session.delete(target_user)
         db.session.commit()
+        _notify_schedule_change(affected_course_ids)
         
         return jsonify({
             'success': True,
@@ -1426,6 +2193,8 @@ def update_user_dance_type(user_id):
     
     try:
         db.session.commit()
+        # 舞种影响课程分配统计
+        _assignments_cache.clear()
         
         return jsonify({
             'success': True,
@@ -1574,31 +2343,14 @@ def get_recent_courses_by_dance_type(dance_type):
     except ValueError:
         limit = 10
     
-    # 获取特定舞种最近的课程，按课程日期降序排序
-    courses = Course.query.filter_by(dance_type=dance_type).order_by(Course.course_date.desc()).limit(limit).all()
+    # 从课程摘要读模型获取特定舞种最近的课程，按课程日期降序排序
+    # 摘要中已冗余存储预约用户的详细信息，无需再逐个查询预订和用户
+    courses = CourseSummary.query.filter_by(dance_type=dance_type).order_by(
+        CourseSummary.course_date.desc()
+    ).limit(limit).all()
     
-    # 构建详细的课程数据，包括预约用户信息
-    result = []
-    for course in courses:
-        # 获取基本课程信息
-        course_data = course.to_dict()
-        
-        # 获取预约用户的详细信息
-        booked_users = []
-        for booking in course.bookings:
-            if booking.status == 'confirmed':
-                user = User.query.get(booking.user_id)
-                if user:
-                    booked_users.append({
-                        'id': user.id,
-                        'name': user.name,
-                        'username': user.username,
-                        'bookingTime': booking.created_at.isoformat() + 'Z'
-                    })
-        
-        # 用详细的预约用户信息替换简单的用户ID列表
-        course_data['bookedBy'] = booked_users
-        result.append(course_data)
+    # 构建详细的课程数据，bookedBy 为预约用户的详细信息
+    result = [course.to_dict(detailed_roster=True) for course in courses]
     
     return jsonify({
         'success': True,
@@ -0,0 +1,299 @@
+from flask import jsonify, request, current_app, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.models.course import Course, Booking, SeatEvent
+from app.utils.cache import TTLCache
+from app.utils.seat_events import broadcaster, relay
+from app.utils.availability import availability_table
+from app import db
+from datetime import date, timedelta
+import hashlib
+import json
+import queue
+
+# 剩余座位接口单次可查询的最大天数
+AVAILABILITY_MAX_DAYS = 62
+# 区间课表单次可查询的最大天数（约一个学期）
+SCHEDULE_RANGE_MAX_DAYS = 140
+
+# 按周缓存与用户无关的课表摘要，所有用户共享
+_week_summary_cache = TTLCache(maxsize=64)
+
+def invalidate_schedule_cache():
+    """课程或预订发生变化后清除本进程的课表缓存"""
+    _week_summary_cache.clear()
+
+def _load_week_summary(week_start, week_end):
+    """一条聚合查询生成某一周的课表摘要（按日期分组，不含预约名单）"""
+    date_groups = {}
+    for i in range((week_end - week_start).days + 1):
+        day = week_start + timedelta(days=i)
+        date_groups[day.isoformat()] = []
+    
+    for course, booked_count, held_count in Course.get_courses_with_seat_counts(week_start, week_end):
+        date_groups[course.course_date.isoformat()].append(course.to_summary_dict(booked_count, held_count))
+    
+    return date_groups
+
+def _get_week_summary(week_start, week_end):
+    """读取（必要时生成并缓存）某一周的课表摘要"""
+    return _week_summary_cache.get_or_load(
+        week_start,
+        current_app.config['SCHEDULE_CACHE_TTL_SECONDS'],
+        lambda: _load_week_summary(week_start, week_end)
+    )
+
+def _format_sse(event, data, event_id=None):
+    """格式化一条SSE消息"""
+    message = f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+    if event_id is not None:
+        message = f'id: {event_id}\n' + message
+    return message
+
+@api_bp.route('/schedule/range', methods=['GET'])
+def get_range_schedule():
+    """获取任意日期区间的课程安排（月视图等多周场景）
+    
+    请求参数:
+        from: 起始日期，格式为YYYY-MM-DD
+        to: 结束日期，格式为YYYY-MM-DD，跨度不超过约一个学期
+        
+    返回:
+        区间内每一天的课程（不含预约名单），课程和预约人数由一条聚合查询取出，
+        再对按日期排序的结果做一次遍历完成分组
+    """
+    if not request.args.get('from') or not request.args.get('to'):
+        return jsonify({
+            'success': False,
+            'message': '请提供 from 和 to 参数'
+        }), 400
+    
+    try:
+        start_date = date.fromisoformat(request.args['from'])
+        end_date = date.fromisoformat(request.args['to'])
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': '日期格式错误，请使用YYYY-MM-DD格式'
+        }), 400
+    
+    if end_date < start_date or (end_date - start_date).days >= SCHEDULE_RANGE_MAX_DAYS:
+        return jsonify({
+            'success': False,
+            'message': f'日期范围无效，结束日期不能早于起始日期且跨度不能超过{SCHEDULE_RANGE_MAX_DAYS}天'
+        }), 400
+    
+    try:
+        rows = Course.get_courses_with_seat_counts(start_date, end_date)
+        
+        # 结果已按日期排序：日期游标与课程列表同步前进，一次遍历生成每天的分组（包括没有课程的日期）
+        schedule = []
+        index = 0
+        day = start_date
+        while day <= end_date:
+            courses = []
+            while index < len(rows) and rows[index][0].course_date == day:
+                course, booked_count, held_count = rows[index]
+                courses.append(course.to_summary_dict(booked_count, held_count))
+                index += 1
+            schedule.append({
+                'date': day.isoformat(),
+                'courses': courses
+            })
+            day += timedelta(days=1)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'from': start_date.isoformat(),
+                'to': end_date.isoformat(),
+                'schedule': schedule
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取课程安排失败: {str(e)}'
+        }), 500
+
+@api_bp.route('/schedule/availability', methods=['GET'])
+def get_seat_availability():
+    """获取日期范围内各课程的剩余座位数（面向轮询客户端的轻量接口）
+    
+    请求参数:
+        from: 起始日期，格式为YYYY-MM-DD，默认为本周一
+        to: 结束日期，格式为YYYY-MM-DD，默认为 from 所在周的周日
+        
+    返回:
+        {"success": true, "data": {"课程ID": 剩余座位数, ...}}，支持 ETag / If-None-Match
+    """
+    try:
+        if request.args.get('from'):
+            start_date = date.fromisoformat(request.args['from'])
+        else:
+            start_date = Course.get_week_range(date.today())[0]
+        if request.args.get('to'):
+            end_date = date.fromisoformat(request.args['to'])
+        else:
+            end_date = Course.get_week_range(start_date)[1]
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': '日期格式错误，请使用YYYY-MM-DD格式'
+        }), 400
+    
+    if end_date < start_date or (end_date - start_date).days >= AVAILABILITY_MAX_DAYS:
+        return jsonify({
+            'success': False,
+            'message': f'日期范围无效，结束日期不能早于起始日期且跨度不能超过{AVAILABILITY_MAX_DAYS}天'
+        }), 400
+    
+    availability_table.sync(current_app.config['AVAILABILITY_RELOAD_SECONDS'])
+    remaining = availability_table.get_range(start_date, end_date)
+    
+    # 紧凑序列化并按内容计算ETag，不同worker对相同数据给出相同的ETag
+    body = json.dumps(
+        {'success': True, 'data': {str(course_id): seats for course_id, seats in sorted(remaining.items())}},
+        separators=(',', ':')
+    )
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.sha1(body.encode('utf-8')).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@api_bp.route('/schedule/stream', methods=['GET'])
+def stream_seat_availability():
+    """以Server-Sent Events推送某一周课程的座位数变化
+    
+    连接建立后先发送一条 snapshot 事件（该周全部课程的 bookedCount/remaining），
+    之后每当课程或预订发生变化推送一条 seats 事件；课程被删除时 deleted 为 true。
+    客户端收到 resync 事件时应重新连接以获取新的快照。
+    
+    请求参数:
+        date: 日期字符串，格式为YYYY-MM-DD，默认为当天
+    """
+    date_str = request.args.get('date', date.today().isoformat())
+    try:
+        target_date = date.fromisoformat(date_str)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': '日期格式错误，请使用YYYY-MM-DD格式'
+        }), 400
+    
+    week_start, week_end = Course.get_week_range(target_date)
+    week_start_str, week_end_str = week_start.isoformat(), week_end.isoformat()
+    
+    keepalive = current_app.config['SSE_KEEPALIVE_SECONDS']
+    
+    # 先订阅再启动转发线程，保证线程看到订阅者
+    subscription = broadcaster.subscribe()
+    relay.ensure_started(current_app._get_current_object())
+    
+    # 订阅之后再直接查询快照（不走课表缓存，缓存可能落后于其他worker提交的变化）。
+    # 先读出当前最大的事件ID：ID不大于它的事件在快照查询之前就已写入，快照已经包含，推送时跳过
+    try:
+        snapshot_event_id = db.session.query(db.func.max(SeatEvent.id)).scalar() or 0
+        snapshot = {}
+        for course, booked_count, held_count in Course.get_courses_with_seat_counts(week_start, week_end):
+            course_data = course.to_summary_dict(booked_count, held_count)
+            snapshot[course.id] = {
+                'bookedCount': course_data['bookedCount'],
+                'remaining': course_data['remaining'],
+                'maxCapacity': course_data['maxCapacity']
+            }
+    except Exception:
+        broadcaster.unsubscribe(subscription)
+        raise
+    
+    def generate():
+        try:
+            yield _format_sse('snapshot', {
+                'weekStart': week_start_str,
+                'weekEnd': week_end_str,
+                'courses': snapshot
+            })
+            while True:
+                if subscription.overflowed:
+                    yield _format_sse('resync', {})
+                    return
+                try:
+                    event = subscription.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if event['id'] <= snapshot_event_id:
+                    continue
+                # 已删除的课程没有日期，推送给所有订阅者，由客户端按ID忽略
+                course_date = event['courseDate']
+                if course_date is None or week_start_str <= course_date <= week_end_str:
+                    yield _format_sse('seats', event, event['id'])
+        finally:
+            broadcaster.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # 禁止Nginx缓冲推送内容
+    })
+
+@api_bp.route('/schedule/me', methods=['GET'])
+@jwt_required()
+def get_my_weekly_schedule():
+    """获取某一周的个性化课程安排
+    
+    与 /schedule 返回结构相同，但每门课程不再附带 bookedBy 名单，
+    而是返回 bookedByMe、bookedCount 和 remaining。
+    课表摘要在用户之间共享缓存，每次请求只额外查询一次当前用户自己的预订。
+    
+    请求参数:
+        date: 日期字符串，格式为YYYY-MM-DD，默认为当天
+    """
+    current_user_id = get_jwt_identity()
+    date_str = request.args.get('date', date.today().isoformat())
+    
+    try:
+        target_date = date.fromisoformat(date_str)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': '日期格式错误，请使用YYYY-MM-DD格式'
+        }), 400
+    
+    try:
+        week_start, week_end = Course.get_week_range(target_date)
+        date_groups = _get_week_summary(week_start, week_end)
+        
+        # 当前用户在该周已确认的预订
+        my_course_ids = {
+            course_id for course_id, in db.session.query(Booking.course_id).join(Course).filter(
+                Booking.user_id == current_user_id,
+                Booking.status == 'confirmed',
+                Course.course_date >= week_start,
+                Course.course_date <= week_end
+            )
+        }
+        
+        result = {
+            'weekStart': week_start.isoformat(),
+            'weekEnd': week_end.isoformat(),
+            'schedule': [
+                {
+                    'date': date_key,
+                    # 缓存中的字典被多个请求共享，叠加个人字段时需复制
+                    'courses': [dict(course, bookedByMe=course['id'] in my_course_ids) for course in courses]
+                }
+                for date_key, courses in date_groups.items()
+            ]
+        }
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取课程安排失败: {str(e)}'
+        }), 500
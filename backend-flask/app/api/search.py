@@ -0,0 +1,110 @@
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.models.user import User
+from app.utils.search import search_users, search_courses, split_terms
+
+# 搜索结果每页最多条数
+SEARCH_MAX_PAGE_SIZE = 100
+
+def _parse_search_args():
+    """解析搜索参数，返回 (关键词, 页码, 每页条数, 错误信息)"""
+    query = (request.args.get('q') or '').strip()
+    if not split_terms(query):
+        return None, None, None, '请提供搜索关键词: q'
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        page_size = min(max(int(request.args.get('pageSize', 20)), 1), SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return None, None, None, '分页参数必须是整数'
+    return query, page, page_size, None
+
+@api_bp.route('/users/search', methods=['GET'])
+@jwt_required()
+def search_all_users():
+    """按用户名、姓名、邮箱搜索用户（仅管理员）
+
+    请求参数:
+        q: 关键词，多个词用空格分隔，每个词按前缀匹配，需同时满足
+        page: 页码，默认1
+        pageSize: 每页条数，默认20，最多100
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    # 检查用户权限
+    if not user or user.role != 'admin':
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+    
+    query, page, page_size, error = _parse_search_args()
+    if error:
+        return jsonify({
+            'success': False,
+            'message': error
+        }), 400
+    
+    try:
+        users, total = search_users(query, page, page_size)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'搜索用户失败: {str(e)}'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'items': [user.to_dict() for user in users],
+            'total': total,
+            'page': page,
+            'pageSize': page_size
+        }
+    }), 200
+
+@api_bp.route('/admin/courses/search', methods=['GET'])
+@jwt_required()
+def search_admin_courses():
+    """按课程名称、教练、地点、描述搜索课程（管理员可搜索所有课程，领队只能搜索自己舞种的课程和公共课程）
+
+    请求参数同用户搜索
+    """
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    # 检查用户权限
+    if not current_user or (current_user.role != 'admin' and current_user.role != 'leader'):
+        return jsonify({
+            'success': False,
+            'message': '无权访问此接口'
+        }), 403
+    
+    query, page, page_size, error = _parse_search_args()
+    if error:
+        return jsonify({
+            'success': False,
+            'message': error
+        }), 400
+    
+    try:
+        courses, total = search_courses(
+            query, page, page_size,
+            leader=current_user if current_user.role == 'leader' else None
+        )
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'搜索课程失败: {str(e)}'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'items': [course.to_dict() for course in courses],
+            'total': total,
+            'page': page,
+            'pageSize': page_size
+        }
+    }), 200
@@ -0,0 +1,130 @@
+from flask import jsonify, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import api_bp
+from app.models.course import Course, Booking
+from app.models.sync import SyncSequence
+from app.models.archive import ArchiveRun
+from app import db
+
+def _course_sync_dict(course, booked_count, held_count):
+    """课程的同步表示：已删除的课程只返回墓碑"""
+    if course.deleted_at:
+        return {
+            'id': course.id,
+            'deleted': True,
+            'deletedAt': course.deleted_at.isoformat() + 'Z',
+            'changeSeq': course.change_seq
+        }
+    data = course.to_summary_dict(booked_count, held_count)
+    data.update({
+        'deleted': False,
+        'updatedAt': course.updated_at.isoformat() + 'Z' if course.updated_at else None,
+        'changeSeq': course.change_seq
+    })
+    return data
+
+def _booking_sync_dict(booking):
+    data = booking.to_dict()
+    data['changeSeq'] = booking.change_seq
+    return data
+
+def _merge_page(courses, bookings, page_size):
+    """两张表各按序号取前 page_size 条，合并后截取序号最小的 page_size 条，返回 (变化列表, 是否还有更多)"""
+    changes = sorted(
+        [(row[0].change_seq, 'course', row) for row in courses] +
+        [(booking.change_seq, 'booking', booking) for booking in bookings],
+        key=lambda change: change[0]
+    )
+    has_more = len(changes) > page_size or len(courses) == page_size or len(bookings) == page_size
+    return changes[:page_size], has_more
+
+@api_bp.route('/sync', methods=['GET'])
+@jwt_required()
+def sync_changes():
+    """增量同步课程和当前用户的预订
+
+    请求参数:
+        since: 上次同步返回的游标，缺省或为0时返回全量快照（不含墓碑）；
+               游标早于最近一次归档时同样返回全量快照，客户端应以快照替换本地数据
+        snapshotAfter: 全量快照分页时上一页返回的 snapshotAfter，与该页的 cursor 一起传入以继续快照
+
+    返回:
+        cursor: 下次同步时传入的游标
+        hasMore: 是否还有未返回的变化（为 true 时应立即用新游标继续同步）
+        full: 为 true 时本页是全量快照的第一页，客户端应先清空本地数据
+        snapshotAfter: 全量快照还有后续页时返回，继续同步时原样传回
+        courses / bookings: 自游标之后变化的记录，已删除的课程以 deleted=true 的墓碑表示
+    """
+    current_user_id = get_jwt_identity()
+
+    try:
+        since = int(request.args.get('since', 0))
+        snapshot_after = request.args.get('snapshotAfter')
+        snapshot_after = int(snapshot_after) if snapshot_after not in (None, '') else None
+        if since < 0 or (snapshot_after is not None and snapshot_after < 0):
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': '无效的同步游标'
+        }), 400
+
+    page_size = current_app.config['SYNC_PAGE_SIZE']
+    booked, held = Course.seat_count_columns()
+    course_query = db.session.query(Course, booked, held)
+    booking_query = Booking.query.filter(Booking.user_id == current_user_id)
+
+    # 先读游标再读数据：之后提交的变化序号更大，会在下次同步时返回
+    current_seq = SyncSequence.current_value()
+
+    # 归档直接从热表删除记录而不留墓碑，游标早于归档时无法增量得知这些删除（快照进行中发生归档时重新开始快照）
+    if since and since < ArchiveRun.current_sync_horizon():
+        since = 0
+        snapshot_after = None
+
+    if since == 0 or snapshot_after is not None:
+        # 全量快照同样按序号分页：游标固定为第一页读取时的序号，快照期间发生的变化（包括删除）在快照之后增量返回
+        cursor = current_seq if since == 0 else since
+        after = snapshot_after or 0
+        courses = course_query.filter(
+            Course.change_seq > after
+        ).order_by(Course.change_seq).limit(page_size).all()
+        bookings = booking_query.filter(
+            Booking.change_seq > after
+        ).order_by(Booking.change_seq).limit(page_size).all()
+        changes, has_more = _merge_page(courses, bookings, page_size)
+
+        data = {
+            'cursor': cursor,
+            'hasMore': has_more,
+            'full': snapshot_after is None,
+            'courses': [_course_sync_dict(*item) for _, kind, item in changes if kind == 'course'],
+            'bookings': [_booking_sync_dict(item) for _, kind, item in changes if kind == 'booking']
+        }
+        if has_more:
+            data['snapshotAfter'] = changes[-1][0]
+        return jsonify({
+            'success': True,
+            'data': data
+        }), 200
+
+    # 增量模式：墓碑同样返回
+    courses = course_query.filter(
+        Course.change_seq > since
+    ).order_by(Course.change_seq).limit(page_size).execution_options(include_deleted=True).all()
+    bookings = booking_query.filter(
+        Booking.change_seq > since
+    ).order_by(Booking.change_seq).limit(page_size).all()
+    changes, has_more = _merge_page(courses, bookings, page_size)
+    cursor = changes[-1][0] if has_more else max(current_seq, since)
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'cursor': cursor,
+            'hasMore': has_more,
+            'full': False,
+            'courses': [_course_sync_dict(*item) for _, kind, item in changes if kind == 'course'],
+            'bookings': [_booking_sync_dict(item) for _, kind, item in changes if kind == 'booking']
+        }
+    }), 200
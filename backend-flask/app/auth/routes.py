@@ -4,6 +4,8 @@ from app.auth import auth_bp
 from app.models.user import User
 from app import db
 from app.utils.email import is_valid_dlut_email, generate_verification_code, get_verification_code_expiry, send_verification_email, send_password_reset_email
+from app.utils.ratelimit import rate_limiter, check_rate_limits, client_ip
+from app.utils.passwords import PasswordHasherBusy, password_hasher_busy
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 from flask import current_app
@@ -24,6 +26,11 @@ def register():
                     'message': f'缺少必填字段: {field}'
                 }), 400
         
+        # 注册会发送验证码邮件，按IP限流
+        limited = check_rate_limits(('email_ip', client_ip()))
+        if limited:
+            return limited
+        
         # 验证邮箱格式 - 必须是大工邮箱
         email = data['email']
         
@@ -116,6 +123,9 @@ def register():
             'success': False,
             'message': '用户名或邮箱已存在'
         }), 409
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return password_hasher_busy()
     except Exception as e:
         # 更详细的错误日志
         current_app.logger.error(f"注册过程发生严重错误: {str(e)}")
@@ -144,6 +154,11 @@ def verify_email():
         user_id = data['userId']
         code = data['code']
         
+        # 验证码只有6位数字，按IP和用户限制尝试次数，防止穷举
+        limited = check_rate_limits(('verify_ip', client_ip()), ('verify_account', str(user_id)))
+        if limited:
+            return limited
+        
         # 查询用户
         user = User.query.get(user_id)
         if not user:
@@ -231,6 +246,11 @@ def resend_verification():
             
         email = data['email']
         
+        # 发送邮件前按IP和邮箱限流，避免耗尽邮件发送额度
+        limited = check_rate_limits(('email_ip', client_ip()), ('email_account', str(email).lower()))
+        if limited:
+            return limited
+        
         # 查询用户
         user = User.query.filter_by(email=email).first()
         if not user:
@@ -305,16 +325,41 @@ def login():
                 'message': '请提供用户名和密码'
             }), 400
             
+        # 被限流的请求直接返回，不做密码校验（bcrypt 开销很大）
+        # IP 每次尝试都扣除令牌；密码错误次数按“用户名 + IP”计算，攻击者用自己的IP猜错密码
+        # 不会锁住从其他IP登录的正常用户；另有宽松得多的用户名总限额，防止换IP分散猜测
+        ip = client_ip()
+        account = str(data['username']).lower()
+        limited = check_rate_limits(
+            ('login_ip', ip),
+            ('login_account_ip', f'{account}|{ip}', 0),
+            ('login_account', account, 0)
+        )
+        if limited:
+            return limited
+        
         # 查询用户
         user = User.query.filter_by(username=data['username']).first()
         
         # 验证用户和密码
         if not user or not user.verify_password(data['password']):
+            rate_limiter.consume('login_account_ip', f'{account}|{ip}')
+            rate_limiter.consume('login_account', account)
             return jsonify({
                 'success': False,
                 'message': '用户名或密码错误'
             }), 401
         
+        # 密码哈希的 cost 低于当前策略时（调高过 BCRYPT_LOG_ROUNDS），用本次提交的密码重新哈希
+        if user.password_needs_rehash():
+            try:
+                user.password = data['password']
+                db.session.commit()
+            except Exception as e:
+                # 重新哈希失败不影响登录，下次登录再试
+                db.session.rollback()
+                current_app.logger.warning(f"重新哈希用户 {user.id} 的密码失败: {str(e)}")
+        
         # 仅普通社员需要验证邮箱
         if user.role == 'member' and not user.email_verified:
             return jsonify({
@@ -344,6 +389,8 @@ def login():
         
         return response, 200
         
+    except PasswordHasherBusy:
+        return password_hasher_busy()
     except Exception as e:
         return jsonify({
             'success': False,
@@ -505,6 +552,11 @@ def forgot_password():
             
         email = data['email']
         
+        # 发送邮件前按IP和邮箱限流，避免耗尽邮件发送额度
+        limited = check_rate_limits(('email_ip', client_ip()), ('email_account', str(email).lower()))
+        if limited:
+            return limited
+        
         # 查询用户
         user = User.query.filter_by(email=email).first()
         if not user:
@@ -575,6 +627,11 @@ def reset_password():
                 'message': '密码长度不能少于6个字符'
             }), 400
         
+        # 验证码只有6位数字，按IP和用户限制尝试次数，防止穷举
+        limited = check_rate_limits(('verify_ip', client_ip()), ('verify_account', str(user_id)))
+        if limited:
+            return limited
+        
         # 查询用户
         user = User.query.get(user_id)
         if not user:
@@ -624,6 +681,9 @@ def reset_password():
         
         return response, 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return password_hasher_busy()
     except Exception as e:
         db.session.rollback()
         return jsonify({
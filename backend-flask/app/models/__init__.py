@@ -1,3 +1,11 @@
 # 模型包初始化文件 
 from app.models.user import User
-from app.models.course import Course, Booking 
\ No newline at end of file
+from app.models.course import Course, Booking, SeatHold, SeatEvent
+from app.models.sync import SyncSequence
+from app.models.projections import CourseSummary
+from app.models.calendar import CalendarToken
+from app.models.export import ExportJob
+from app.models.user_import import UserImportJob
+from app.models.archive import ArchiveRun, ArchivedCourse, ArchivedBooking
+from app.models.migration import SchemaMigration
+from app.models.idempotency import IdempotencyKey 
\ No newline at end of file
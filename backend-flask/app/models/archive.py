@@ -0,0 +1,154 @@
+from datetime import datetime
+from app import db
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+class ArchiveRun(db.Model):
+    """归档任务的执行记录
+
+    归档会把课程和预订从热表中移走而不留墓碑，每批提交时同时推进同步序列并记录到 sync_horizon：
+    早于该序号的增量同步游标看不到这些删除，需要重新全量同步（见 /api/sync）。
+    """
+    __tablename__ = 'archive_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # 早于该日期的课程被归档
+    cutoff_date = db.Column(db.Date, nullable=False)
+    courses = db.Column(db.Integer, nullable=False, default=0)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    canceled_bookings = db.Column(db.Integer, nullable=False, default=0)
+    tombstones = db.Column(db.Integer, nullable=False, default=0)
+    unverified_users = db.Column(db.Integer, nullable=False, default=0)
+    sync_horizon = db.Column(db.Integer, nullable=True)
+    # 为空表示通过维护命令执行
+    created_by = db.Column(db.Integer, nullable=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def current_sync_horizon():
+        """所有归档中最大的 sync_horizon，没有归档过时为0"""
+        return db.session.query(db.func.max(ArchiveRun.sync_horizon)).scalar() or 0
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'cutoffDate': self.cutoff_date.isoformat(),
+            'courses': self.courses,
+            'bookings': self.bookings,
+            'canceledBookings': self.canceled_bookings,
+            'tombstones': self.tombstones,
+            'unverifiedUsers': self.unverified_users,
+            'createdBy': self.created_by,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class ArchivedCourse(db.Model):
+    """已归档的往期课程（只读）
+
+    归档表使用自己的主键，course_id 记录原课程ID（courses 表使用 AUTOINCREMENT，原ID不会再分配给新课程）。
+    """
+    __tablename__ = 'archived_courses'
+    __table_args__ = (
+        db.Index('ix_archived_courses_semester_date', 'semester', 'course_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('archive_runs.id'), nullable=False, index=True)
+    course_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    instructor = db.Column(db.String(100), nullable=False)
+    location = db.Column(db.String(200), nullable=False)
+    course_date = db.Column(db.Date, nullable=False)
+    time_slot = db.Column(db.String(20), nullable=False)
+    max_capacity = db.Column(db.Integer, default=20)
+    description = db.Column(db.Text, nullable=True)
+    dance_type = db.Column(db.String(50), nullable=True)
+    leader_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    booked_count = db.Column(db.Integer, nullable=False, default=0)
+    # 学期标识，如 2025-fall
+    semester = db.Column(db.String(20), nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """转换为字典，字段与 Course.to_summary_dict 一致，id 为归档记录的ID"""
+        return {
+            'id': self.id,
+            'courseId': self.course_id,
+            'name': self.name,
+            'instructor': self.instructor,
+            'location': self.location,
+            'courseDate': self.course_date.isoformat(),
+            'weekday': WEEKDAY_NAMES[self.course_date.weekday()],
+            'timeSlot': self.time_slot,
+            'maxCapacity': self.max_capacity,
+            'bookedCount': self.booked_count,
+            'currentBookings': self.booked_count,  # 兼容字段
+            'description': self.description or '',
+            'danceType': self.dance_type if self.dance_type else 'public',
+            'leaderId': self.leader_id,
+            'createdAt': self.created_at.isoformat() + 'Z' if self.created_at else None,
+            'semester': self.semester,
+            'archivedAt': self.archived_at.isoformat() + 'Z' if self.archived_at else None
+        }
+
+    def __repr__(self):
+        return f'<ArchivedCourse {self.name} on {self.course_date}>'
+
+class ArchivedBooking(db.Model):
+    """已归档的预订（只读）
+
+    冗余保存课程的名称、日期等字段，查询个人历史时不需要关联课程表。
+    随课程一起归档时 archived_course_id 指向归档课程；课程仍在热表中、
+    只因取消已久被归档的预订该字段为空。
+    """
+    __tablename__ = 'archived_bookings'
+    __table_args__ = (
+        db.Index('ix_archived_bookings_user_date', 'user_id', 'course_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('archive_runs.id'), nullable=False, index=True)
+    booking_id = db.Column(db.Integer, nullable=False)
+    archived_course_id = db.Column(db.Integer, db.ForeignKey('archived_courses.id'), nullable=True, index=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    course_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    course_name = db.Column(db.String(100), nullable=False)
+    course_date = db.Column(db.Date, nullable=False)
+    time_slot = db.Column(db.String(20), nullable=False)
+    location = db.Column(db.String(200), nullable=False)
+    dance_type = db.Column(db.String(50), nullable=True)
+    semester = db.Column(db.String(20), nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'bookingId': self.booking_id,
+            'userId': self.user_id,
+            'courseId': self.course_id,
+            'archivedCourseId': self.archived_course_id,
+            'status': self.status,
+            'createdAt': self.created_at.isoformat() + 'Z' if self.created_at else None,
+            'updatedAt': self.updated_at.isoformat() + 'Z' if self.updated_at else None,
+            'course': {
+                'name': self.course_name,
+                'courseDate': self.course_date.isoformat(),
+                'weekday': WEEKDAY_NAMES[self.course_date.weekday()],
+                'timeSlot': self.time_slot,
+                'location': self.location,
+                'danceType': self.dance_type if self.dance_type else 'public'
+            },
+            'semester': self.semester
+        }
+
+    def __repr__(self):
+        return f'<ArchivedBooking {self.booking_id}>'
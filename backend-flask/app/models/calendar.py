@@ -0,0 +1,34 @@
+import secrets
+from datetime import datetime
+from app import db
+
+class CalendarToken(db.Model):
+    """个人日历订阅令牌
+
+    订阅地址 /api/calendar/<token>.ics 不经过JWT认证（日历应用无法携带令牌），
+    令牌本身即凭证：每个用户一个，重新生成后旧地址立即失效。
+    """
+    __tablename__ = 'calendar_tokens'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    token = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # 删除用户时一并删除其订阅令牌
+    user = db.relationship('User', backref=db.backref('calendar_token', uselist=False, cascade='all, delete-orphan'))
+
+    @staticmethod
+    def generate_token():
+        return secrets.token_urlsafe(32)
+
+    @classmethod
+    def for_user(cls, user, regenerate=False):
+        """获取用户的订阅令牌，不存在或要求重新生成时生成新令牌（未提交）"""
+        calendar_token = cls.query.get(user.id)
+        if calendar_token is None:
+            calendar_token = cls(user_id=user.id, token=cls.generate_token())
+            db.session.add(calendar_token)
+        elif regenerate:
+            calendar_token.token = cls.generate_token()
+            calendar_token.created_at = datetime.utcnow()
+        return calendar_token
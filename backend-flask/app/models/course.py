@@ -4,12 +4,15 @@ from datetime import datetime, timedelta, date
 class Course(db.Model):
     """课程模型"""
     __tablename__ = 'courses'
+    # AUTOINCREMENT：归档、清理墓碑会物理删除课程，SQLite 默认会把最大的已删除ID分配给新课程，
+    # 与归档记录、日历事件UID、座位事件中的旧ID冲突
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     instructor = db.Column(db.String(100), nullable=False)
     location = db.Column(db.String(200), nullable=False)
-    course_date = db.Column(db.Date, nullable=False)  # 课程日期
+    course_date = db.Column(db.Date, nullable=False, index=True)  # 课程日期
     time_slot = db.Column(db.String(20), nullable=False)  # 时间段
     max_capacity = db.Column(db.Integer, default=20)
     description = db.Column(db.Text, nullable=True)
@@ -18,6 +21,11 @@ class Course(db.Model):
     # 添加领队ID，用于关联归属的领队
     leader_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    # 软删除时间：删除课程只做标记并保留为增量同步的墓碑，普通查询会自动排除（见 app/models/sync.py）
+    deleted_at = db.Column(db.DateTime, nullable=True)
+    # 增量同步序号：每次写入时从全局序列分配，单调递增
+    change_seq = db.Column(db.Integer, nullable=True, index=True)
     
     # 关系
     bookings = db.relationship('Booking', backref='course', lazy=True, cascade='all, delete-orphan')
@@ -51,6 +59,117 @@ class Course(db.Model):
         
         return data
     
+    def to_summary_dict(self, booked_count, held_count=0):
+        """转换为不含预约名单的摘要字典
+        
+        字段与 to_dict 一致，但不返回 bookedBy 名单，预约人数由调用方聚合查询得到，
+        无需逐条加载 bookings 关系；remaining 同时扣除未过期的座位保留。
+        """
+        return {
+            'id': self.id,
+            'name': self.name,
+            'instructor': self.instructor,
+            'location': self.location,
+            'courseDate': self.course_date.isoformat() if self.course_date else None,
+            'weekday': self.get_weekday_name() if self.course_date else None,
+            'timeSlot': self.time_slot,
+            'maxCapacity': self.max_capacity,
+            'bookedCount': booked_count,
+            'currentBookings': booked_count,  # 兼容字段
+            'remaining': max(self.max_capacity - booked_count - held_count, 0),
+            'description': self.description or '',
+            'danceType': self.dance_type if self.dance_type else 'public',
+            'leaderId': self.leader_id,
+            'createdAt': self.created_at.isoformat() + 'Z'
+        }
+    
+    @staticmethod
+    def seat_count_columns(now=None):
+        """返回 (已确认预订数, 有效座位保留数) 两个关联子查询，可作为查询课程时的附加列"""
+        now = now or datetime.utcnow()
+        booked = db.session.query(db.func.count(Booking.id)).filter(
+            Booking.course_id == Course.id,
+            Booking.status == 'confirmed'
+        ).correlate(Course).scalar_subquery()
+        held = db.session.query(db.func.count(SeatHold.id)).filter(
+            SeatHold.course_id == Course.id,
+            SeatHold.expires_at > now
+        ).correlate(Course).scalar_subquery()
+        return booked, held
+    
+    @staticmethod
+    def get_courses_with_seat_counts(start_date, end_date, now=None):
+        """一条查询取出日期范围内的课程及其座位占用情况
+        
+        Args:
+            start_date: 起始日期（含）
+            end_date: 结束日期（含）
+            now: 当前时间，用于判断座位保留是否过期
+            
+        Returns:
+            [(course, 已确认预订数, 有效座位保留数), ...]，按日期和时间段排序
+        """
+        booked, held = Course.seat_count_columns(now)
+        return db.session.query(Course, booked, held).filter(
+            Course.course_date >= start_date,
+            Course.course_date <= end_date
+        ).order_by(Course.course_date, Course.time_slot).all()
+    
+    @staticmethod
+    def count_taken_seats(course_id, exclude_user_id=None, now=None):
+        """统计课程已占用的座位数（已确认的预订 + 未过期的座位保留），见 count_taken_seats_bulk
+        
+        Args:
+            course_id: 课程ID
+            exclude_user_id: 不计入该用户自己的座位保留（用户凭自己的保留完成预订时使用）
+            now: 当前时间，默认为 datetime.utcnow()
+            
+        Returns:
+            已占用的座位数
+        """
+        return Course.count_taken_seats_bulk([course_id], exclude_user_id=exclude_user_id, now=now)[course_id]
+    
+    @staticmethod
+    def count_taken_seats_bulk(course_ids, exclude_user_id=None, now=None):
+        """批量统计多门课程已占用的座位数，用于预订和保留座位前的容量检查
+        
+        已确认预订数按主键读取课程摘要读模型的 booked_count（见 projections.py），不再统计预订表；
+        有效保留数按 (course_id, expires_at) 索引只扫描未过期的保留（每条有效保留占一个座位，至多容量条），
+        过期的保留不必先删除。检查只读，不占用写锁。
+        读模型中还没有摘要行的课程（如尚未提交的新课程）按预订表统计。
+        
+        Returns:
+            {course_id: 已占用座位数} 字典，没有占用的课程值为0
+        """
+        from app.models.projections import CourseSummary
+        now = now or datetime.utcnow()
+        taken = {course_id: 0 for course_id in course_ids}
+        if not taken:
+            return taken
+        
+        booked = dict(db.session.query(CourseSummary.course_id, CourseSummary.booked_count).filter(
+            CourseSummary.course_id.in_(taken.keys())
+        ).all())
+        missing = [course_id for course_id in taken if course_id not in booked]
+        if missing:
+            booked.update(db.session.query(Booking.course_id, db.func.count(Booking.id)).filter(
+                Booking.course_id.in_(missing),
+                Booking.status == 'confirmed'
+            ).group_by(Booking.course_id).all())
+        
+        held = db.session.query(SeatHold.course_id, db.func.count(SeatHold.id)).filter(
+            SeatHold.course_id.in_(taken.keys()),
+            SeatHold.expires_at > now
+        )
+        if exclude_user_id is not None:
+            held = held.filter(SeatHold.user_id != exclude_user_id)
+        
+        for course_id in taken:
+            taken[course_id] = booked.get(course_id, 0)
+        for course_id, count in held.group_by(SeatHold.course_id):
+            taken[course_id] += count
+        return taken
+    
     def get_weekday_name(self):
         """获取课程日期对应的星期几名称"""
         if not self.course_date:
@@ -59,6 +178,42 @@ class Course(db.Model):
         weekday_names = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
         return weekday_names[self.course_date.weekday()]
     
+    @staticmethod
+    def validate_time_slot(time_slot):
+        """检查时间段的格式和时长
+        
+        Args:
+            time_slot: 时间段，字符串，格式如 "18:00-19:30"
+            
+        Returns:
+            (开始时间, 结束时间, 错误信息)，时间段有效时错误信息为 None
+        """
+        try:
+            start_time_str, end_time_str = time_slot.split('-')
+            # 为了简化比较，我们只关心小时和分钟
+            start_time = datetime.strptime(start_time_str, '%H:%M').time()
+            end_time = datetime.strptime(end_time_str, '%H:%M').time()
+        except (ValueError, AttributeError):
+            return None, None, '时间格式无效，请使用HH:MM-HH:MM格式'
+        
+        # 检查时间段是否合理
+        # 1. 结束时间必须晚于开始时间（不允许跨夜）
+        if end_time <= start_time:
+            return start_time, end_time, '时间段不合理：结束时间必须晚于开始时间'
+        
+        # 2. 课程时长不应过长（超过4小时）或过短（少于30分钟）
+        start_datetime = datetime.combine(date.today(), start_time)
+        end_datetime = datetime.combine(date.today(), end_time)
+        duration = (end_datetime - start_datetime).total_seconds() / 60  # 转换为分钟
+        
+        if duration > 240:  # 4小时 = 240分钟
+            return start_time, end_time, f'课程时长过长（{int(duration)}分钟）：课程不应超过4小时'
+        
+        if duration < 30:
+            return start_time, end_time, f'课程时长过短（{int(duration)}分钟）：课程不应少于30分钟'
+        
+        return start_time, end_time, None
+    
     @classmethod
     def check_time_conflict(cls, course_date, time_slot, location, exclude_course_id=None):
         """检查课程时间和地点是否有冲突
@@ -73,32 +228,10 @@ class Course(db.Model):
             冲突的课程列表，如果没有冲突则返回空列表
             如果时间格式无效或不合理，返回包含错误信息的字典列表
         """
-        # 解析时间段
-        try:
-            start_time_str, end_time_str = time_slot.split('-')
-            # 为了简化比较，我们只关心小时和分钟
-            start_time = datetime.strptime(start_time_str, '%H:%M').time()
-            end_time = datetime.strptime(end_time_str, '%H:%M').time()
-            
-            # 检查时间段是否合理
-            # 1. 结束时间必须晚于开始时间（不允许跨夜）
-            if end_time <= start_time:
-                return [{'error': '时间段不合理：结束时间必须晚于开始时间'}]
-            
-            # 2. 课程时长不应过长（超过4小时）或过短（少于30分钟）
-            start_datetime = datetime.combine(date.today(), start_time)
-            end_datetime = datetime.combine(date.today(), end_time)
-            duration = (end_datetime - start_datetime).total_seconds() / 60  # 转换为分钟
-            
-            if duration > 240:  # 4小时 = 240分钟
-                return [{'error': f'课程时长过长（{int(duration)}分钟）：课程不应超过4小时'}]
-            
-            if duration < 30:
-                return [{'error': f'课程时长过短（{int(duration)}分钟）：课程不应少于30分钟'}]
-            
-        except (ValueError, AttributeError):
-            # 如果时间格式无法解析，为安全起见，认为有冲突
-            return [{'error': '时间格式无效，请使用HH:MM-HH:MM格式'}]
+        # 解析时间段（时间格式无法解析时，为安全起见，认为有冲突）
+        start_time, end_time, error = cls.validate_time_slot(time_slot)
+        if error:
+            return [{'error': error}]
         
         # 查询同一日期、同一地点的所有课程
         query = cls.query.filter(
@@ -132,6 +265,13 @@ class Course(db.Model):
         
         return conflicts
     
+    @staticmethod
+    def get_week_range(target_date):
+        """获取指定日期所在周的起始日期（星期一）和结束日期（星期日）"""
+        week_start = target_date - timedelta(days=target_date.weekday())  # 周一
+        week_end = week_start + timedelta(days=6)  # 周日
+        return week_start, week_end
+    
     @staticmethod
     def get_week_courses(target_date):
         """获取指定日期所在周的所有课程
@@ -143,9 +283,7 @@ class Course(db.Model):
             该周的所有课程，按日期排序
         """
         # 计算该周的起始日期（星期一）和结束日期（星期日）
-        weekday = target_date.weekday()
-        week_start = target_date - timedelta(days=weekday)  # 周一
-        week_end = week_start + timedelta(days=6)  # 周日
+        week_start, week_end = Course.get_week_range(target_date)
         
         # 查询该日期范围内的所有课程
         return Course.query.filter(
@@ -160,6 +298,14 @@ class Course(db.Model):
 class Booking(db.Model):
     """预订模型"""
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # 按用户查预订状态、按课程统计容量都依赖这两个复合索引
+        db.Index('ix_bookings_user_course', 'user_id', 'course_id'),
+        db.Index('ix_bookings_course_status', 'course_id', 'status'),
+        db.Index('ix_bookings_user_change_seq', 'user_id', 'change_seq'),
+        # 预订同样会被归档删除，ID不复用（见 Course）
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -167,6 +313,8 @@ class Booking(db.Model):
     status = db.Column(db.String(20), default='confirmed')  # 状态: pending, confirmed, canceled
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    # 增量同步序号，与课程共用同一个全局序列
+    change_seq = db.Column(db.Integer, nullable=True)
     
     def to_dict(self):
         """转换为字典"""
@@ -180,4 +328,80 @@ class Booking(db.Model):
         }
     
     def __repr__(self):
-        return f'<Booking {self.id}>' 
\ No newline at end of file
+        return f'<Booking {self.id}>' 
+
+
+class SeatHold(db.Model):
+    """座位保留模型：限时为用户占住一个座位，之后确认为预订或释放
+    
+    过期的保留不依赖定时器清理：容量检查按 (course_id, expires_at) 索引只统计未过期的保留，
+    创建新保留时再按 expires_at 索引批量删除（惰性清理）。
+    """
+    __tablename__ = 'seat_holds'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'course_id', name='uq_seat_holds_user_course'),
+        db.Index('ix_seat_holds_course_expires', 'course_id', 'expires_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def is_expired(self, now=None):
+        """判断保留是否已过期"""
+        return self.expires_at <= (now or datetime.utcnow())
+    
+    @classmethod
+    def purge_expired(cls, now=None):
+        """删除所有已过期的保留，返回删除条数"""
+        now = now or datetime.utcnow()
+        return cls.query.filter(cls.expires_at <= now).delete(synchronize_session=False)
+    
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'userId': self.user_id,
+            'courseId': self.course_id,
+            'expiresAt': self.expires_at.isoformat() + 'Z',
+            'createdAt': self.created_at.isoformat() + 'Z' if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<SeatHold {self.id}>'
+
+
+class SeatEvent(db.Model):
+    """座位变化事件：每次课程或预订写入后记录一次课程的最新座位数
+    
+    各worker的事件转发线程按自增ID轮询此表，把其他进程产生的变化
+    转发给本进程的订阅者，实现跨进程通知；事件只保留较短时间。
+    """
+    __tablename__ = 'seat_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, nullable=False)
+    # 课程已删除时为空
+    course_date = db.Column(db.Date, nullable=True)
+    max_capacity = db.Column(db.Integer, default=0)
+    booked_count = db.Column(db.Integer, default=0)
+    held_count = db.Column(db.Integer, default=0)
+    deleted = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'courseId': self.course_id,
+            'courseDate': self.course_date.isoformat() if self.course_date else None,
+            'maxCapacity': self.max_capacity,
+            'bookedCount': self.booked_count,
+            'remaining': max(self.max_capacity - self.booked_count - self.held_count, 0),
+            'deleted': self.deleted
+        }
+    
+    def __repr__(self):
+        return f'<SeatEvent {self.id}>'
\ No newline at end of file
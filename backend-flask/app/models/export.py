@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+from app import db
+
+class ExportJob(db.Model):
+    """报表导出任务
+
+    任务由后台线程执行，把查询结果逐批写入磁盘上的 CSV/XLSX 文件，
+    处理进度（processed_rows / total_rows）定期提交到数据库，任何worker都能查询。
+    """
+    __tablename__ = 'export_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # 报表类型: bookings(预约明细), attendance(课程出勤汇总)
+    kind = db.Column(db.String(20), nullable=False)
+    # 文件格式: csv, xlsx
+    file_format = db.Column(db.String(10), nullable=False)
+    # 导出条件（JSON）：{semester, danceType}
+    params = db.Column(db.Text, nullable=False, default='{}')
+    # 状态: pending, running, completed, failed
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    total_rows = db.Column(db.Integer, nullable=True)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0)
+    file_path = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def get_params(self):
+        return json.loads(self.params or '{}')
+
+    def download_name(self):
+        """下载时使用的文件名，如 bookings-2026-fall-breaking.csv"""
+        params = self.get_params()
+        return f"{self.kind}-{params.get('semester')}-{params.get('danceType') or 'all'}.{self.file_format}"
+
+    def to_dict(self):
+        """转换为字典"""
+        progress = None
+        if self.total_rows:
+            progress = round(min(self.processed_rows / self.total_rows, 1), 4)
+        elif self.status == 'completed':
+            progress = 1
+
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'format': self.file_format,
+            'params': self.get_params(),
+            'status': self.status,
+            'totalRows': self.total_rows,
+            'processedRows': self.processed_rows,
+            'progress': progress,
+            'error': self.error,
+            'fileName': self.download_name() if self.status == 'completed' else None,
+            'createdBy': self.created_by,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
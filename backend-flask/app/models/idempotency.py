@@ -0,0 +1,29 @@
+from datetime import datetime
+from app import db
+
+class IdempotencyKey(db.Model):
+    """带 Idempotency-Key 请求头的写请求及其响应
+
+    同一用户的同一幂等键只执行一次，重放时直接返回保存的响应。response_status 为空表示首个请求仍在处理中（或已提交写入但响应未能保存，见 applied_at）。
+    """
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # 请求方法、路径和请求体的 sha256，同一幂等键用于不同请求时拒绝
+    fingerprint = db.Column(db.String(64), nullable=False)
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    response_mimetype = db.Column(db.String(100), nullable=True)
+    # 接口第一次提交写入时在同一事务中设置：设置后即使响应没能保存也不再重新执行
+    applied_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 过期后由后续请求顺带清理
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.user_id}:{self.key}>'
@@ -0,0 +1,24 @@
+from datetime import datetime
+from app import db
+
+class SchemaMigration(db.Model):
+    """已执行的数据库迁移（见 migrations/versions 和 python manage.py migrate）"""
+    __tablename__ = 'schema_migrations'
+
+    # 迁移脚本文件名中的四位版本号
+    version = db.Column(db.String(20), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    elapsed_ms = db.Column(db.Integer, nullable=True)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'version': self.version,
+            'name': self.name,
+            'appliedAt': self.applied_at.isoformat() + 'Z' if self.applied_at else None,
+            'elapsedMs': self.elapsed_ms
+        }
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.version}_{self.name}>'
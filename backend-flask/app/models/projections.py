@@ -0,0 +1,169 @@
+import json
+from datetime import datetime
+from app import db
+from app.models.course import Course, Booking
+from app.models.user import User
+from sqlalchemy import event
+
+class CourseSummary(db.Model):
+    """课程摘要读模型（CQRS投影）
+
+    每门未删除的课程一行，冗余保存课程字段、已确认预订数和预约名单，
+    课表、领队面板等读接口只需按索引查询这一张表，不再做关联和计数。
+    由会话钩子在写事务提交前同步刷新，可用 `python manage.py rebuild-projections` 整表重建。
+    """
+    __tablename__ = 'course_summaries'
+
+    course_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    instructor = db.Column(db.String(100), nullable=False)
+    location = db.Column(db.String(200), nullable=False)
+    course_date = db.Column(db.Date, nullable=False, index=True)
+    time_slot = db.Column(db.String(20), nullable=False)
+    max_capacity = db.Column(db.Integer, default=20)
+    description = db.Column(db.Text, nullable=True)
+    dance_type = db.Column(db.String(50), nullable=True, index=True)
+    leader_id = db.Column(db.Integer, nullable=True, index=True)
+    created_at = db.Column(db.DateTime)
+    booked_count = db.Column(db.Integer, default=0)
+    # 预约名单（JSON）：[{id, name, username, bookingTime}, ...]，按预约时间排序
+    roster = db.Column(db.Text, nullable=False, default='[]')
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self, detailed_roster=False):
+        """转换为与 Course.to_dict 相同结构的字典
+
+        Args:
+            detailed_roster: 为 True 时 bookedBy 返回用户详情，否则只返回用户ID列表
+        """
+        roster = json.loads(self.roster)
+        return {
+            'id': self.course_id,
+            'name': self.name,
+            'instructor': self.instructor,
+            'location': self.location,
+            'courseDate': self.course_date.isoformat(),
+            'weekday': ['周一', '周二', '周三', '周四', '周五', '周六', '周日'][self.course_date.weekday()],
+            'timeSlot': self.time_slot,
+            'maxCapacity': self.max_capacity,
+            'bookedBy': roster if detailed_roster else [user['id'] for user in roster],
+            'bookedCount': self.booked_count,
+            'currentBookings': self.booked_count,  # 兼容字段
+            'description': self.description or '',
+            'danceType': self.dance_type if self.dance_type else 'public',
+            'leaderId': self.leader_id,
+            'createdAt': self.created_at.isoformat() + 'Z'
+        }
+
+    def __repr__(self):
+        return f'<CourseSummary {self.course_id}>'
+
+def refresh_course_summaries(course_ids):
+    """按源表重新计算指定课程的摘要行（在调用方的事务中执行，不提交）
+
+    已删除或不存在的课程会删除对应的摘要行。
+    """
+    course_ids = list(course_ids)
+    if not course_ids:
+        return
+
+    courses = Course.query.filter(Course.id.in_(course_ids)).all()
+    rosters = {course.id: [] for course in courses}
+    booked_users = db.session.query(
+        Booking.course_id, User.id, User.name, User.username, Booking.created_at
+    ).join(User, User.id == Booking.user_id).filter(
+        Booking.course_id.in_(rosters.keys()),
+        Booking.status == 'confirmed'
+    ).order_by(Booking.created_at)
+    for course_id, user_id, name, username, booking_time in booked_users:
+        rosters[course_id].append({
+            'id': user_id,
+            'name': name,
+            'username': username,
+            'bookingTime': booking_time.isoformat() + 'Z'
+        })
+
+    now = datetime.utcnow()
+    table = CourseSummary.__table__
+    connection = db.session.connection()
+    connection.execute(table.delete().where(table.c.course_id.in_(course_ids)))
+    if courses:
+        connection.execute(table.insert(), [
+            {
+                'course_id': course.id,
+                'name': course.name,
+                'instructor': course.instructor,
+                'location': course.location,
+                'course_date': course.course_date,
+                'time_slot': course.time_slot,
+                'max_capacity': course.max_capacity,
+                'description': course.description,
+                'dance_type': course.dance_type,
+                'leader_id': course.leader_id,
+                'created_at': course.created_at,
+                'booked_count': len(rosters[course.id]),
+                'roster': json.dumps(rosters[course.id], ensure_ascii=False),
+                'refreshed_at': now
+            }
+            for course in courses
+        ])
+
+def rebuild_course_summaries(batch_size=500):
+    """整表重建课程摘要（不提交），返回重建的课程数"""
+    db.session.connection().execute(CourseSummary.__table__.delete())
+    course_ids = [course_id for course_id, in db.session.query(Course.id).order_by(Course.id)]
+    for i in range(0, len(course_ids), batch_size):
+        refresh_course_summaries(course_ids[i:i + batch_size])
+    return len(course_ids)
+
+def mark_courses_changed(course_ids):
+    """标记需要在本事务提交前刷新摘要的课程
+
+    ORM对象的增删改由会话钩子自动跟踪，只有批量 query.delete()/update() 需要显式调用。
+    """
+    db.session.info.setdefault('projection_course_ids', set()).update(course_ids)
+
+@event.listens_for(db.session, 'after_flush')
+def _track_projection_changes(session, flush_context):
+    """记录本次刷新涉及的课程和改名的用户"""
+    course_ids = session.info.setdefault('projection_course_ids', set())
+    user_ids = session.info.setdefault('projection_user_ids', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Course):
+            course_ids.add(obj.id)
+        elif isinstance(obj, Booking):
+            course_ids.add(obj.course_id)
+        elif isinstance(obj, User) and obj not in session.new:
+            state = db.inspect(obj)
+            if state.attrs.name.history.has_changes() or state.attrs.username.history.has_changes():
+                user_ids.add(obj.id)
+
+@event.listens_for(db.session, 'before_commit')
+def _refresh_projections(session):
+    """提交前在同一事务中刷新受影响课程的摘要行"""
+    session.flush()
+    while session.info.get('projection_course_ids') or session.info.get('projection_user_ids'):
+        course_ids = session.info.pop('projection_course_ids', set())
+        user_ids = session.info.pop('projection_user_ids', set())
+        if user_ids:
+            course_ids.update(
+                course_id for course_id, in session.query(Booking.course_id).filter(
+                    Booking.user_id.in_(user_ids),
+                    Booking.status == 'confirmed'
+                )
+            )
+        refresh_course_summaries(course_ids)
+        session.flush()
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_projection_changes(session):
+    session.info.pop('projection_course_ids', None)
+    session.info.pop('projection_user_ids', None)
+
+def ensure_course_summaries():
+    """读模型为空而课程表有数据时（新建读模型表后首次启动）整表重建并提交"""
+    if CourseSummary.query.first() is None and db.session.query(Course.id).first() is not None:
+        count = rebuild_course_summaries()
+        db.session.commit()
+        return count
+    return 0
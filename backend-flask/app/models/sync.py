@@ -0,0 +1,101 @@
+from app import db
+from app.models.course import Course, Booking, SeatHold
+from sqlalchemy import event, bindparam
+from sqlalchemy.orm import with_loader_criteria
+from sqlalchemy.orm.attributes import set_committed_value
+
+class SyncSequence(db.Model):
+    """增量同步的全局序列（单行表）
+
+    每次刷新会话时用 UPDATE 一次性预留所需的序号。SQLite 在 UPDATE 时即持有写锁直到提交，
+    因此序号的大小顺序与事务的提交顺序一致，客户端游标之前不会再出现更小的序号。
+    """
+    __tablename__ = 'sync_sequence'
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def current_value():
+        """读取当前已分配的最大序号"""
+        return db.session.query(SyncSequence.value).filter(SyncSequence.id == 1).scalar() or 0
+
+    @staticmethod
+    def advance():
+        """在当前事务中推进序列，返回一个不对应任何记录的新序号（此前发出的游标都小于它）"""
+        return _reserve_change_seqs(db.session, 1)
+
+def _reserve_change_seqs(session, count):
+    """在当前事务中预留 count 个连续序号，返回其中第一个"""
+    table = SyncSequence.__table__
+    connection = session.connection()
+    updated = connection.execute(
+        table.update().where(table.c.id == 1).values(value=table.c.value + count)
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(id=1, value=count))
+    last = connection.execute(
+        db.select(table.c.value).where(table.c.id == 1)
+    ).scalar()
+    return last - count + 1
+
+def touch_courses(course_ids, session=None):
+    """为课程分配新的同步序号，使增量同步重新下发其已预订数和剩余座位（不修改 updated_at）
+
+    预订和座位保留的增删改由会话钩子自动调用；批量 query.delete() 删除预订或保留时需显式调用。
+    """
+    session = session or db.session
+    course_ids = sorted(set(course_id for course_id in course_ids if course_id is not None))
+    if not course_ids:
+        return
+
+    seq = _reserve_change_seqs(session, len(course_ids))
+    table = Course.__table__
+    session.connection().execute(
+        table.update().where(table.c.id == bindparam('course_id')).values(change_seq=bindparam('seq')),
+        [{'course_id': course_id, 'seq': seq + i} for i, course_id in enumerate(course_ids)]
+    )
+    # 已加载到会话中的课程同步更新属性，但不标记为已修改
+    for i, course_id in enumerate(course_ids):
+        course = session.identity_map.get(session.identity_key(Course, course_id))
+        if course is not None:
+            set_committed_value(course, 'change_seq', seq + i)
+
+@event.listens_for(db.session, 'before_flush')
+def _assign_change_seqs(session, flush_context, instances):
+    """为本次刷新中新增或修改的课程、预订分配同步序号
+
+    预订或座位保留变化时，所属课程的已预订数和剩余座位随之变化，课程本身也分配新的序号。
+    """
+    changed = [
+        obj for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, (Course, Booking)) and (obj in session.new or session.is_modified(obj))
+    ]
+    touched = {
+        obj.course_id for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, (Booking, SeatHold))
+        and (obj in session.new or obj in session.deleted or session.is_modified(obj))
+    } - {obj.id for obj in changed if isinstance(obj, Course)}
+
+    if changed:
+        seq = _reserve_change_seqs(session, len(changed))
+        for obj in changed:
+            obj.change_seq = seq
+            seq += 1
+    touch_courses(touched, session)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _exclude_deleted_courses(execute_state):
+    """所有ORM查询默认排除已软删除的课程
+
+    过滤同样作用于与 Course 的关联查询和关系加载。需要读取墓碑的查询须通过
+    execution_options(include_deleted=True) 关闭，目前有：增量同步（api/sync.py）、
+    日历的最后修改时间（api/calendar.py）、教室可用性位图的增量更新（utils/rooms.py）
+    以及归档中的取消预订和墓碑清理（utils/archive.py）。
+    冲突检查、导出和统计有意排除已删除课程（删除即释放教室，预订已改为取消），无需关闭；
+    批量 DELETE/UPDATE 不是查询，不受影响。
+    """
+    if execute_state.is_select and not execute_state.execution_options.get('include_deleted', False):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Course, Course.deleted_at.is_(None), include_aliases=True)
+        )
@@ -1,4 +1,5 @@
-from app import db, bcrypt
+from app import db
+from app.utils.passwords import password_hasher
 from datetime import datetime
 
 class User(db.Model):
@@ -31,12 +32,16 @@ class User(db.Model):
         
     @password.setter
     def password(self, password):
-        """设置密码哈希"""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        """设置密码哈希（在有界线程池中按当前策略的 cost 计算）"""
+        self.password_hash = password_hasher.hash(password)
         
     def verify_password(self, password):
         """验证密码"""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """存储的密码哈希 cost 低于当前策略时返回 True"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def is_admin(self):
         """判断用户是否为管理员"""
@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+from app import db
+
+class UserImportJob(db.Model):
+    """用户批量导入任务
+
+    导入在后台线程中执行（逐批哈希密码并插入），进度和最终的逐行报告保存到数据库，任何worker都能查询。
+    上传的文件（含明文密码）只保存在执行任务的进程内存中，不写入数据库。
+    """
+    __tablename__ = 'user_import_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # 状态: pending, running, completed, failed
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    # 文件中的用户行数
+    total_rows = db.Column(db.Integer, nullable=False, default=0)
+    # 通过校验、需要创建的行数和已处理（哈希并插入）的行数
+    valid_rows = db.Column(db.Integer, nullable=True)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0)
+    # 完成后的导入报告（JSON），格式同 import_users 的返回值
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
+
+    def to_dict(self):
+        """转换为字典"""
+        progress = None
+        if self.valid_rows:
+            progress = round(min(self.processed_rows / self.valid_rows, 1), 4)
+        elif self.status == 'completed':
+            progress = 1
+
+        return {
+            'id': self.id,
+            'status': self.status,
+            'totalRows': self.total_rows,
+            'validRows': self.valid_rows,
+            'processedRows': self.processed_rows,
+            'progress': progress,
+            'error': self.error,
+            'result': self.get_result(),
+            'createdBy': self.created_by,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
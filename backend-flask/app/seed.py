@@ -1,6 +1,12 @@
-from app import db, bcrypt
+from app import db
 from app.models.user import User
-from app.models.course import Course, Booking
+from app.models.course import Course, Booking, SeatHold, SeatEvent
+from app.models.projections import CourseSummary
+from app.models.calendar import CalendarToken
+from app.models.export import ExportJob
+from app.models.archive import ArchiveRun, ArchivedCourse, ArchivedBooking
+from app.models.idempotency import IdempotencyKey
+from app.models.user_import import UserImportJob
 import traceback
 import time
 import os
@@ -20,6 +26,16 @@ def seed_data():
         # 清除已有数据
         try:
             print("清除已有数据...")
+            CourseSummary.query.delete()
+            CalendarToken.query.delete()
+            ExportJob.query.delete()
+            UserImportJob.query.delete()
+            IdempotencyKey.query.delete()
+            SeatEvent.query.delete()
+            SeatHold.query.delete()
+            ArchivedBooking.query.delete()
+            ArchivedCourse.query.delete()
+            ArchiveRun.query.delete()
             Booking.query.delete()
             Course.query.delete()
             User.query.delete()
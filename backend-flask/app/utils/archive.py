@@ -0,0 +1,202 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from app import db
+from app.models.course import Course, Booking, SeatHold
+from app.models.user import User
+from app.models.sync import SyncSequence
+from app.models.projections import mark_courses_changed
+from app.models.archive import ArchiveRun, ArchivedCourse, ArchivedBooking
+from app.utils.semester import semester_key, semester_range, previous_semester
+
+# 随课程一起复制到归档表的字段
+_COURSE_FIELDS = [
+    'name', 'instructor', 'location', 'course_date', 'time_slot', 'max_capacity',
+    'description', 'dance_type', 'leader_id', 'created_at', 'updated_at'
+]
+_BOOKING_COLUMNS = [
+    Booking.id, Booking.user_id, Booking.course_id, Booking.status, Booking.created_at, Booking.updated_at
+]
+
+def archive_cutoff(today, keep_semesters):
+    """归档分界日期：热表保留当前学期和之前 keep_semesters 个学期，早于其开始日期的课程归档"""
+    key = semester_key(today)
+    for _ in range(keep_semesters):
+        key = previous_semester(key)
+    return semester_range(key)[0]
+
+def _past_courses(cutoff):
+    """需要归档的往期课程（已删除的课程留作墓碑，由墓碑清理处理）"""
+    return db.session.query(Course.id).filter(Course.course_date < cutoff)
+
+def _stale_canceled_bookings(cutoff, canceled_before):
+    """取消已久、所属课程不随往期课程一起归档的预订（课程可能已删除）"""
+    return db.session.query(
+        *_BOOKING_COLUMNS,
+        Course.name, Course.course_date, Course.time_slot, Course.location, Course.dance_type
+    ).join(Course, Course.id == Booking.course_id).filter(
+        Booking.status == 'canceled',
+        db.func.coalesce(Booking.updated_at, Booking.created_at) < canceled_before,
+        db.or_(Course.course_date >= cutoff, Course.deleted_at.isnot(None))
+    ).execution_options(include_deleted=True)
+
+def _expired_tombstones(deleted_before):
+    return db.session.query(Course.id).filter(
+        Course.deleted_at < deleted_before
+    ).execution_options(include_deleted=True)
+
+def _expired_unverified_users(created_before):
+    """验证码早已过期仍未验证邮箱的普通社员（没有验证码过期时间的按注册时间计算）"""
+    return User.query.filter(
+        User.role == 'member',
+        db.or_(User.email_verified.is_(False), User.email_verified.is_(None)),
+        db.func.coalesce(User.email_verify_code_expires, User.created_at) < created_before
+    )
+
+def _archived_booking_row(run_id, booking, course, archived_course_id, now):
+    """course 需有 name, course_date, time_slot, location, dance_type 属性"""
+    return {
+        'run_id': run_id,
+        'booking_id': booking.id,
+        'archived_course_id': archived_course_id,
+        'user_id': booking.user_id,
+        'course_id': booking.course_id,
+        'status': booking.status,
+        'created_at': booking.created_at,
+        'updated_at': booking.updated_at,
+        'course_name': course.name,
+        'course_date': course.course_date,
+        'time_slot': course.time_slot,
+        'location': course.location,
+        'dance_type': course.dance_type,
+        'semester': semester_key(course.course_date),
+        'archived_at': now
+    }
+
+def _delete_courses(course_ids):
+    """从热表删除课程及其预订和座位保留（批量删除不经过会话钩子，需显式标记课程摘要待刷新）"""
+    db.session.execute(SeatHold.__table__.delete().where(SeatHold.course_id.in_(course_ids)))
+    db.session.execute(Booking.__table__.delete().where(Booking.course_id.in_(course_ids)))
+    db.session.execute(Course.__table__.delete().where(Course.id.in_(course_ids)))
+    mark_courses_changed(course_ids)
+
+def _commit_batch(run, advance_sync=True):
+    """提交一批归档；删除了课程或预订时推进同步序列，使之前的增量同步游标失效"""
+    if advance_sync:
+        run.sync_horizon = SyncSequence.advance()
+    db.session.commit()
+
+def _archive_past_courses(run, cutoff, batch_size, now):
+    while True:
+        rows = _past_courses(cutoff).with_entities(
+            Course.id, *[getattr(Course, field) for field in _COURSE_FIELDS]
+        ).order_by(Course.id).limit(batch_size).all()
+        if not rows:
+            return
+        course_ids = [row.id for row in rows]
+        bookings = db.session.query(*_BOOKING_COLUMNS).filter(Booking.course_id.in_(course_ids)).all()
+        booked_counts = Counter(booking.course_id for booking in bookings if booking.status == 'confirmed')
+
+        archived = {
+            row.id: ArchivedCourse(
+                run_id=run.id,
+                course_id=row.id,
+                booked_count=booked_counts[row.id],
+                semester=semester_key(row.course_date),
+                archived_at=now,
+                **{field: getattr(row, field) for field in _COURSE_FIELDS}
+            )
+            for row in rows
+        }
+        db.session.add_all(archived.values())
+        db.session.flush()
+
+        courses = {row.id: row for row in rows}
+        if bookings:
+            db.session.execute(ArchivedBooking.__table__.insert(), [
+                _archived_booking_row(run.id, booking, courses[booking.course_id], archived[booking.course_id].id, now)
+                for booking in bookings
+            ])
+        _delete_courses(course_ids)
+
+        run.courses += len(rows)
+        run.bookings += len(bookings)
+        _commit_batch(run)
+
+def _archive_canceled_bookings(run, cutoff, canceled_before, batch_size, now):
+    while True:
+        rows = _stale_canceled_bookings(cutoff, canceled_before).order_by(Booking.id).limit(batch_size).all()
+        if not rows:
+            return
+        db.session.execute(ArchivedBooking.__table__.insert(), [
+            _archived_booking_row(run.id, row, row, None, now) for row in rows
+        ])
+        db.session.execute(Booking.__table__.delete().where(Booking.id.in_([row.id for row in rows])))
+
+        run.canceled_bookings += len(rows)
+        _commit_batch(run)
+
+def _purge_tombstones(run, deleted_before, batch_size):
+    while True:
+        course_ids = [course_id for course_id, in _expired_tombstones(deleted_before).limit(batch_size)]
+        if not course_ids:
+            return
+        _delete_courses(course_ids)
+        run.tombstones += len(course_ids)
+        _commit_batch(run)
+
+def _purge_unverified_users(run, created_before, batch_size):
+    while True:
+        users = _expired_unverified_users(created_before).order_by(User.id).limit(batch_size).all()
+        if not users:
+            return
+        # 逐个删除，由关系级联删除日历订阅等关联数据
+        for user in users:
+            db.session.delete(user)
+        run.unverified_users += len(users)
+        _commit_batch(run, advance_sync=False)
+
+def run_archive(cutoff, canceled_days, unverified_days, tombstone_days,
+                batch_size=500, dry_run=False, created_by=None, now=None):
+    """归档往期数据并清理热表
+
+    1. 课程日期早于 cutoff 的课程连同其全部预订移入归档表
+    2. 取消超过 canceled_days 天的预订移入归档表
+    3. 删除超过 tombstone_days 天的已删除课程（增量同步的墓碑）
+    4. 删除验证码过期超过 unverified_days 天仍未验证邮箱的账号
+
+    每批单独提交，避免长时间持有数据库写锁；中途失败时已提交的批次保留，重新执行即可继续。
+
+    Returns:
+        各项处理数量的字典（dry_run 时只统计不修改）
+    """
+    now = now or datetime.utcnow()
+    canceled_before = now - timedelta(days=canceled_days)
+    deleted_before = now - timedelta(days=tombstone_days)
+    created_before = now - timedelta(days=unverified_days)
+
+    if dry_run:
+        return {
+            'cutoffDate': cutoff.isoformat(),
+            'courses': _past_courses(cutoff).count(),
+            'bookings': _past_courses(cutoff).join(Booking, Booking.course_id == Course.id).count(),
+            'canceledBookings': _stale_canceled_bookings(cutoff, canceled_before).count(),
+            'tombstones': _expired_tombstones(deleted_before).count(),
+            'unverifiedUsers': _expired_unverified_users(created_before).count(),
+            'dryRun': True
+        }
+
+    run = ArchiveRun(cutoff_date=cutoff, created_by=created_by, started_at=now)
+    db.session.add(run)
+    db.session.commit()
+
+    _archive_past_courses(run, cutoff, batch_size, now)
+    _archive_canceled_bookings(run, cutoff, canceled_before, batch_size, now)
+    _purge_tombstones(run, deleted_before, batch_size)
+    _purge_unverified_users(run, created_before, batch_size)
+
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+
+    report = run.to_dict()
+    report['dryRun'] = False
+    return report
@@ -0,0 +1,73 @@
+import threading
+import time
+from app import db
+from app.models.course import Course, SeatEvent
+
+class AvailabilityTable:
+    """进程内的课程剩余座位表：{日期: {课程ID: 剩余座位}}
+
+    首次使用时用一条聚合查询载入全部课程，之后每次读取前按自增ID
+    增量应用 seat_events 中的新事件（包括其他worker写入的），通常是一次空结果的索引查询。
+    座位保留过期不会产生事件，因此按 reload_interval 定期整表重建以收敛。
+    """
+
+    def __init__(self):
+        self._by_date = {}
+        self._course_dates = {}
+        self._last_event_id = 0
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _set(self, course_id, course_date, remaining):
+        old_date = self._course_dates.get(course_id)
+        if old_date is not None and old_date != course_date:
+            self._by_date[old_date].pop(course_id, None)
+        self._course_dates[course_id] = course_date
+        self._by_date.setdefault(course_date, {})[course_id] = remaining
+
+    def _remove(self, course_id):
+        old_date = self._course_dates.pop(course_id, None)
+        if old_date is not None:
+            self._by_date[old_date].pop(course_id, None)
+
+    def _reload(self):
+        # 先记下事件游标再读课程：之后产生的事件会被重复应用，但事件记录的是绝对值，重复应用无害
+        self._last_event_id = db.session.query(db.func.max(SeatEvent.id)).scalar() or 0
+        self._by_date = {}
+        self._course_dates = {}
+
+        booked, held = Course.seat_count_columns()
+        rows = db.session.query(Course.id, Course.course_date, Course.max_capacity, booked, held)
+        for course_id, course_date, max_capacity, booked_count, held_count in rows:
+            self._set(course_id, course_date.isoformat(), max(max_capacity - booked_count - held_count, 0))
+        self._loaded_at = time.monotonic()
+
+    def sync(self, reload_interval):
+        """把本进程的座位表同步到最新状态（需在应用上下文中调用）"""
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > reload_interval:
+                self._reload()
+                return
+
+            events = SeatEvent.query.filter(
+                SeatEvent.id > self._last_event_id
+            ).order_by(SeatEvent.id).all()
+            for event in events:
+                if event.deleted:
+                    self._remove(event.course_id)
+                else:
+                    data = event.to_dict()
+                    self._set(event.course_id, data['courseDate'], data['remaining'])
+                self._last_event_id = event.id
+
+    def get_range(self, start_date, end_date):
+        """返回日期范围内（含两端）所有课程的 {课程ID: 剩余座位}"""
+        start, end = start_date.isoformat(), end_date.isoformat()
+        result = {}
+        with self._lock:
+            for course_date, courses in self._by_date.items():
+                if start <= course_date <= end:
+                    result.update(courses)
+        return result
+
+availability_table = AvailabilityTable()
@@ -0,0 +1,265 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKUP_SUFFIXES = ('.db.gz', '.db')
+MANIFEST_SUFFIX = '.json'
+
+class BackupInProgress(Exception):
+    """本进程已有备份正在进行"""
+
+class _BackupRestarted(Exception):
+    """备份过程中源库被反复修改，逐步复制需要重来太多次"""
+
+# 同一进程内同时只做一个备份
+_backup_lock = threading.Lock()
+
+def database_path(uri):
+    """从 SQLALCHEMY_DATABASE_URI 取出 SQLite 数据库文件路径
+
+    Raises:
+        ValueError: 不是 SQLite 文件数据库
+    """
+    prefix = 'sqlite:///'
+    if not uri.startswith(prefix) or uri[len(prefix):] in ('', ':memory:'):
+        raise ValueError('在线备份只支持SQLite文件数据库')
+    return uri[len(prefix):]
+
+def backup_options(config):
+    """按应用配置生成 create_backup 的参数"""
+    return {
+        'compress': config['BACKUP_COMPRESS'],
+        'keep': config['BACKUP_KEEP'],
+        'pages_per_step': config['BACKUP_PAGES_PER_STEP'],
+        'step_pause': config['BACKUP_STEP_PAUSE_MS'] / 1000,
+        'max_restarts': config['BACKUP_MAX_RESTARTS']
+    }
+
+def _copy_online(source_path, target_path, pages_per_step, step_pause, max_restarts):
+    """用 SQLite 在线备份接口把源库复制到 target_path
+
+    每步只复制 pages_per_step 页，两步之间暂停 step_pause 秒并释放读锁，写入不会被挡住。
+    其他连接在复制期间写入时 SQLite 会从头重新复制；重来超过 max_restarts 次时改为一步复制完
+    （只在复制期间短暂持有读锁），避免写入频繁时备份一直完不成。
+
+    Returns:
+        重新开始的次数
+    """
+    source = sqlite3.connect(source_path, timeout=30)
+    try:
+        state = {'remaining': None, 'restarts': 0}
+
+        def progress(status, remaining, total):
+            if state['remaining'] is not None and remaining > state['remaining']:
+                state['restarts'] += 1
+                if state['restarts'] > max_restarts:
+                    raise _BackupRestarted()
+            state['remaining'] = remaining
+            if remaining and step_pause:
+                time.sleep(step_pause)
+
+        target = sqlite3.connect(target_path)
+        try:
+            try:
+                source.backup(target, pages=pages_per_step, progress=progress)
+            except _BackupRestarted:
+                source.backup(target, pages=-1)
+        finally:
+            target.close()
+        return state['restarts']
+    finally:
+        source.close()
+
+def _inspect_database(path):
+    """完整性检查并统计各表行数，返回 (检查结果, {表名: 行数})"""
+    connection = sqlite3.connect(path)
+    try:
+        integrity = connection.execute('PRAGMA integrity_check').fetchone()[0]
+        tables = [
+            name for name, in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+        ]
+        counts = {}
+        for name in tables:
+            try:
+                counts[name] = connection.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            except sqlite3.Error:
+                # FTS5 的影子表等无法直接计数的表跳过
+                continue
+        return integrity, counts
+    finally:
+        connection.close()
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _manifest_path(backup_path):
+    for suffix in BACKUP_SUFFIXES:
+        if backup_path.endswith(suffix):
+            return backup_path[:-len(suffix)] + MANIFEST_SUFFIX
+    return backup_path + MANIFEST_SUFFIX
+
+def read_manifest(backup_path):
+    """读取备份的清单，不存在时返回 None"""
+    try:
+        with open(_manifest_path(backup_path), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def list_backups(backup_dir):
+    """按时间倒序列出备份目录中的备份清单"""
+    if not os.path.isdir(backup_dir):
+        return []
+    backups = []
+    for name in os.listdir(backup_dir):
+        if name.endswith(BACKUP_SUFFIXES):
+            manifest = read_manifest(os.path.join(backup_dir, name))
+            if manifest:
+                backups.append(manifest)
+    return sorted(backups, key=lambda manifest: manifest['createdAt'], reverse=True)
+
+def rotate_backups(backup_dir, keep):
+    """只保留最新的 keep 个备份，返回删除的文件名"""
+    removed = []
+    for manifest in list_backups(backup_dir)[keep:]:
+        path = os.path.join(backup_dir, manifest['file'])
+        for file_path in (path, _manifest_path(path)):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        removed.append(manifest['file'])
+    return removed
+
+def create_backup(source_path, backup_dir, compress=True, keep=14,
+                  pages_per_step=256, step_pause=0.01, max_restarts=3):
+    """在线备份数据库，校验后压缩保存，并按数量轮换旧备份
+
+    先复制到备份目录中的临时文件，对副本做完整性检查并统计行数（不占用源库），
+    再压缩为 .db.gz，写入同名 .json 清单（含 sha256 和各表行数，供恢复校验使用）。
+
+    Returns:
+        备份清单字典
+
+    Raises:
+        BackupInProgress: 本进程已有备份正在进行
+        RuntimeError: 副本完整性检查未通过
+    """
+    if not _backup_lock.acquire(blocking=False):
+        raise BackupInProgress('已有备份正在进行')
+    try:
+        os.makedirs(backup_dir, exist_ok=True)
+        created_at = datetime.utcnow()
+        base_name = os.path.splitext(os.path.basename(source_path))[0]
+        stem = f"{base_name}-{created_at.strftime('%Y%m%d-%H%M%S')}"
+        file_name = stem + ('.db.gz' if compress else '.db')
+        sequence = 1
+        # 同一秒内多次备份时加序号，不覆盖已有备份
+        while os.path.exists(_manifest_path(os.path.join(backup_dir, file_name))):
+            file_name = f"{stem}-{sequence}{'.db.gz' if compress else '.db'}"
+            sequence += 1
+        backup_path = os.path.join(backup_dir, file_name)
+
+        started = time.perf_counter()
+        fd, copy_path = tempfile.mkstemp(suffix='.db.part', dir=backup_dir)
+        os.close(fd)
+        try:
+            restarts = _copy_online(source_path, copy_path, pages_per_step, step_pause, max_restarts)
+            integrity, counts = _inspect_database(copy_path)
+            if integrity != 'ok':
+                raise RuntimeError(f'备份副本完整性检查未通过: {integrity}')
+            database_size = os.path.getsize(copy_path)
+
+            part_path = backup_path + '.part'
+            if compress:
+                with open(copy_path, 'rb') as source, gzip.open(part_path, 'wb', compresslevel=6) as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+            else:
+                shutil.copyfile(copy_path, part_path)
+            os.replace(part_path, backup_path)
+        finally:
+            for path in (copy_path, backup_path + '.part'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        manifest = {
+            'file': file_name,
+            'createdAt': created_at.isoformat() + 'Z',
+            'compressed': compress,
+            'databaseSize': database_size,
+            'size': os.path.getsize(backup_path),
+            'sha256': _sha256(backup_path),
+            'tables': counts,
+            'restarts': restarts,
+            'elapsedMs': round((time.perf_counter() - started) * 1000)
+        }
+        with open(_manifest_path(backup_path), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        manifest['rotated'] = rotate_backups(backup_dir, keep)
+        return manifest
+    finally:
+        _backup_lock.release()
+
+def restore_backup(backup_path, target_path):
+    """把备份解压（或复制）到 target_path，先写临时文件再原子替换"""
+    part_path = target_path + '.part'
+    try:
+        if backup_path.endswith('.gz'):
+            with gzip.open(backup_path, 'rb') as source, open(part_path, 'wb') as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+        else:
+            shutil.copyfile(backup_path, part_path)
+        os.replace(part_path, target_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+def verify_backup(backup_path):
+    """恢复校验：核对文件哈希，恢复到临时文件后做完整性检查，并与清单中的各表行数比对
+
+    Returns:
+        {'file', 'ok', 'errors': [...], 'integrity', 'tables'}
+    """
+    errors = []
+    manifest = read_manifest(backup_path)
+    if manifest is None:
+        errors.append('缺少备份清单')
+    elif _sha256(backup_path) != manifest['sha256']:
+        errors.append('文件哈希与清单不一致，备份文件可能已损坏')
+
+    integrity, counts = None, {}
+    if not errors:
+        fd, restored_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            restore_backup(backup_path, restored_path)
+            integrity, counts = _inspect_database(restored_path)
+        except (OSError, sqlite3.Error) as e:
+            errors.append(f'恢复失败: {str(e)}')
+        finally:
+            os.remove(restored_path)
+        if integrity is not None and integrity != 'ok':
+            errors.append(f'完整性检查未通过: {integrity}')
+        for table, count in manifest['tables'].items():
+            if integrity is not None and counts.get(table) != count:
+                errors.append(f'表 {table} 行数不一致: 清单 {count}，恢复后 {counts.get(table)}')
+
+    return {
+        'file': os.path.basename(backup_path),
+        'ok': not errors,
+        'errors': errors,
+        'integrity': integrity,
+        'tables': counts
+    }
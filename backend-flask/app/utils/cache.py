@@ -0,0 +1,49 @@
+import threading
+import time
+
+class TTLCache:
+    """线程安全的进程内TTL缓存
+    
+    多进程部署时每个worker各有一份缓存，写操作只能清除本进程的缓存，
+    其他worker依靠较短的过期时间收敛，因此只适合缓存允许短暂滞后的数据。
+    """
+    
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """读取未过期的缓存值"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+    
+    def set(self, key, value, ttl):
+        """写入缓存，ttl为有效秒数"""
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                # 容量已满时淘汰最早写入的条目
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + ttl, value)
+    
+    def get_or_load(self, key, ttl, loader):
+        """读取缓存，未命中时调用 loader() 计算并写入"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+_MISSING = object()
@@ -0,0 +1,378 @@
+import csv
+import io
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from app import db
+from app.models.course import Course
+from app.models.user import User
+from app.utils.ical import parse_events, unescape_text
+from app.utils.rooms import parse_time_slot, MINUTES_PER_DAY
+
+CSV_COLUMNS = ['name', 'instructor', 'location', 'courseDate', 'timeSlot', 'maxCapacity', 'description', 'danceType', 'leaderId']
+REQUIRED_FIELDS = ['name', 'instructor', 'location', 'courseDate', 'timeSlot']
+
+# 展开重复事件时最多生成的课程数，防止 COUNT / UNTIL 过大
+MAX_OCCURRENCES_PER_EVENT = 200
+
+_MAX_LENGTHS = {
+    'name': Course.name.type.length,
+    'instructor': Course.instructor.type.length,
+    'location': Course.location.type.length,
+    'danceType': Course.dance_type.type.length
+}
+
+def parse_course_csv(content):
+    """解析CSV课表，返回 [(行号, 行字典), ...]
+
+    第一行为表头，列名与创建课程接口的字段相同（见 CSV_COLUMNS），多余的列忽略。
+
+    Raises:
+        ValueError: 缺少必需的列
+    """
+    # Excel 保存的 UTF-8 CSV 带有BOM
+    content = content.lstrip('\ufeff')
+    reader = csv.DictReader(io.StringIO(content))
+    headers = [header.strip() for header in (reader.fieldnames or [])]
+    missing = [column for column in REQUIRED_FIELDS if column not in headers]
+    if missing:
+        raise ValueError(f"导入文件缺少必需的列: {', '.join(missing)}")
+    reader.fieldnames = headers
+
+    rows = []
+    for row in reader:
+        values = {column: (row.get(column) or '').strip() for column in CSV_COLUMNS}
+        if any(values.values()):
+            rows.append((reader.line_num, values))
+    return rows
+
+def _parse_ics_datetime(params, value, timezone):
+    """解析 DTSTART / DTEND，返回课程所在时区的本地时间；全天事件返回 date"""
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value, '%Y%m%d').date()
+    if value.endswith('Z'):
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ').replace(tzinfo=ZoneInfo('UTC')).astimezone(timezone).replace(tzinfo=None)
+    parsed = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    if params.get('TZID'):
+        try:
+            source = ZoneInfo(params['TZID'])
+        except (ZoneInfoNotFoundError, ValueError):
+            # 无法识别的时区（如 Outlook 的 Windows 时区名）按课程所在时区处理
+            return parsed
+        return parsed.replace(tzinfo=source).astimezone(timezone).replace(tzinfo=None)
+    # 浮动时间直接按课程所在时区处理
+    return parsed
+
+def _positive_rule_value(parts, name, default):
+    """重复规则中的正整数参数（INTERVAL、COUNT），缺省时返回 default"""
+    if name not in parts:
+        return default
+    value = parts[name]
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f'重复规则的 {name} 必须是正整数')
+    return int(value)
+
+def _expand_weekly(start, rule, exdates):
+    """展开 FREQ=WEEKLY 的重复规则，返回所有上课日期
+
+    只支持每周同一天重复（可带 INTERVAL、COUNT 或 UNTIL），其他规则抛出 ValueError。
+    """
+    parts = dict(part.partition('=')[::2] for part in rule.upper().split(';') if part)
+    if parts.get('FREQ') != 'WEEKLY':
+        raise ValueError('只支持按周重复的事件（FREQ=WEEKLY）')
+    weekday_codes = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+    if parts.get('BYDAY') and parts['BYDAY'] != weekday_codes[start.weekday()]:
+        raise ValueError('只支持每周同一天重复的事件')
+    if 'COUNT' not in parts and 'UNTIL' not in parts:
+        raise ValueError('重复事件必须指定 COUNT 或 UNTIL')
+
+    # 间隔为0会重复生成同一天，为负数时日期倒退
+    interval = _positive_rule_value(parts, 'INTERVAL', 1)
+    count = _positive_rule_value(parts, 'COUNT', MAX_OCCURRENCES_PER_EVENT)
+    try:
+        until = datetime.strptime(parts['UNTIL'][:8], '%Y%m%d').date() if 'UNTIL' in parts else None
+    except ValueError:
+        raise ValueError('重复规则的 UNTIL 格式无效')
+    if count > MAX_OCCURRENCES_PER_EVENT:
+        raise ValueError(f'单个重复事件最多展开{MAX_OCCURRENCES_PER_EVENT}次')
+
+    dates = []
+    for i in range(count):
+        day = start + timedelta(weeks=i * interval)
+        if until and day > until:
+            break
+        if day not in exdates:
+            dates.append(day)
+    return dates
+
+def parse_course_ics(content, timezone_name, default_instructor=''):
+    """解析 iCalendar 课表，每个 VEVENT（重复事件的每次发生）对应一门课程
+
+    SUMMARY 为课程名称，LOCATION 为地点，CATEGORIES 为舞种；DESCRIPTION 首行形如
+    “教练: xxx”时作为教练（与本系统导出的订阅格式一致），否则使用 default_instructor。
+
+    Returns:
+        [(VEVENT起始行号, 行字典), ...]，无法解析的事件行字典中带有 'error'
+    """
+    timezone = ZoneInfo(timezone_name)
+    rows = []
+    for line, props in parse_events(content):
+        def first(name):
+            values = props.get(name)
+            return values[0] if values else ({}, '')
+
+        description = unescape_text(first('DESCRIPTION')[1]).strip()
+        instructor = default_instructor
+        first_line, _, rest = description.partition('\n')
+        for prefix in ('教练:', '教练：'):
+            if first_line.startswith(prefix):
+                instructor = first_line[len(prefix):].strip()
+                description = rest.strip()
+
+        values = {
+            'name': unescape_text(first('SUMMARY')[1]).strip(),
+            'instructor': instructor,
+            'location': unescape_text(first('LOCATION')[1]).strip(),
+            'courseDate': '',
+            'timeSlot': '',
+            'maxCapacity': '',
+            'description': description,
+            'danceType': unescape_text(first('CATEGORIES')[1]).split(',')[0].strip(),
+            'leaderId': ''
+        }
+
+        try:
+            start = _parse_ics_datetime(*first('DTSTART'), timezone)
+            end_params, end_value = first('DTEND')
+            end = _parse_ics_datetime(end_params, end_value, timezone) if end_value else None
+        except ValueError:
+            rows.append((line, dict(values, error='DTSTART / DTEND 格式无效')))
+            continue
+        if not isinstance(start, datetime) or not isinstance(end, datetime):
+            rows.append((line, dict(values, error='缺少上课时间（不支持全天事件，需要 DTSTART 和 DTEND）')))
+            continue
+        if end.date() != start.date():
+            rows.append((line, dict(values, error='课程不能跨天')))
+            continue
+        values['timeSlot'] = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+
+        dates = [start.date()]
+        rule = first('RRULE')[1]
+        if rule:
+            exdates = set()
+            for params, value in props.get('EXDATE', []):
+                for item in value.split(','):
+                    try:
+                        exdates.add(datetime.strptime(item[:8], '%Y%m%d').date())
+                    except ValueError:
+                        pass
+            try:
+                dates = _expand_weekly(start.date(), rule, exdates)
+            except ValueError as e:
+                rows.append((line, dict(values, courseDate=start.date().isoformat(), error=str(e))))
+                continue
+
+        for day in dates:
+            rows.append((line, dict(values, courseDate=day.isoformat())))
+    return rows
+
+def _validate_row(values, user, leaders):
+    """校验单行并转换为课程字段，返回 (字段字典, 错误列表)"""
+    if values.get('error'):
+        return None, [values['error']]
+    errors = [f'缺少必填字段: {field}' for field in REQUIRED_FIELDS if not values[field]]
+    for field, max_length in _MAX_LENGTHS.items():
+        if len(values[field]) > max_length:
+            errors.append(f'{field} 不能超过{max_length}个字符')
+
+    fields = {
+        'name': values['name'],
+        'instructor': values['instructor'],
+        'location': values['location'],
+        'time_slot': values['timeSlot'],
+        'description': values['description'],
+        'dance_type': values['danceType'] or None,
+        'leader_id': None
+    }
+
+    try:
+        fields['course_date'] = date.fromisoformat(values['courseDate'])
+    except ValueError:
+        if values['courseDate']:
+            errors.append('课程日期格式错误，请使用YYYY-MM-DD格式')
+
+    if values['timeSlot']:
+        _, _, error = Course.validate_time_slot(values['timeSlot'])
+        if error:
+            errors.append(error)
+
+    if values['maxCapacity']:
+        try:
+            fields['max_capacity'] = int(values['maxCapacity'])
+            if fields['max_capacity'] <= 0:
+                raise ValueError
+        except ValueError:
+            errors.append('最大容量必须是正整数')
+
+    # 课程归属与创建课程接口一致：领队只能创建自己舞种的课程，管理员可指定领队
+    if user.is_admin():
+        if values['leaderId']:
+            leader = leaders.get(values['leaderId'])
+            if leader is None:
+                errors.append(f"领队不存在: {values['leaderId']}")
+            else:
+                fields['leader_id'] = leader.id
+                if leader.dance_type:
+                    fields['dance_type'] = leader.dance_type
+    else:
+        fields['dance_type'] = user.dance_type
+        fields['leader_id'] = user.id
+
+    return fields, errors
+
+def _minutes(time_slot):
+    # 已有课程的时间格式无效时按占用全天处理，与 check_time_conflict 一致
+    return parse_time_slot(time_slot) or (0, MINUTES_PER_DAY)
+
+def find_conflicts(candidates, existing):
+    """按（日期, 地点）排序后一次扫描找出所有时间重叠的课程对
+
+    Args:
+        candidates: 待导入的课程 [(编号, 日期, 地点, 开始分钟, 结束分钟), ...]
+        existing: 数据库中已有的课程，格式相同，编号为 ('course', 课程ID)
+
+    Returns:
+        [(编号, 编号), ...]，每对中至少有一方是待导入的课程
+    """
+    intervals = sorted(candidates + existing, key=lambda item: (item[1], item[2], item[3], item[4]))
+    pairs = []
+    group = None
+    active = []
+    for key, course_date, location, start, end in intervals:
+        if (course_date, location) != group:
+            group = (course_date, location)
+            active = []
+        # 结束时间不晚于当前开始时间的课程不会再与后面的课程重叠
+        active = [item for item in active if item[1] > start]
+        for other_key, _ in active:
+            if not (isinstance(key, tuple) and isinstance(other_key, tuple)):
+                pairs.append((other_key, key))
+        active.append((key, end))
+    return pairs
+
+def import_courses(rows, user, dry_run=False):
+    """批量导入课程
+
+    逐行校验后，把待导入的课程与数据库中同一日期范围、同一地点的已有课程放在一起，
+    按（日期, 地点, 开始时间）排序做一次扫描，找出文件内部和与已有课程的地点时间冲突。
+    冲突的行（文件内互相冲突时双方都算）和校验失败的行被跳过，其余课程一次性写入。
+
+    Args:
+        rows: parse_course_csv / parse_course_ics 的结果
+        user: 当前用户（管理员或领队）
+        dry_run: 只检查，不写入
+
+    Returns:
+        {'total', 'created', 'failed', 'dryRun', 'errors': [...], 'conflicts': [...], 'courses': [...]}
+    """
+    leader_ids = {values['leaderId'] for _, values in rows if values.get('leaderId')}
+    leaders = {}
+    if leader_ids and user.is_admin():
+        numeric_ids = [int(leader_id) for leader_id in leader_ids if leader_id.isdigit()]
+        leaders = {
+            str(leader.id): leader
+            for leader in User.query.filter(User.id.in_(numeric_ids), User.role == 'leader')
+        }
+
+    errors = {}
+    valid = {}
+    for index, (line, values) in enumerate(rows):
+        fields, row_errors = _validate_row(values, user, leaders)
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            valid[index] = fields
+
+    conflicts = []
+    if valid:
+        dates = [fields['course_date'] for fields in valid.values()]
+        locations = {fields['location'] for fields in valid.values()}
+        existing_rows = db.session.query(
+            Course.id, Course.name, Course.course_date, Course.location, Course.time_slot
+        ).filter(
+            Course.course_date >= min(dates),
+            Course.course_date <= max(dates),
+            Course.location.in_(locations)
+        ).all()
+        existing_names = {}
+        existing = []
+        for course_id, name, course_date, location, time_slot in existing_rows:
+            existing_names[course_id] = (name, time_slot)
+            existing.append((('course', course_id), course_date, location, *_minutes(time_slot)))
+
+        candidates = [
+            (index, fields['course_date'], fields['location'], *_minutes(fields['time_slot']))
+            for index, fields in valid.items()
+        ]
+
+        def describe(key):
+            if isinstance(key, tuple):
+                name, time_slot = existing_names[key[1]]
+                return {'courseId': key[1], 'name': name, 'timeSlot': time_slot}
+            return {'line': rows[key][0], 'name': valid[key]['name'], 'timeSlot': valid[key]['time_slot']}
+
+        for first, second in find_conflicts(candidates, existing):
+            for key, other in ((first, second), (second, first)):
+                if isinstance(key, tuple):
+                    continue
+                other_info = describe(other)
+                if 'courseId' in other_info:
+                    message = f"与已有课程《{other_info['name']}》（ID {other_info['courseId']}，{other_info['timeSlot']}）地点时间冲突"
+                else:
+                    message = f"与第{other_info['line']}行《{other_info['name']}》（{other_info['timeSlot']}）地点时间冲突"
+                errors.setdefault(key, []).append(message)
+            a, b = (first, second) if not isinstance(first, tuple) else (second, first)
+            conflicts.append({
+                'courseDate': valid[a]['course_date'].isoformat(),
+                'location': valid[a]['location'],
+                'row': describe(a),
+                'conflictsWith': describe(b)
+            })
+
+    to_create = [(index, fields) for index, fields in valid.items() if index not in errors]
+    created = []
+    if not dry_run and to_create:
+        courses = [Course(**fields) for _, fields in to_create]
+        # 通过ORM一次性写入，同步序号、课程摘要和全文索引照常更新
+        db.session.add_all(courses)
+        db.session.flush()
+        created = [(index, course.id) for (index, _), course in zip(to_create, courses)]
+    elif dry_run:
+        created = [(index, None) for index, _ in to_create]
+
+    return {
+        'total': len(rows),
+        'created': len(created),
+        'failed': len(errors),
+        'dryRun': dry_run,
+        'errors': [
+            {
+                'line': rows[index][0],
+                'name': rows[index][1]['name'],
+                'courseDate': rows[index][1]['courseDate'],
+                'errors': errors[index]
+            }
+            for index in sorted(errors)
+        ],
+        'conflicts': conflicts,
+        'courses': [
+            {
+                'line': rows[index][0],
+                'id': course_id,
+                'name': valid[index]['name'],
+                'courseDate': valid[index]['course_date'].isoformat(),
+                'timeSlot': valid[index]['time_slot'],
+                'location': valid[index]['location']
+            }
+            for index, course_id in created
+        ]
+    }
@@ -0,0 +1,260 @@
+import csv
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import tuple_
+from app import db
+from app.models.course import Course, Booking
+from app.models.user import User
+from app.models.export import ExportJob
+from app.utils.semester import semester_range
+from app.utils.xlsx import XlsxWriter
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+BOOKING_STATUS_LABELS = {'confirmed': '已确认', 'canceled': '已取消', 'pending': '待确认'}
+WEEKDAY_LABELS = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+def _format_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+def _dance_type_label(dance_type):
+    return dance_type or '公共课程'
+
+def _filter_courses(stmt, start_date, end_date, dance_type):
+    stmt = stmt.where(Course.course_date >= start_date, Course.course_date <= end_date)
+    if dance_type == 'public':
+        return stmt.where(Course.dance_type.is_(None))
+    if dance_type:
+        return stmt.where(Course.dance_type == dance_type)
+    return stmt
+
+class BookingsReport:
+    """预约明细：每条预订一行（含已取消的预订）"""
+    headers = ['预约ID', '课程ID', '课程日期', '时间段', '课程名称', '舞种', '地点', '教练',
+               '用户名', '姓名', '状态', '预约时间', '更新时间']
+    # 分页键：按课程日期、课程、预订排序
+    key_columns = (Course.course_date, Course.id, Booking.id)
+
+    @staticmethod
+    def statement(start_date, end_date, dance_type):
+        stmt = db.select(
+            Course.course_date, Course.id, Booking.id,
+            Course.time_slot, Course.name, Course.dance_type, Course.location, Course.instructor,
+            User.username, User.name, Booking.status, Booking.created_at, Booking.updated_at
+        ).select_from(Booking).join(Course, Course.id == Booking.course_id).join(User, User.id == Booking.user_id)
+        return _filter_courses(stmt, start_date, end_date, dance_type)
+
+    @staticmethod
+    def count(start_date, end_date, dance_type):
+        stmt = db.select(db.func.count(Booking.id)).select_from(Booking).join(Course, Course.id == Booking.course_id)
+        return db.session.execute(_filter_courses(stmt, start_date, end_date, dance_type)).scalar()
+
+    @staticmethod
+    def format_row(row):
+        (course_date, course_id, booking_id, time_slot, name, dance_type, location, instructor,
+         username, user_name, status, created_at, updated_at) = row
+        return [
+            booking_id, course_id, course_date.isoformat(), time_slot, name, _dance_type_label(dance_type),
+            location, instructor, username, user_name, BOOKING_STATUS_LABELS.get(status, status),
+            _format_datetime(created_at), _format_datetime(updated_at)
+        ]
+
+class AttendanceReport:
+    """课程出勤汇总：每门课程一行，统计已确认和已取消的预订数"""
+    headers = ['课程ID', '课程日期', '星期', '时间段', '课程名称', '舞种', '地点', '教练',
+               '容量', '已确认', '已取消', '满员率']
+    key_columns = (Course.course_date, Course.id)
+
+    @staticmethod
+    def statement(start_date, end_date, dance_type):
+        confirmed = db.func.count(Booking.id).filter(Booking.status == 'confirmed')
+        canceled = db.func.count(Booking.id).filter(Booking.status == 'canceled')
+        stmt = db.select(
+            Course.course_date, Course.id,
+            Course.time_slot, Course.name, Course.dance_type, Course.location, Course.instructor,
+            Course.max_capacity, confirmed, canceled
+        ).select_from(Course).outerjoin(Booking, Booking.course_id == Course.id).group_by(Course.id)
+        return _filter_courses(stmt, start_date, end_date, dance_type)
+
+    @staticmethod
+    def count(start_date, end_date, dance_type):
+        stmt = db.select(db.func.count(Course.id))
+        return db.session.execute(_filter_courses(stmt, start_date, end_date, dance_type)).scalar()
+
+    @staticmethod
+    def format_row(row):
+        (course_date, course_id, time_slot, name, dance_type, location, instructor,
+         max_capacity, confirmed, canceled) = row
+        fill_rate = round(confirmed / max_capacity, 4) if max_capacity else ''
+        return [
+            course_id, course_date.isoformat(), WEEKDAY_LABELS[course_date.weekday()], time_slot, name,
+            _dance_type_label(dance_type), location, instructor, max_capacity, confirmed, canceled, fill_rate
+        ]
+
+REPORTS = {
+    'bookings': BookingsReport,
+    'attendance': AttendanceReport
+}
+
+# 以这些字符开头的单元格会被 Excel 当作公式执行
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def _escape_csv_cell(value):
+    """用户填写的姓名等文本以公式字符开头时加上单引号，Excel 打开时按文本显示"""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+class _CsvSink:
+    """CSV 文件写入（带BOM，Excel 打开中文不乱码）"""
+
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._file)
+
+    def write_row(self, values):
+        self._writer.writerow([_escape_csv_cell(value) for value in values])
+
+    def close(self):
+        self._file.close()
+
+def _open_sink(path, file_format, sheet_name):
+    if file_format == 'xlsx':
+        return XlsxWriter(path, sheet_name)
+    return _CsvSink(path)
+
+def iter_report_rows(report, stmt, batch_size, fetch_size, on_page=None):
+    """按分页键逐页读取报表行
+
+    每页是一条带 LIMIT 的查询，页内用 yield_per 分批从游标取行，内存只与 fetch_size 有关。
+    分页而不是单个长游标：SQLite 的读游标在整个遍历期间持有共享锁，会阻塞所有写事务的提交，
+    分页后每页结束即释放，期间也可以提交进度。
+
+    Args:
+        on_page: 每页读完后的回调，参数为本页行数
+    """
+    last_key = None
+    key_size = len(report.key_columns)
+    while True:
+        page = stmt
+        if last_key is not None:
+            page = page.where(tuple_(*report.key_columns) > tuple_(*last_key))
+        page = page.order_by(*report.key_columns).limit(batch_size)
+
+        count = 0
+        for row in db.session.execute(page, execution_options={'yield_per': fetch_size}):
+            count += 1
+            last_key = tuple(row[:key_size])
+            yield row
+        if on_page:
+            on_page(count)
+        if count < batch_size:
+            return
+
+def run_export_job(job_id, export_dir, batch_size, fetch_size):
+    """执行导出任务（需在应用上下文中调用），结果写入 export_dir"""
+    job = ExportJob.query.get(job_id)
+    if job is None or job.status != 'pending':
+        return
+
+    part_path = None
+    try:
+        report = REPORTS[job.kind]
+        params = job.get_params()
+        start_date, end_date = semester_range(params['semester'])
+        dance_type = params.get('danceType')
+
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        job.total_rows = report.count(start_date, end_date, dance_type)
+        db.session.commit()
+
+        os.makedirs(export_dir, exist_ok=True)
+        path = os.path.join(export_dir, f'export-{job.id}.{job.file_format}')
+        part_path = path + '.part'
+
+        processed = 0
+
+        def save_progress(page_rows):
+            nonlocal processed
+            processed += page_rows
+            job.processed_rows = processed
+            db.session.commit()
+
+        sink = _open_sink(part_path, job.file_format, params['semester'])
+        try:
+            sink.write_row(report.headers)
+            stmt = report.statement(start_date, end_date, dance_type)
+            for row in iter_report_rows(report, stmt, batch_size, fetch_size, save_progress):
+                sink.write_row(report.format_row(row))
+        finally:
+            sink.close()
+
+        # 写完后再改名，下载接口不会读到写了一半的文件
+        os.replace(part_path, path)
+        job.status = 'completed'
+        job.file_path = path
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if part_path and os.path.exists(part_path):
+            os.remove(part_path)
+        job = ExportJob.query.get(job_id)
+        job.status = 'failed'
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        raise
+
+def purge_expired_exports(retention_hours):
+    """删除超过保留时间的导出任务及其文件（未提交）
+
+    包括进程异常退出后一直停留在 pending / running 状态的任务。
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    expired = ExportJob.query.filter(ExportJob.created_at < cutoff).all()
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        db.session.delete(job)
+    return len(expired)
+
+class ExportRunner:
+    """后台导出线程池（进程内）
+
+    导出在线程池中执行，请求只负责创建任务记录，不会占用请求worker。
+    线程池在第一次提交任务时按配置的大小创建。
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, app, job_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=app.config['EXPORT_MAX_WORKERS'],
+                    thread_name_prefix='export'
+                )
+        return self._executor.submit(self._run, app, job_id)
+
+    @staticmethod
+    def _run(app, job_id):
+        with app.app_context():
+            try:
+                run_export_job(
+                    job_id,
+                    app.config['EXPORT_DIR'],
+                    app.config['EXPORT_BATCH_SIZE'],
+                    app.config['EXPORT_FETCH_SIZE']
+                )
+            except Exception as e:
+                app.logger.warning(f"导出任务 {job_id} 失败: {str(e)}")
+            finally:
+                db.session.remove()
+
+export_runner = ExportRunner()
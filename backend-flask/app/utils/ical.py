@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+from app.utils.rooms import parse_time_slot
+
+PRODID = '-//FlexCrew//Street Dance Club//CN'
+# 事件UID的域名部分，固定取值，保证通过不同域名订阅时UID一致
+UID_DOMAIN = 'flexcrew'
+# 输出格式的版本，格式变化时加1，订阅的 ETag 随之变化，日历应用会重新下载
+FEED_FORMAT_VERSION = 2
+
+def escape_text(value):
+    """按 RFC 5545 转义 TEXT 值中的反斜杠、分号、逗号和换行"""
+    return (
+        (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+def fold_line(line):
+    """按 RFC 5545 折行：每行不超过75字节，续行以空格开头，不拆开多字节字符"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    current, size, limit = [], 0, 75
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            parts.append(''.join(current))
+            # 续行开头的空格占一个字节
+            current, size, limit = [], 0, 74
+        current.append(char)
+        size += char_size
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+def _format_utc(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+def calendar_header(name, timezone):
+    """日历头部（VCALENDAR 开始部分）"""
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        f'X-WR-TIMEZONE:{timezone}',
+    ]
+    return ''.join(fold_line(line) for line in lines)
+
+def calendar_footer():
+    return 'END:VCALENDAR\r\n'
+
+def course_event(course, timezone):
+    """把一门课程转换为一个 VEVENT
+
+    课程时间是 timezone 的本地时间，换算为UTC输出（带Z后缀）：带 TZID 的时间要求日历中有对应的
+    VTIMEZONE 组件，Outlook 等客户端缺少时会当作浮动时间或UTC。
+    时间段格式无效的课程输出为全天事件。
+    UID 由课程ID生成，课程修改后日历应用会更新同一个事件而不是新增。
+    """
+    minutes = parse_time_slot(course.time_slot)
+    if minutes is None:
+        day = course.course_date.strftime('%Y%m%d')
+        next_day = (course.course_date + timedelta(days=1)).strftime('%Y%m%d')
+        timing = [f'DTSTART;VALUE=DATE:{day}', f'DTEND;VALUE=DATE:{next_day}']
+    else:
+        local_midnight = datetime.combine(course.course_date, datetime.min.time(), tzinfo=ZoneInfo(timezone))
+        start, end = (
+            (local_midnight + timedelta(minutes=value)).astimezone(dt_timezone.utc).replace(tzinfo=None)
+            for value in minutes
+        )
+        timing = [f'DTSTART:{_format_utc(start)}', f'DTEND:{_format_utc(end)}']
+
+    description = f'教练: {course.instructor}'
+    if course.description:
+        description += f'\n{course.description}'
+
+    modified = course.updated_at or course.created_at or datetime.utcnow()
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:course-{course.id}@{UID_DOMAIN}',
+        f'DTSTAMP:{_format_utc(modified)}',
+        f'LAST-MODIFIED:{_format_utc(modified)}',
+        *timing,
+        f'SUMMARY:{escape_text(course.name)}',
+        f'LOCATION:{escape_text(course.location)}',
+        f'DESCRIPTION:{escape_text(description)}',
+    ]
+    if course.dance_type:
+        lines.append(f'CATEGORIES:{escape_text(course.dance_type)}')
+    lines.append('END:VEVENT')
+    return ''.join(fold_line(line) for line in lines)
+
+def unescape_text(value):
+    """escape_text 的逆操作"""
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            escaped = next(chars, '')
+            result.append('\n' if escaped in ('n', 'N') else escaped)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+def _unfold(content):
+    """展开折行，返回 [(起始行号, 逻辑行), ...]"""
+    lines = []
+    for number, line in enumerate(content.replace('\r\n', '\n').replace('\r', '\n').split('\n'), start=1):
+        if line[:1] in (' ', '\t') and lines:
+            lines[-1] = (lines[-1][0], lines[-1][1] + line[1:])
+        elif line:
+            lines.append((number, line))
+    return lines
+
+def _split_property(line):
+    """'DTSTART;TZID=Asia/Shanghai:20250901T180000' -> ('DTSTART', {'TZID': 'Asia/Shanghai'}, '20250901T180000')"""
+    # 参数值可以用双引号包含冒号，名称部分在第一个不在引号内的冒号处结束
+    in_quotes = False
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ':' and not in_quotes:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        return None
+    name, *raw_params = head.split(';')
+    params = {}
+    for raw_param in raw_params:
+        key, _, param_value = raw_param.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+def parse_events(content):
+    """解析 iCalendar 文本中的 VEVENT
+
+    Returns:
+        [(VEVENT起始行号, {属性名: [(参数字典, 值), ...]}), ...]，同名属性（如 EXDATE）可出现多次
+    """
+    events = []
+    current = None
+    depth = 0
+    for number, line in _unfold(content):
+        prop = _split_property(line)
+        if prop is None:
+            continue
+        name, params, value = prop
+        if name == 'BEGIN':
+            if value.upper() == 'VEVENT' and current is None:
+                current = (number, {})
+            elif current is not None:
+                # VEVENT 内嵌的 VALARM 等组件，忽略其属性
+                depth += 1
+        elif name == 'END':
+            if current is not None and depth:
+                depth -= 1
+            elif current is not None and value.upper() == 'VEVENT':
+                events.append(current)
+                current = None
+        elif current is not None and not depth:
+            current[1].setdefault(name, []).append((params, value))
+    return events
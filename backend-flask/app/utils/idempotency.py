@@ -0,0 +1,184 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, jsonify, current_app, make_response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.idempotency import IdempotencyKey
+from app.utils.cache import TTLCache
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# 预留后超过该时间仍未保存响应、也没有提交过写入的幂等键视为已失效
+PENDING_TIMEOUT = timedelta(minutes=1)
+# 会话 info 中记录本次请求预留、尚未提交过写入的幂等键
+_PENDING_RECORD = 'idempotency_record_id'
+
+# 本进程处理过的幂等请求的响应，重放命中时不访问数据库；其他进程处理的请求从 idempotency_keys 表读取
+_responses = TTLCache(maxsize=1024)
+
+def _fingerprint():
+    """请求方法、路径（含查询参数）和请求体的 sha256
+
+    multipart 表单每次发送的分隔符都不同，改为按字段和上传文件的内容计算。
+    """
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.full_path}\n'.encode('utf-8'))
+    if request.mimetype == 'multipart/form-data':
+        for name, value in sorted(request.form.items(multi=True)):
+            digest.update(f'{name}={value}\n'.encode('utf-8'))
+        for name, upload in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            digest.update(f'{name}:{upload.filename}\n'.encode('utf-8'))
+            digest.update(upload.read())
+            upload.seek(0)
+    else:
+        digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+def _key_conflict():
+    return jsonify({
+        'success': False,
+        'message': '该幂等键已用于其他请求'
+    }), 422
+
+def _in_progress():
+    response = jsonify({
+        'success': False,
+        'message': '相同的请求正在处理中，请稍后重试'
+    })
+    response.status_code = 409
+    response.headers['Retry-After'] = '1'
+    return response
+
+def _replay(stored, fingerprint):
+    stored_fingerprint, status, body, mimetype = stored
+    if stored_fingerprint != fingerprint:
+        return _key_conflict()
+    response = current_app.response_class(body, status=status, mimetype=mimetype)
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+def _already_applied():
+    response = jsonify({
+        'success': False,
+        'message': '该请求已经执行，但结果未能保存，请刷新后确认，不要重复提交'
+    })
+    response.status_code = 409
+    return response
+
+def _release(record_id):
+    """删除预留的幂等键，允许用同一个键重试"""
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(id=record_id).delete(synchronize_session=False)
+    db.session.commit()
+
+@event.listens_for(db.session, 'before_commit')
+def _mark_applied(session):
+    """接口第一次提交写入时，在同一事务中把预留的幂等键标记为已执行"""
+    record_id = session.info.pop(_PENDING_RECORD, None)
+    if record_id is not None:
+        session.execute(
+            IdempotencyKey.__table__.update().where(IdempotencyKey.id == record_id).values(applied_at=datetime.utcnow())
+        )
+
+def idempotent(view):
+    """为写接口提供 Idempotency-Key 支持，需放在 @jwt_required() 之下
+
+    请求带 Idempotency-Key 头时，同一用户的同一个键只执行一次：
+    首次请求先预留键（唯一约束保证并发的重复请求只有一个执行），完成后保存响应；
+    之后的重放直接返回保存的响应并带上 Idempotent-Replayed: true，不再执行接口的检查和写入。
+    同一个键用于不同的请求返回422，首次请求尚未完成时返回409。
+    5xx 响应和抛出的异常不保存，可用同一个键重试。
+    不带该请求头时行为不变。
+
+    接口自己提交事务，响应在其后单独保存。为避免两次提交之间进程退出导致重试时重复执行，
+    接口第一次提交时会在同一事务中把键标记为已执行（applied_at）：之后的重试不再执行接口，
+    而是返回409说明请求已执行但结果未能保存；只有从未提交过写入的预留在超时后才删除并重新执行。
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({
+                'success': False,
+                'message': f'{IDEMPOTENCY_HEADER} 不能超过{MAX_KEY_LENGTH}个字符'
+            }), 400
+
+        user_id = int(get_jwt_identity())
+        fingerprint = _fingerprint()
+        stored = _responses.get((user_id, key))
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        now = datetime.utcnow()
+        record = IdempotencyKey.query.filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > now
+        ).first()
+        if record:
+            if record.fingerprint != fingerprint:
+                return _key_conflict()
+            if record.response_status is not None:
+                stored = (record.fingerprint, record.response_status, record.response_body, record.response_mimetype)
+                _responses.set((user_id, key), stored, (record.expires_at - now).total_seconds())
+                return _replay(stored, fingerprint)
+            if record.created_at > now - PENDING_TIMEOUT:
+                return _in_progress()
+            if record.applied_at is not None:
+                # 写入已提交、响应未保存：不能重新执行
+                return _already_applied()
+            # 首次请求所在进程在提交写入前异常退出，删除后重新执行
+            db.session.delete(record)
+            db.session.commit()
+
+        # 预留幂等键，顺带清理过期记录（expires_at 有索引）
+        ttl = current_app.config['IDEMPOTENCY_KEY_TTL_SECONDS']
+        IdempotencyKey.query.filter(IdempotencyKey.expires_at <= now).delete(synchronize_session=False)
+        record = IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            created_at=now,
+            expires_at=now + timedelta(seconds=ttl)
+        )
+        db.session.add(record)
+        try:
+            db.session.flush()
+            record_id = record.id
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return _in_progress()
+
+        db.session.info[_PENDING_RECORD] = record_id
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            if db.session.info.pop(_PENDING_RECORD, None) is not None:
+                _release(record_id)
+            raise
+        applied = db.session.info.pop(_PENDING_RECORD, None) is None
+        if response.status_code >= 500 or response.is_streamed:
+            # 已提交过写入的保留预留（重试时返回409），否则允许用同一个键重试
+            if not applied:
+                _release(record_id)
+            return response
+
+        stored = (fingerprint, response.status_code, response.get_data(as_text=True), response.mimetype)
+        db.session.execute(
+            IdempotencyKey.__table__.update().where(IdempotencyKey.id == record_id).values(
+                response_status=stored[1],
+                response_body=stored[2],
+                response_mimetype=stored[3]
+            )
+        )
+        db.session.commit()
+        _responses.set((user_id, key), stored, ttl)
+        return response
+    return wrapper
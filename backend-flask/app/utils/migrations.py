@@ -0,0 +1,276 @@
+import importlib.util
+import os
+import re
+import time
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models.migration import SchemaMigration
+
+# 版本化迁移脚本所在目录，文件名格式为 0001_说明.py
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'migrations', 'versions'
+)
+_VERSION_FILE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+class Migration:
+    """一个版本化迁移脚本
+
+    脚本需定义 upgrade(migration) 函数，参数为 MigrationContext；模块文档字符串的第一行作为说明。
+    每一步都必须可重复执行（列或索引已存在时跳过、回填只处理尚未填充的行），
+    中途失败后重新执行即可从失败处继续。
+    """
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        self._module = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            spec = importlib.util.spec_from_file_location(f'migrations_{self.version}_{self.name}', self.path)
+            self._module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(self._module)
+        return self._module
+
+    @property
+    def description(self):
+        return (self.module.__doc__ or self.name).strip().splitlines()[0]
+
+    def __repr__(self):
+        return f'<Migration {self.version}_{self.name}>'
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """按版本号顺序列出迁移脚本
+
+    Raises:
+        ValueError: 版本号重复
+    """
+    migrations = {}
+    for file_name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        match = _VERSION_FILE.match(file_name)
+        if not match:
+            continue
+        version, name = match.groups()
+        if version in migrations:
+            raise ValueError(f'迁移版本号重复: {version}')
+        migrations[version] = Migration(version, name, os.path.join(directory, file_name))
+    return [migrations[version] for version in sorted(migrations)]
+
+def applied_versions():
+    """已执行的迁移版本号集合"""
+    return {version for version, in db.session.query(SchemaMigration.version)}
+
+def pending_migrations(directory=MIGRATIONS_DIR):
+    """尚未执行的迁移，按版本号顺序"""
+    applied = applied_versions()
+    return [migration for migration in discover_migrations(directory) if migration.version not in applied]
+
+class MigrationContext:
+    """迁移脚本可用的操作
+
+    每个操作都在自己的短事务中执行并立即提交：结构变更各自一个事务，
+    回填按批提交并在批次之间暂停，使线上请求的写入不会被长时间挡住。
+    """
+
+    def __init__(self, batch_size=500, pause=0.05, dry_run=False, log=None):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.dry_run = dry_run
+        self.log = log or (lambda message: None)
+
+    def columns(self, table):
+        """表中已有的列名集合，表不存在时为空"""
+        with db.engine.connect() as connection:
+            return {row[1] for row in connection.execute(text(f'PRAGMA table_info("{table}")'))}
+
+    def index_exists(self, name):
+        with db.engine.connect() as connection:
+            return connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {'name': name}
+            ).first() is not None
+
+    def execute(self, sql, params=None):
+        """在单独的事务中执行一条语句"""
+        if self.dry_run:
+            self.log(f'将执行: {sql}')
+            return
+        with db.engine.begin() as connection:
+            connection.execute(text(sql), params or {})
+
+    def add_column(self, table, column, column_type):
+        """添加列（只改表结构，不改写已有行）；列已存在时跳过
+
+        新列不要带需要逐行计算的默认值，已有行的取值用 backfill 分批回填。
+        """
+        if column in self.columns(table):
+            self.log(f'{table}.{column} 列已存在，跳过')
+            return False
+        self.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {column_type}')
+        if not self.dry_run:
+            self.log(f'已添加 {table}.{column} 列')
+        return True
+
+    def create_index(self, name, table, columns, unique=False):
+        """创建索引；索引已存在时跳过
+
+        SQLite 建索引需要扫描整表并在此期间持有写锁，大表的索引请安排在访问量低的时段执行。
+        """
+        if self.index_exists(name):
+            self.log(f'索引 {name} 已存在，跳过')
+            return False
+        started = time.perf_counter()
+        self.execute(
+            f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{name}" ON "{table}" ({", ".join(columns)})'
+        )
+        if not self.dry_run:
+            self.log(f'已创建索引 {name}，耗时 {round((time.perf_counter() - started) * 1000)} ms')
+        return True
+
+    def table_sql(self, table):
+        """表的 CREATE TABLE 语句，表不存在时为 None"""
+        with db.engine.connect() as connection:
+            return connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table}
+            ).scalar()
+
+    def rebuild_table(self, table, create_sql):
+        """按新的 CREATE TABLE 语句重建表，保留全部数据、索引和触发器
+
+        SQLite 的 ALTER TABLE 不能修改主键等列定义，只能新建表、复制数据后替换旧表
+        （https://www.sqlite.org/lang_altertable.html#otheralter）。
+        create_sql 中的表名需为 table，列与旧表相同。整个过程在一个写事务中完成，
+        期间整表被锁住，大表请安排在访问量低的时段执行。
+        """
+        if self.dry_run:
+            self.log(f'将重建 {table} 表: {create_sql}')
+            return
+        started = time.perf_counter()
+        temp_table = f'{table}__rebuild'
+        connection = db.engine.raw_connection()
+        try:
+            sqlite_connection = connection.driver_connection
+            isolation_level = sqlite_connection.isolation_level
+            # 手动控制事务：sqlite3 模块默认在 DDL 语句前不开启事务，建表和删表会各自立即提交
+            sqlite_connection.isolation_level = None
+            try:
+                cursor = sqlite_connection.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                try:
+                    # 删除旧表会一并删除其索引和触发器，先记下定义，替换后重新创建
+                    dependents = [
+                        sql for sql, in cursor.execute(
+                            "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+                            "AND sql IS NOT NULL ORDER BY type, name", (table,)
+                        )
+                    ]
+                    columns = ', '.join(f'"{row[1]}"' for row in cursor.execute(f'PRAGMA table_info("{table}")'))
+                    cursor.execute(re.sub(
+                        rf'^\s*CREATE\s+TABLE\s+"?{re.escape(table)}"?', f'CREATE TABLE "{temp_table}"',
+                        create_sql, count=1, flags=re.IGNORECASE
+                    ))
+                    cursor.execute(f'INSERT INTO "{temp_table}" ({columns}) SELECT {columns} FROM "{table}"')
+                    cursor.execute(f'DROP TABLE "{table}"')
+                    cursor.execute(f'ALTER TABLE "{temp_table}" RENAME TO "{table}"')
+                    for sql in dependents:
+                        cursor.execute(sql)
+                    cursor.execute('COMMIT')
+                except Exception:
+                    cursor.execute('ROLLBACK')
+                    raise
+            finally:
+                sqlite_connection.isolation_level = isolation_level
+        finally:
+            connection.close()
+        self.log(f'已重建 {table} 表，耗时 {round((time.perf_counter() - started) * 1000)} ms')
+
+    def backfill(self, table, where, update=None, apply=None, params=None):
+        """分批回填 table 中满足 where 条件的行
+
+        按 rowid 顺序每次取 batch_size 行，在一个短事务中处理后提交，再暂停 pause 秒让出写锁。
+        update 为 SET 子句（如 "updated_at = created_at"）；需要逐行计算时改为传入
+        apply(connection, rowids)，在同一事务中处理这一批。
+        where 应只匹配尚未回填的行，这样中途失败后重新执行会跳过已完成的部分。
+
+        Returns:
+            处理的行数（dry_run 时为将处理的行数）
+        """
+        params = params or {}
+        if self.dry_run:
+            with db.engine.connect() as connection:
+                try:
+                    count = connection.execute(text(f'SELECT COUNT(*) FROM "{table}" WHERE {where}'), params).scalar()
+                except OperationalError:
+                    # 预览时前面步骤要添加的列还不存在，按整表估计
+                    connection.rollback()
+                    count = connection.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar()
+            self.log(f'{table} 将回填 {count} 行')
+            return count
+
+        total, last_rowid = 0, 0
+        while True:
+            with db.engine.begin() as connection:
+                rowids = [
+                    rowid for rowid, in connection.execute(
+                        text(f'SELECT rowid FROM "{table}" WHERE rowid > :last_rowid AND ({where}) '
+                             f'ORDER BY rowid LIMIT :batch_size'),
+                        {**params, 'last_rowid': last_rowid, 'batch_size': self.batch_size}
+                    )
+                ]
+                if not rowids:
+                    break
+                if apply:
+                    apply(connection, rowids)
+                else:
+                    connection.execute(
+                        text(f'UPDATE "{table}" SET {update} WHERE rowid IN ({", ".join(map(str, rowids))})'),
+                        params
+                    )
+            total += len(rowids)
+            last_rowid = rowids[-1]
+            if len(rowids) < self.batch_size:
+                break
+            if self.pause:
+                time.sleep(self.pause)
+        self.log(f'{table} 已回填 {total} 行')
+        return total
+
+def stamp_migrations(directory=MIGRATIONS_DIR):
+    """把全部迁移记为已执行而不实际执行，用于 create_all 直接建成最新结构的新数据库"""
+    for migration in pending_migrations(directory):
+        db.session.add(SchemaMigration(version=migration.version, name=migration.name, applied_at=datetime.utcnow()))
+    db.session.commit()
+
+def run_migrations(target=None, batch_size=500, pause=0.05, dry_run=False, directory=MIGRATIONS_DIR, log=None):
+    """按版本号顺序执行尚未执行的迁移，每个迁移完成后记录到 schema_migrations
+
+    Args:
+        target: 只执行到该版本号（含），默认执行全部
+        dry_run: 只打印将执行的操作和回填行数，不修改数据库
+
+    Returns:
+        执行的迁移列表 [{'version', 'name', 'elapsedMs'}]
+    """
+    log = log or (lambda message: None)
+    context = MigrationContext(batch_size=batch_size, pause=pause, dry_run=dry_run, log=log)
+    executed = []
+    for migration in pending_migrations(directory):
+        if target is not None and migration.version > target:
+            break
+        log(f'{"预览" if dry_run else "执行"}迁移 {migration.version}_{migration.name}: {migration.description}')
+        started = time.perf_counter()
+        migration.module.upgrade(context)
+        elapsed_ms = round((time.perf_counter() - started) * 1000)
+        if not dry_run:
+            db.session.add(SchemaMigration(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.utcnow(),
+                elapsed_ms=elapsed_ms
+            ))
+            db.session.commit()
+        executed.append({'version': migration.version, 'name': migration.name, 'elapsedMs': elapsed_ms})
+    return executed
@@ -0,0 +1,176 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import numpy as np
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+FILL_RATE_PERCENTILES = [25, 50, 75, 90]
+# 预约距课程发布的小时数分桶（最后一档为一周以上）
+VELOCITY_BUCKETS = [0, 1, 6, 24, 72, 168, np.inf]
+
+def _round(value, digits=4):
+    """numpy标量转为可序列化的数值，NaN 转为 None"""
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+def _percentiles(values, percentiles):
+    if values.size == 0:
+        return {f'p{p}': None for p in percentiles}
+    return {f'p{p}': _round(v, 2) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+
+def _group_mean(inverse, values, size):
+    """按分组下标求和、计数和均值，空分组的均值为 NaN"""
+    counts = np.bincount(inverse, minlength=size)
+    sums = np.bincount(inverse, weights=values, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    return means, counts
+
+def _slot_start_minutes(time_slot):
+    """'18:00-19:30' -> 1080，无法解析时返回0"""
+    try:
+        hours, minutes = time_slot.split('-')[0].strip().split(':')
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return 0
+
+def _local_to_utc(local_times, timezone):
+    """把 timezone 的本地时间（不带时区的 datetime64[s]）换算为UTC，夏令时按各自时刻的偏移"""
+    tz = ZoneInfo(timezone)
+    unique_times, inverse = np.unique(local_times, return_inverse=True)
+    offsets = np.array(
+        [tz.utcoffset(time.astype(datetime)).total_seconds() for time in unique_times], dtype=np.int64
+    )
+    return local_times - offsets[inverse].astype('timedelta64[s]')
+
+def compute_occupancy_stats(courses, bookings, timezone):
+    """用向量化运算计算课程满员率和预约速度统计
+
+    Args:
+        courses: [(课程ID, 舞种, 课程日期, 时间段, 容量, 创建时间), ...]，创建时间为UTC
+        bookings: [(课程ID, 预约时间), ...]，只含有效预订，预约时间为UTC
+        timezone: 课程日期和时间段所在的时区（CALENDAR_TIMEZONE），上课时间换算为UTC后再与预约时间相减
+
+    Returns:
+        可直接序列化为JSON的统计结果
+    """
+    courses_columns = list(zip(*courses)) or [()] * 6
+    course_ids = np.array(courses_columns[0], dtype=np.int64)
+    dance_types = np.array([dance_type or 'public' for dance_type in courses_columns[1]], dtype=object)
+    course_dates = np.array(courses_columns[2], dtype='datetime64[D]')
+    time_slots = np.array(courses_columns[3], dtype=object)
+    capacities = np.array(courses_columns[4], dtype=np.float64)
+    course_created = np.array(courses_columns[5], dtype='datetime64[s]')
+    n = course_ids.size
+
+    # 预订映射到课程下标（课程ID排序后二分查找），丢弃不在范围内的课程的预订
+    order = np.argsort(course_ids)
+    sorted_ids = course_ids[order]
+    booking_course_ids = np.array([course_id for course_id, _ in bookings], dtype=np.int64)
+    booking_times = np.array([created_at for _, created_at in bookings], dtype='datetime64[s]')
+    positions = np.searchsorted(sorted_ids, booking_course_ids)
+    positions = np.minimum(positions, n - 1) if n else positions
+    matched = sorted_ids[positions] == booking_course_ids if n else np.zeros(positions.size, dtype=bool)
+    booking_index = order[positions[matched]]
+    booking_times = booking_times[matched]
+
+    booked = np.bincount(booking_index, minlength=n).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fill_rates = np.where(capacities > 0, booked / capacities, np.nan)
+    valid = ~np.isnan(fill_rates)
+
+    # 满员率分布
+    histogram_counts, histogram_edges = np.histogram(np.clip(fill_rates[valid], 0, 1), bins=10, range=(0, 1))
+    fill_rate = {
+        'mean': _round(fill_rates[valid].mean()) if valid.any() else None,
+        'percentiles': _percentiles(fill_rates[valid], FILL_RATE_PERCENTILES),
+        'histogram': {
+            'bins': [_round(edge, 2) for edge in histogram_edges],
+            'counts': histogram_counts.tolist()
+        }
+    }
+
+    # 按舞种
+    dance_keys, dance_inverse = np.unique(dance_types, return_inverse=True)
+    dance_means, dance_counts = _group_mean(dance_inverse[valid], fill_rates[valid], dance_keys.size)
+    dance_bookings = np.bincount(dance_inverse, weights=booked, minlength=dance_keys.size)
+    by_dance_type = [
+        {
+            'danceType': dance_keys[i],
+            'courseCount': int(dance_counts[i]),
+            'bookingCount': int(dance_bookings[i]),
+            'avgFillRate': _round(dance_means[i])
+        }
+        for i in range(dance_keys.size)
+    ]
+
+    # 星期 × 时间段热力图
+    weekdays = ((course_dates.astype(np.int64) + 3) % 7).astype(np.int64)  # 1970-01-01 是周四
+    slot_keys, slot_inverse = np.unique(time_slots, return_inverse=True)
+    cells = weekdays * slot_keys.size + slot_inverse
+    cell_means, cell_counts = _group_mean(cells[valid], fill_rates[valid], 7 * slot_keys.size)
+    heatmap = {
+        'weekdays': WEEKDAY_NAMES,
+        'timeSlots': slot_keys.tolist(),
+        'avgFillRate': [[_round(v) for v in row] for row in cell_means.reshape(7, slot_keys.size)],
+        'courseCount': cell_counts.reshape(7, slot_keys.size).tolist()
+    }
+
+    # 按周的舞种满员率趋势
+    week_starts = course_dates - weekdays.astype('timedelta64[D]')
+    week_keys, week_inverse = np.unique(week_starts, return_inverse=True)
+    trend_cells = dance_inverse * week_keys.size + week_inverse
+    trend_means, _ = _group_mean(trend_cells[valid], fill_rates[valid], dance_keys.size * week_keys.size)
+    trend_means = trend_means.reshape(dance_keys.size, week_keys.size)
+    trend = {
+        'weeks': [str(week) for week in week_keys],
+        'series': {dance_keys[i]: [_round(v) for v in trend_means[i]] for i in range(dance_keys.size)}
+    }
+
+    # 预约速度：预约距课程发布的小时数、距上课的提前小时数、满员所需小时数
+    hours_after_created = np.maximum(
+        (booking_times - course_created[booking_index]).astype(np.float64) / 3600, 0
+    )
+    slot_minutes = np.array([_slot_start_minutes(slot) for slot in slot_keys], dtype=np.int64)
+    course_starts = _local_to_utc(
+        course_dates.astype('datetime64[s]') + (slot_minutes[slot_inverse] * 60).astype('timedelta64[s]'),
+        timezone
+    )
+    lead_hours = (course_starts[booking_index] - booking_times).astype(np.float64) / 3600
+
+    velocity_counts, _ = np.histogram(hours_after_created, bins=VELOCITY_BUCKETS)
+
+    # 按（课程, 预约时间）排序后，每门课第 capacity 个预订的时间即满员时间
+    sort_order = np.lexsort((booking_times, booking_index))
+    sorted_index = booking_index[sort_order]
+    group_starts = np.searchsorted(sorted_index, sorted_index, side='left')
+    ranks = np.arange(sorted_index.size) - group_starts
+    filling = ranks == capacities[sorted_index] - 1
+    time_to_fill = hours_after_created[sort_order][filling]
+
+    velocity = {
+        'hoursAfterCreated': {
+            'percentiles': _percentiles(hours_after_created, [25, 50, 75, 90]),
+            'histogram': {
+                'bins': [0, 1, 6, 24, 72, 168, None],
+                'counts': velocity_counts.tolist()
+            }
+        },
+        'leadHoursBeforeStart': {
+            'percentiles': _percentiles(lead_hours, [10, 25, 50, 75])
+        },
+        'timeToFill': {
+            'fullCourseCount': int(time_to_fill.size),
+            'percentiles': _percentiles(time_to_fill, [50, 90])
+        }
+    }
+
+    return {
+        'courseCount': int(n),
+        'bookingCount': int(booking_index.size),
+        'fillRate': fill_rate,
+        'byDanceType': by_dance_type,
+        'heatmap': heatmap,
+        'trend': trend,
+        'velocity': velocity
+    }
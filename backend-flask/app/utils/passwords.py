@@ -0,0 +1,202 @@
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import bcrypt
+from flask import current_app, jsonify
+
+# 少于这个数量时直接在当前进程哈希，启动进程池的开销比哈希本身还大
+PARALLEL_HASH_MIN_PASSWORDS = 8
+# bcrypt 允许的最大 cost
+MAX_BCRYPT_ROUNDS = 31
+# 测定 cost 时实际计时的 cost，更高的 cost 按每加1耗时翻倍推算
+BENCHMARK_ROUNDS = 8
+
+_HASH_ROUNDS_PATTERN = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+class PasswordHasherBusy(Exception):
+    """等待哈希的请求超过队列上限"""
+
+def hash_password(password, rounds):
+    """生成 bcrypt 密码哈希（$2b$ 格式，与之前 Flask-Bcrypt 生成的哈希相同）"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def hash_passwords(passwords, rounds, max_workers=None):
+    """在进程池中批量哈希密码（命令行导入用），按输入顺序返回
+
+    bcrypt 是纯CPU计算，在进程池中分摊到所有CPU核心。子进程优先用 fork 启动：
+    spawn 会在每个子进程重新导入入口模块（run.py 在导入时就会创建应用），启动开销比哈希还大；
+    子进程只调用 bcrypt，不会用到从父进程继承的数据库连接和锁。
+    fork 只适合单线程的进程（命令行）；web worker 里已经有其他线程在运行，fork 出的子进程
+    可能继承被其他线程持有的锁，web worker 中请改用 PasswordHasher.hash_many。
+
+    Args:
+        rounds: bcrypt 的 cost（log rounds）
+        max_workers: 进程数，默认为CPU核心数
+    """
+    passwords = list(passwords)
+    workers = min(max_workers or os.cpu_count() or 1, len(passwords))
+    if workers <= 1 or len(passwords) < PARALLEL_HASH_MIN_PASSWORDS:
+        return [hash_password(password, rounds) for password in passwords]
+
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method)) as executor:
+        return list(executor.map(
+            hash_password, passwords, [rounds] * len(passwords),
+            chunksize=max(len(passwords) // (workers * 4), 1)
+        ))
+
+def check_password(password_hash, password):
+    """校验密码，哈希格式无效时返回 False"""
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        return False
+
+def get_hash_rounds(password_hash):
+    """从 bcrypt 哈希中读出 cost，格式无法识别时返回 None"""
+    match = _HASH_ROUNDS_PATTERN.match(password_hash or '')
+    return int(match.group(1)) if match else None
+
+def time_hash(rounds, samples=1):
+    """实测指定 cost 的一次哈希耗时（毫秒，取多次中最快的一次）"""
+    best = None
+    for _ in range(samples):
+        started = time.perf_counter()
+        hash_password('benchmark-password', rounds)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def benchmark_rounds(target_ms, min_rounds=10, max_rounds=MAX_BCRYPT_ROUNDS):
+    """测定单次哈希耗时不超过 target_ms 的最大 cost
+
+    只实测 BENCHMARK_ROUNDS 的耗时（几毫秒），cost 每加1耗时翻倍，据此推算。
+    机器太慢、min_rounds 也超出目标耗时时仍返回 min_rounds，安全性优先。
+    """
+    elapsed = time_hash(BENCHMARK_ROUNDS, samples=3)
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed * 2 ** (rounds + 1 - BENCHMARK_ROUNDS) <= target_ms:
+        rounds += 1
+    return rounds
+
+class PasswordHasher:
+    """在有界线程池中执行 bcrypt 的密码哈希器（首次使用时根据应用配置创建线程池）
+
+    bcrypt 计算时会释放GIL，放到线程池执行后，同时进行的哈希数量不超过线程数（默认为CPU核心数），
+    登录高峰时多出来的请求排队等待；排队的请求超过 PASSWORD_HASH_MAX_QUEUE 时直接抛出
+    PasswordHasherBusy，由接口返回503，避免所有worker线程都堆积在哈希上。
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._workers = 0
+        self._pending = 0
+        self._benchmarked = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _configured_workers(config):
+        return config['PASSWORD_HASH_WORKERS'] or os.cpu_count() or 1
+
+    def _get_executor(self, config):
+        workers = self._configured_workers(config)
+        with self._lock:
+            if self._executor is None or workers != self._workers:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+                self._workers = workers
+            return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, func, *args, reject_when_full=True):
+        config = current_app.config
+        executor = self._get_executor(config)
+        with self._lock:
+            if reject_when_full and self._pending >= self._workers + config['PASSWORD_HASH_MAX_QUEUE']:
+                raise PasswordHasherBusy('密码校验请求过多')
+            self._pending += 1
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, func, *args):
+        return self._submit(func, *args).result()
+
+    def hash_many(self, passwords, rounds, max_in_flight=None):
+        """批量哈希密码（后台导入用户），与登录共用同一个线程池，按输入顺序返回
+
+        同时提交到线程池的导入哈希不超过 max_in_flight 个（默认为线程数的一半，至少1个），
+        其余线程留给登录；登录请求在队列中最多排在 max_in_flight 个导入哈希之后。
+        导入的哈希计入排队数，导入进行时登录更早触发 PasswordHasherBusy，
+        导入自身不会被拒绝，队列满时只是等待前面的哈希完成。
+        """
+        workers = self._configured_workers(current_app.config)
+        limit = min(max_in_flight or max(workers // 2, 1), workers)
+        results = []
+        in_flight = deque()
+        for password in passwords:
+            if len(in_flight) >= limit:
+                results.append(in_flight.popleft().result())
+            in_flight.append(self._submit(hash_password, password, rounds, reject_when_full=False))
+        results.extend(future.result() for future in in_flight)
+        return results
+
+    def rounds(self):
+        """当前策略的 bcrypt cost
+
+        BCRYPT_LOG_ROUNDS 为 auto 时按 PASSWORD_HASH_TARGET_MS 测定，同一进程只测一次。
+        每个worker各自测定，处在翻倍边界附近或测定时机器繁忙，各worker得到的 cost 可能不同，
+        生产环境应用 manage.py benchmark-passwords --write 测定一次并写入 .env。
+        """
+        config = current_app.config
+        setting = config['BCRYPT_LOG_ROUNDS']
+        if str(setting).lower() != 'auto':
+            return int(setting)
+        key = (config['PASSWORD_HASH_TARGET_MS'], config['PASSWORD_HASH_MIN_ROUNDS'])
+        if key not in self._benchmarked:
+            self._benchmarked[key] = benchmark_rounds(*key)
+            current_app.logger.warning(
+                f"bcrypt cost 测定为 {self._benchmarked[key]}（目标耗时 {key[0]}ms），各进程的测定结果可能不同，"
+                f"建议执行 python manage.py benchmark-passwords --write 固定该值"
+            )
+        return self._benchmarked[key]
+
+    def hash(self, password):
+        """按当前策略的 cost 哈希密码"""
+        return self._run(hash_password, password, self.rounds())
+
+    def verify(self, password_hash, password):
+        return self._run(check_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """存储的哈希 cost 低于当前策略时需要重新哈希
+
+        只升不降：cost 调低（或 auto 在某个worker上测得较低）时不会把已有的哈希改弱，
+        不同worker的 cost 不一致时也不会在每次登录时来回重新哈希。
+        """
+        rounds = get_hash_rounds(password_hash)
+        return rounds is None or rounds < self.rounds()
+
+password_hasher = PasswordHasher()
+
+def password_hasher_busy():
+    """503 响应：密码校验排队已满，让客户端稍后重试"""
+    response = jsonify({
+        'success': False,
+        'message': '服务器繁忙，请稍后重试'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
@@ -0,0 +1,182 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, jsonify, request
+
+def parse_rate(rate):
+    """'10/300' -> (容量10, 每秒补充 10/300 个令牌)，即最多连续10次，300秒内补满"""
+    capacity, _, period = str(rate).partition('/')
+    capacity, period = float(capacity), float(period)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f'无效的限流配置: {rate}')
+    return capacity, capacity / period
+
+def _refill(tokens, updated_at, now, capacity, refill_rate):
+    return min(capacity, tokens + max(now - updated_at, 0) * refill_rate)
+
+def _take(tokens, capacity, refill_rate, cost):
+    """从令牌数中扣除 cost，返回 (是否允许, 扣除后的令牌数, 需等待的秒数)
+
+    cost 为 0 时只检查是否还有令牌，不扣除。
+    """
+    needed = max(cost, 1)
+    if tokens >= needed:
+        return True, tokens - cost, 0
+    return False, tokens, (needed - tokens) / refill_rate
+
+class MemoryRateLimitBackend:
+    """进程内令牌桶，多进程部署时每个worker各算各的（总限额约为配置的worker数倍）"""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, now, capacity, refill_rate)
+            allowed, tokens, retry_after = _take(tokens, capacity, refill_rate, cost)
+            if tokens < capacity:
+                if len(self._buckets) >= self.maxsize:
+                    # 容量已满时淘汰最久未访问的桶（字典保持插入顺序，访问时重新插入）
+                    self._buckets.pop(next(iter(self._buckets)))
+                self._buckets[key] = (tokens, now)
+            return allowed, retry_after
+
+class SQLiteRateLimitBackend:
+    """基于独立 SQLite 文件的共享令牌桶，同一台机器上的所有worker共用
+
+    使用单独的数据库文件（WAL 模式），不占用业务库的写锁。每次检查在一个 IMMEDIATE 事务中
+    读取、补充并写回令牌数，多个进程并发访问同一个桶时结果仍然正确。
+    """
+
+    # 每处理这么多次请求清理一次已补满的桶
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit_buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, full_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_full_at ON rate_limit_buckets (full_at)')
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, capacity, refill_rate, cost=1):
+        # 多个进程共享，使用墙上时间
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens = _refill(*row, now, capacity, refill_rate) if row else capacity
+            allowed, tokens, retry_after = _take(tokens, capacity, refill_rate, cost)
+            if row or tokens < capacity:
+                connection.execute(
+                    'INSERT INTO rate_limit_buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, '
+                    'updated_at = excluded.updated_at, full_at = excluded.full_at',
+                    (key, tokens, now, now + (capacity - tokens) / refill_rate)
+                )
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                # 已经补满的桶与不存在等价
+                connection.execute('DELETE FROM rate_limit_buckets WHERE full_at <= ?', (now,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+class RateLimiter:
+    """按配置选择后端的令牌桶限流器（首次使用时根据应用配置创建后端）"""
+
+    def __init__(self):
+        self._backend = None
+        self._backend_config = None
+        self._lock = threading.Lock()
+
+    def _get_backend(self, config):
+        backend_config = (config['RATE_LIMIT_BACKEND'], config['RATE_LIMIT_SQLITE_PATH'])
+        with self._lock:
+            if self._backend is None or backend_config != self._backend_config:
+                if backend_config[0] == 'sqlite':
+                    self._backend = SQLiteRateLimitBackend(backend_config[1])
+                elif backend_config[0] == 'memory':
+                    self._backend = MemoryRateLimitBackend()
+                else:
+                    raise ValueError(f'未知的限流后端: {backend_config[0]}')
+                self._backend_config = backend_config
+            return self._backend
+
+    def consume(self, rule, identifier, cost=1):
+        """对规则 rule（配置项 RATE_LIMIT_<RULE>）下的 identifier 扣除令牌
+
+        Returns:
+            (是否允许, 需等待的秒数)
+        """
+        config = current_app.config
+        if not config['RATE_LIMIT_ENABLED'] or identifier is None:
+            return True, 0
+        capacity, refill_rate = parse_rate(config[f'RATE_LIMIT_{rule.upper()}'])
+        backend = self._get_backend(config)
+        try:
+            return backend.consume(f'{rule}:{identifier}', capacity, refill_rate, cost)
+        except sqlite3.Error as e:
+            # 限流存储不可用时放行，避免因此无法登录
+            current_app.logger.warning(f"限流检查失败: {str(e)}")
+            return True, 0
+
+rate_limiter = RateLimiter()
+
+def client_ip():
+    """客户端IP；部署在反向代理之后时需开启 RATE_LIMIT_TRUST_PROXY，取 X-Forwarded-For 的第一个地址"""
+    if current_app.config['RATE_LIMIT_TRUST_PROXY'] and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr
+
+def too_many_requests(retry_after):
+    """429 响应，带 Retry-After 头（秒）"""
+    seconds = max(int(math.ceil(retry_after)), 1)
+    response = jsonify({
+        'success': False,
+        'message': f'请求过于频繁，请在{seconds}秒后重试'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+def check_rate_limits(*checks):
+    """依次检查多个限流规则，任一规则被限流时返回429响应，否则返回 None
+
+    Args:
+        checks: (规则名, 标识) 或 (规则名, 标识, cost)，cost 为 0 表示只检查不扣除
+    """
+    retry_after = 0
+    for check in checks:
+        rule, identifier, cost = check if len(check) == 3 else (*check, 1)
+        allowed, wait = rate_limiter.consume(rule, identifier, cost)
+        if not allowed:
+            retry_after = max(retry_after, wait)
+    if retry_after:
+        return too_many_requests(retry_after)
+    return None
@@ -0,0 +1,167 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import numpy as np
+from app import db
+from app.models.course import Course, Booking
+from app.models.sync import SyncSequence
+from app.models.archive import ArchivedBooking
+
+class RecommendationIndex:
+    """基于预约共现的课程推荐索引（进程内）
+
+    同名同舞种的课程视为一个系列。用有效预订构建 用户 × 系列 的0/1矩阵 M，
+    系列间的余弦相似度 S = MᵀM / sqrt(n_i·n_j)，用户对系列的得分为 M·S
+    （对角线为1，用户常上的系列的后续课程也会排在前面）。
+    对即将开始且有空位的课程按所属系列取得分，为每个用户预先算好前 top_k 门（排除已预约的），
+    得分不足 top_k 时用热门课程补足。查询时只是一次字典查找。
+
+    每隔 refresh_interval 秒检查一次同步序号，课程或预订有变化（或跨天）时整体重建。
+    只有进程内第一次使用时在请求中构建；之后的重建在后台线程中进行，完成前继续使用旧的索引。
+    """
+
+    def __init__(self):
+        # (用户推荐, 热门课程, 课程摘要)，整体替换，读取时无需加锁
+        self._state = ({}, [], {})
+        self._built_key = None
+        self._checked_at = None
+        self._executor = None
+        self._refreshing = None
+        self._lock = threading.Lock()
+
+    def ensure_fresh(self, app, refresh_interval, top_k, horizon_days):
+        """按需重建索引，返回后台重建的 Future（没有启动重建时为 None）
+
+        进程内还没有索引时在当前请求中构建（需在应用上下文中调用）；
+        已有索引且超过 refresh_interval 秒未检查时，在后台线程中检查并重建，本次请求直接使用旧的索引。
+        """
+        if self._built_key is None:
+            with self._lock:
+                if self._built_key is None:
+                    self._refresh(top_k, horizon_days)
+            return None
+        if time.monotonic() - self._checked_at < refresh_interval:
+            return None
+        with self._lock:
+            if self._refreshing is not None or time.monotonic() - self._checked_at < refresh_interval:
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recommendations')
+            self._refreshing = self._executor.submit(self._refresh_in_background, app, top_k, horizon_days)
+            return self._refreshing
+
+    def _refresh(self, top_k, horizon_days):
+        # 数据有变化或跨天（即将开始的课程范围变化）时重建
+        built_key = (SyncSequence.current_value(), date.today())
+        if built_key != self._built_key:
+            self._build(top_k, horizon_days)
+            self._built_key = built_key
+        self._checked_at = time.monotonic()
+
+    def _refresh_in_background(self, app, top_k, horizon_days):
+        with app.app_context():
+            try:
+                self._refresh(top_k, horizon_days)
+            except Exception as e:
+                # 重建失败时继续使用旧的索引，下一个检查周期再试
+                self._checked_at = time.monotonic()
+                app.logger.warning(f"重建推荐索引失败: {str(e)}")
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._refreshing = None
+
+    def _build(self, top_k, horizon_days):
+        today = date.today()
+
+        # 即将开始且有空位的课程
+        upcoming = [
+            (course, booked, held)
+            for course, booked, held in Course.get_courses_with_seat_counts(today, today + timedelta(days=horizon_days))
+            if course.max_capacity - booked - held > 0
+        ]
+        courses = {course.id: course.to_summary_dict(booked, held) for course, booked, held in upcoming}
+
+        rows = db.session.query(Booking.user_id, Booking.course_id, Course.name, Course.dance_type).join(
+            Course, Course.id == Booking.course_id
+        ).filter(Booking.status == 'confirmed').all()
+        # 已归档的往期预订同样反映用户的偏好；这些课程早已结束，不会出现在即将开始的课程中，无需参与排除已预约课程
+        rows += [
+            (user_id, None, name, dance_type)
+            for user_id, name, dance_type in db.session.query(
+                ArchivedBooking.user_id, ArchivedBooking.course_name, ArchivedBooking.dance_type
+            ).filter(ArchivedBooking.status == 'confirmed')
+        ]
+
+        # 系列编号：历史预订和即将开始的课程共用一套
+        series_ids = {}
+        for _, _, name, dance_type in rows:
+            series_ids.setdefault((name, dance_type), len(series_ids))
+        for course, _, _ in upcoming:
+            series_ids.setdefault((course.name, course.dance_type), len(series_ids))
+
+        user_ids = sorted({user_id for user_id, _, _, _ in rows})
+        user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+        n_users, n_series = len(user_ids), len(series_ids)
+
+        matrix = np.zeros((n_users, n_series), dtype=np.float32)
+        if rows:
+            matrix[
+                np.array([user_index[user_id] for user_id, _, _, _ in rows]),
+                np.array([series_ids[(name, dance_type)] for _, _, name, dance_type in rows])
+            ] = 1
+
+        counts = matrix.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            similarity = (matrix.T @ matrix) / np.sqrt(np.outer(counts, counts))
+        similarity = np.nan_to_num(similarity, nan=0.0, posinf=0.0)
+        series_scores = matrix @ similarity
+
+        upcoming_ids = np.array([course.id for course, _, _ in upcoming], dtype=np.int64)
+        upcoming_series = np.array([series_ids[(course.name, course.dance_type)] for course, _, _ in upcoming], dtype=np.int64)
+        scores = series_scores[:, upcoming_series]
+
+        # 排除用户已预约的课程
+        upcoming_position = {course_id: i for i, course_id in enumerate(upcoming_ids.tolist())}
+        booked_pairs = [
+            (user_index[user_id], upcoming_position[course_id])
+            for user_id, course_id, _, _ in rows if course_id in upcoming_position
+        ]
+        if booked_pairs:
+            booked_users, booked_courses = zip(*booked_pairs)
+            scores[list(booked_users), list(booked_courses)] = -np.inf
+
+        # 热门课程：按所属系列的预约人数和日期排序，用于补足和未预约过的用户
+        popularity = counts[upcoming_series] if upcoming_series.size else np.zeros(0)
+        popular_order = np.lexsort((np.arange(upcoming_ids.size), -popularity))
+        popular = upcoming_ids[popular_order].tolist()
+
+        k = min(top_k, upcoming_ids.size)
+        by_user = {}
+        if k:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if n_users else np.zeros((0, k), dtype=np.int64)
+            for i, user_id in enumerate(user_ids):
+                candidates = top[i][np.argsort(-scores[i, top[i]], kind='stable')]
+                ranked = [
+                    (int(upcoming_ids[j]), round(float(scores[i, j]), 4))
+                    for j in candidates if scores[i, j] > 0
+                ]
+                chosen = {course_id for course_id, _ in ranked}
+                excluded = set(upcoming_ids[np.isneginf(scores[i])].tolist())
+                for course_id in popular:
+                    if len(ranked) >= k:
+                        break
+                    if course_id not in chosen and course_id not in excluded:
+                        ranked.append((course_id, 0.0))
+                by_user[user_id] = ranked
+
+        self._state = (by_user, [(course_id, 0.0) for course_id in popular[:top_k]], courses)
+
+    def recommend(self, user_id, limit):
+        """返回用户的推荐课程 [(课程摘要字典, 得分), ...]，得分为0表示按热门程度补足"""
+        by_user, popular, courses = self._state
+        ranked = by_user.get(user_id, popular)
+        return [(courses[course_id], score) for course_id, score in ranked[:limit]]
+
+recommendation_index = RecommendationIndex()
@@ -0,0 +1,155 @@
+import threading
+from datetime import timedelta
+from app import db
+from app.models.course import Course
+from app.models.sync import SyncSequence
+from app.models.archive import ArchiveRun
+
+MINUTES_PER_DAY = 24 * 60
+
+def parse_time_slot(time_slot):
+    """'18:00-19:30' -> (1080, 1170)，格式无效时返回 None"""
+    try:
+        start_str, end_str = time_slot.split('-')
+        start_hours, start_minutes = start_str.strip().split(':')
+        end_hours, end_minutes = end_str.strip().split(':')
+        start = int(start_hours) * 60 + int(start_minutes)
+        end = int(end_hours) * 60 + int(end_minutes)
+    except (ValueError, AttributeError):
+        return None
+    if not 0 <= start < end <= MINUTES_PER_DAY:
+        return None
+    return start, end
+
+def format_minutes(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+class RoomAvailabilityIndex:
+    """进程内的场地占用位图：{(地点, 日期): 位图}
+
+    每天按 slot_minutes 分格，第 i 位为 1 表示第 i 格被课程占用（课程覆盖到的格子都算占用），
+    一天只是一个 Python 整数，求空闲区间只需要位运算。
+    首次使用时载入全部课程，之后每次读取前按课程的同步序号（change_seq）增量应用
+    所有worker写入的课程变化，通常是一次空结果的索引查询。
+    """
+
+    def __init__(self, slot_minutes=15):
+        self.slot_minutes = slot_minutes
+        self._day_masks = {}
+        self._day_courses = {}
+        self._course_keys = {}
+        self._last_seq = None
+        self._lock = threading.Lock()
+
+    def slot_mask(self, start, end):
+        """分钟区间 [start, end) 覆盖的格子位图"""
+        first = start // self.slot_minutes
+        last = -(-end // self.slot_minutes)
+        return ((1 << (last - first)) - 1) << first
+
+    def _course_mask(self, time_slot):
+        minutes = parse_time_slot(time_slot)
+        if minutes is None:
+            # 时间格式无效的课程按占用全天处理，与冲突检查保持一致
+            return self.slot_mask(0, MINUTES_PER_DAY)
+        return self.slot_mask(*minutes)
+
+    def _remove(self, course_id):
+        key = self._course_keys.pop(course_id, None)
+        if key is None:
+            return
+        courses = self._day_courses[key]
+        courses.pop(course_id, None)
+        if courses:
+            mask = 0
+            for course_mask in courses.values():
+                mask |= course_mask
+            self._day_masks[key] = mask
+        else:
+            del self._day_courses[key]
+            del self._day_masks[key]
+
+    def _set(self, course_id, location, course_date, time_slot):
+        self._remove(course_id)
+        key = (location, course_date)
+        mask = self._course_mask(time_slot)
+        self._course_keys[course_id] = key
+        self._day_courses.setdefault(key, {})[course_id] = mask
+        self._day_masks[key] = self._day_masks.get(key, 0) | mask
+
+    def _reload(self):
+        # 先读序号再读课程：之后提交的变化会被重复应用，重复应用无害
+        self._last_seq = SyncSequence.current_value()
+        self._day_masks = {}
+        self._day_courses = {}
+        self._course_keys = {}
+        rows = db.session.query(Course.id, Course.location, Course.course_date, Course.time_slot)
+        for course_id, location, course_date, time_slot in rows:
+            self._set(course_id, location, course_date, time_slot)
+
+    def sync(self, slot_minutes):
+        """把本进程的位图同步到最新状态（需在应用上下文中调用）"""
+        with self._lock:
+            # 归档会直接删除课程而不留墓碑，之后发生过归档时整体重新载入
+            if (self._last_seq is None or slot_minutes != self.slot_minutes
+                    or ArchiveRun.current_sync_horizon() > self._last_seq):
+                self.slot_minutes = slot_minutes
+                self._reload()
+                return
+
+            rows = db.session.query(
+                Course.id, Course.location, Course.course_date, Course.time_slot,
+                Course.deleted_at, Course.change_seq
+            ).filter(
+                Course.change_seq > self._last_seq
+            ).order_by(Course.change_seq).execution_options(include_deleted=True)
+            for course_id, location, course_date, time_slot, deleted_at, change_seq in rows:
+                if deleted_at:
+                    self._remove(course_id)
+                else:
+                    self._set(course_id, location, course_date, time_slot)
+                self._last_seq = change_seq
+
+    def locations(self):
+        """位图中出现过的所有地点"""
+        with self._lock:
+            return sorted({location for location, _ in self._day_masks})
+
+    def free_intervals(self, locations, start_date, end_date, min_minutes, day_start, day_end):
+        """计算各地点在日期范围内（含两端）每天的空闲区间
+
+        Args:
+            locations: 地点列表
+            min_minutes: 最短空闲时长（分钟）
+            day_start, day_end: 每天可排课的时间窗口（分钟）
+
+        Returns:
+            {地点: [(日期, [(开始分钟, 结束分钟), ...]), ...]}
+        """
+        # 时间窗口向内取整到格子边界，保证返回的区间确实空闲
+        first = -(-day_start // self.slot_minutes)
+        last = day_end // self.slot_minutes
+        window = ((1 << max(last - first, 0)) - 1) << first
+        min_slots = max(-(-min_minutes // self.slot_minutes), 1)
+
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        result = {}
+        with self._lock:
+            for location in locations:
+                location_days = []
+                for day in days:
+                    free = window & ~self._day_masks.get((location, day), 0)
+                    intervals = []
+                    while free:
+                        # 最低位的连续1即一段空闲区间
+                        start = (free & -free).bit_length() - 1
+                        run = free >> start
+                        length = ((run + 1) & ~run).bit_length() - 1
+                        if length >= min_slots:
+                            intervals.append((start * self.slot_minutes, (start + length) * self.slot_minutes))
+                        free &= ~(((1 << length) - 1) << start)
+                    location_days.append((day, intervals))
+                result[location] = location_days
+        return result
+
+room_index = RoomAvailabilityIndex()
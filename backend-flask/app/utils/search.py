@@ -0,0 +1,188 @@
+import sqlite3
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models.course import Course
+from app.models.user import User
+
+# 外部内容FTS5表（trigram分词，支持中文子串）：索引只保存分词结果，原文仍在 users / courses 表中，由触发器保持同步
+SEARCH_TABLES = {
+    'users_fts': {
+        'source': 'users',
+        'columns': ['username', 'name', 'email'],
+        # bm25 列权重：用户名和姓名比邮箱更重要
+        'weights': [10.0, 8.0, 2.0]
+    },
+    'courses_fts': {
+        'source': 'courses',
+        'columns': ['name', 'instructor', 'location', 'description'],
+        'weights': [10.0, 5.0, 3.0, 1.0]
+    }
+}
+
+# FTS5 分词器；SQLite 3.34 之前没有 trigram，或编译时未启用 FTS5 时，搜索退化为 LIKE 模糊匹配
+TOKENIZER = 'trigram'
+
+# 各数据库能否使用全文索引，按数据库URL缓存
+_fts_available = {}
+
+def _ddl(fts_table, source, columns):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    return {
+        'table': f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+                 f"{column_list}, content='{source}', content_rowid='id', "
+                 f"tokenize='{TOKENIZER}')",
+        'triggers': {
+            f'{fts_table}_ai': f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {source} BEGIN "
+                               f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+            f'{fts_table}_ad': f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {source} BEGIN "
+                               f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) "
+                               f"VALUES ('delete', old.id, {old_values}); END",
+            f'{fts_table}_au': f"CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {column_list} ON {source} BEGIN "
+                               f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) "
+                               f"VALUES ('delete', old.id, {old_values}); "
+                               f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        }
+    }
+
+def _tokenizer_supported():
+    """用临时表试建一次 FTS5 索引，判断当前 SQLite 是否支持所需的分词器"""
+    with db.engine.connect() as connection:
+        try:
+            connection.execute(text(f"CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='{TOKENIZER}')"))
+        except OperationalError:
+            return False
+        connection.execute(text("DROP TABLE temp.fts_probe"))
+        return True
+
+def fts_enabled():
+    """当前数据库能否使用全文索引（SQLite 且支持 FTS5 trigram 分词器），不能时搜索全部走 LIKE 模糊匹配"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    url = str(db.engine.url)
+    if url not in _fts_available:
+        _fts_available[url] = _tokenizer_supported()
+    return _fts_available[url]
+
+def ensure_search_index():
+    """创建全文索引表和同步触发器（仅SQLite），缺少触发器时从源表重建索引
+
+    已有数据库升级或 drop_all 重建表后，触发器都会缺失，此时索引内容不可信，需要整体重建。
+    SQLite 不支持 trigram 分词器时不创建索引，只记录警告，搜索接口改用 LIKE 模糊匹配。
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return
+    if not fts_enabled():
+        current_app.logger.warning(
+            f"SQLite {sqlite3.sqlite_version} 不支持 FTS5 {TOKENIZER} 分词器（需要 3.34 及以上），搜索改用 LIKE 模糊匹配"
+        )
+        return
+    connection = db.session.connection()
+    existing = {
+        name for name, in connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))
+    }
+    for fts_table, spec in SEARCH_TABLES.items():
+        ddl = _ddl(fts_table, spec['source'], spec['columns'])
+        connection.execute(text(ddl['table']))
+        missing = [name for name in ddl['triggers'] if name not in existing]
+        for name in missing:
+            connection.execute(text(ddl['triggers'][name]))
+        if missing:
+            connection.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+    db.session.commit()
+
+def split_terms(query):
+    """拆分搜索关键词（空白分隔，去掉双引号）"""
+    return [term for term in query.replace('"', ' ').split() if term]
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+def _like_filter(columns, terms):
+    """不能使用全文索引时的退化方案：每个词在任一列中模糊匹配"""
+    return db.and_(*[
+        db.or_(*[column.ilike(_like_pattern(term), escape='\\') for column in columns])
+        for term in terms
+    ])
+
+def _fts_search(fts_table, terms, page, page_size, conditions=(), params=None):
+    """在全文索引中搜索，返回 (源表ID列表, 总数)
+
+    三个字及以上的词走 trigram 索引（MATCH，按 bm25 排序）；一两个字的词 trigram 无法索引，
+    改为对源表做 LIKE 过滤。每个词都是子串匹配，因此同样支持前缀搜索。
+    """
+    spec = SEARCH_TABLES[fts_table]
+    source = spec['source']
+    params = dict(params or {})
+    conditions = list(conditions)
+
+    long_terms = [term for term in terms if len(term) >= 3]
+    short_terms = [term for term in terms if len(term) < 3]
+
+    if long_terms:
+        from_clause = f"FROM {fts_table} JOIN {source} s ON s.id = {fts_table}.rowid"
+        conditions.append(f"{fts_table} MATCH :match")
+        # 每个词作为短语，用户输入中的FTS5语法字符不会生效
+        params['match'] = ' '.join(f'"{term}"' for term in long_terms)
+        order_by = f"bm25({fts_table}, {', '.join(map(str, spec['weights']))})"
+    else:
+        from_clause = f"FROM {source} s"
+        order_by = "s.id"
+
+    for i, term in enumerate(short_terms):
+        params[f'like{i}'] = _like_pattern(term)
+        conditions.append('(' + ' OR '.join(
+            f"s.{column} LIKE :like{i} ESCAPE '\\'" for column in spec['columns']
+        ) + ')')
+
+    where_clause = ' AND '.join(conditions)
+    total = db.session.execute(text(f"SELECT count(*) {from_clause} WHERE {where_clause}"), params).scalar()
+    params.update({'limit': page_size, 'offset': (page - 1) * page_size})
+    ids = [row_id for row_id, in db.session.execute(text(
+        f"SELECT s.id {from_clause} WHERE {where_clause} ORDER BY {order_by} LIMIT :limit OFFSET :offset"
+    ), params)]
+    return ids, total
+
+def search_users(query, page, page_size):
+    """按用户名、姓名、邮箱搜索用户，返回 (用户列表, 总数)，按相关度排序"""
+    terms = split_terms(query)
+    if not fts_enabled():
+        base = User.query.filter(_like_filter([User.username, User.name, User.email], terms))
+        return base.order_by(User.id).offset((page - 1) * page_size).limit(page_size).all(), base.count()
+
+    ids, total = _fts_search('users_fts', terms, page, page_size)
+    users = {user.id: user for user in User.query.filter(User.id.in_(ids))}
+    return [users[user_id] for user_id in ids if user_id in users], total
+
+def search_courses(query, page, page_size, leader=None):
+    """按课程名称、教练、地点、描述搜索课程，返回 (课程列表, 总数)，按相关度排序
+
+    Args:
+        leader: 领队用户，传入时只搜索其舞种、其负责的课程和公共课程
+    """
+    terms = split_terms(query)
+    if not fts_enabled():
+        base = Course.query.filter(_like_filter(
+            [Course.name, Course.instructor, Course.location, Course.description], terms
+        ))
+        if leader:
+            base = base.filter(
+                (Course.dance_type == leader.dance_type) |
+                (Course.leader_id == leader.id) |
+                (Course.dance_type.is_(None))
+            )
+        return base.order_by(Course.course_date.desc()).offset((page - 1) * page_size).limit(page_size).all(), base.count()
+
+    conditions = ["s.deleted_at IS NULL"]
+    params = {}
+    if leader:
+        conditions.append("(s.dance_type = :dance_type OR s.leader_id = :leader_id OR s.dance_type IS NULL)")
+        params.update({'dance_type': leader.dance_type, 'leader_id': leader.id})
+
+    ids, total = _fts_search('courses_fts', terms, page, page_size, conditions, params)
+    courses = {course.id: course for course in Course.query.filter(Course.id.in_(ids))}
+    return [courses[course_id] for course_id in ids if course_id in courses], total
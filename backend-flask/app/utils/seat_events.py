@@ -0,0 +1,143 @@
+import queue
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.course import Course, SeatEvent
+
+class Subscription:
+    """单个订阅者的事件队列
+
+    队列写满说明客户端消费过慢，此时标记 overflowed 并停止投递，
+    由订阅方通知客户端重新拉取快照。
+    """
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def get(self, timeout):
+        """取出下一条事件，超时抛出 queue.Empty"""
+        return self.queue.get(timeout=timeout)
+
+class Broadcaster:
+    """进程内广播器：每条事件只扇出一次到所有订阅者的队列"""
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+class SeatEventRelay:
+    """座位事件转发线程
+
+    每个worker最多一个线程，仅在本进程有订阅者时运行：按自增ID轮询 seat_events 表，
+    把所有进程写入的新事件发布到本进程的广播器。无论有多少订阅者，
+    每个轮询周期只有一次查询，每个事件只扇出一次。
+    """
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self._thread = None
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def ensure_started(self, app):
+        """确保转发线程在运行（需在应用上下文中调用）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            # 只转发启动之后产生的事件，之前的状态由订阅方自行拉取快照
+            self._last_id = db.session.query(db.func.max(SeatEvent.id)).scalar() or 0
+            self._thread = threading.Thread(target=self._run, args=(app,), daemon=True)
+            self._thread.start()
+
+    def _has_subscribers(self):
+        with self._lock:
+            if self.broadcaster.subscriber_count:
+                return True
+            # 在锁内标记线程退出，避免与 ensure_started 竞争
+            self._thread = None
+            return False
+
+    def _run(self, app):
+        interval = app.config['SEAT_EVENT_POLL_INTERVAL']
+        stop = threading.Event()
+        with app.app_context():
+            while self._has_subscribers():
+                try:
+                    events = SeatEvent.query.filter(
+                        SeatEvent.id > self._last_id
+                    ).order_by(SeatEvent.id).limit(500).all()
+                    for event in events:
+                        self.broadcaster.publish(event.to_dict())
+                        self._last_id = event.id
+                except Exception as e:
+                    app.logger.warning(f"座位事件轮询失败: {str(e)}")
+                finally:
+                    # 归还数据库连接，避免长期占用
+                    db.session.remove()
+                stop.wait(interval)
+
+broadcaster = Broadcaster()
+relay = SeatEventRelay(broadcaster)
+
+def record_seat_events(course_ids):
+    """记录课程的最新座位数，供所有worker的转发线程读取
+
+    在业务事务提交之后调用，单独提交；已删除的课程记录一条 deleted 事件。
+
+    Args:
+        course_ids: 发生变化的课程ID列表
+    """
+    course_ids = list(dict.fromkeys(course_ids))
+    if not course_ids:
+        return
+
+    booked, held = Course.seat_count_columns()
+    rows = db.session.query(
+        Course.id, Course.course_date, Course.max_capacity, booked, held
+    ).filter(Course.id.in_(course_ids)).all()
+
+    existing_ids = set()
+    for course_id, course_date, max_capacity, booked_count, held_count in rows:
+        existing_ids.add(course_id)
+        db.session.add(SeatEvent(
+            course_id=course_id,
+            course_date=course_date,
+            max_capacity=max_capacity,
+            booked_count=booked_count,
+            held_count=held_count
+        ))
+    for course_id in course_ids:
+        if course_id not in existing_ids:
+            db.session.add(SeatEvent(course_id=course_id, deleted=True))
+
+    # 顺带清理过期事件（created_at 有索引）
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['SEAT_EVENT_RETENTION_SECONDS'])
+    SeatEvent.query.filter(SeatEvent.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
@@ -0,0 +1,39 @@
+from datetime import date
+
+# 春季学期为2月至7月，秋季学期为8月至次年1月（以开始年份命名）
+SPRING = 'spring'
+FALL = 'fall'
+
+def semester_key(target_date):
+    """返回日期所属学期的标识，如 '2025-fall'、'2026-spring'"""
+    if 2 <= target_date.month <= 7:
+        return f'{target_date.year}-{SPRING}'
+    if target_date.month == 1:
+        return f'{target_date.year - 1}-{FALL}'
+    return f'{target_date.year}-{FALL}'
+
+def semester_range(key):
+    """返回学期的起止日期（含两端）
+
+    Raises:
+        ValueError: 学期标识格式错误
+    """
+    try:
+        year, season = key.split('-')
+        year = int(year)
+    except ValueError:
+        raise ValueError(f'无效的学期: {key}')
+
+    if season == SPRING:
+        return date(year, 2, 1), date(year, 7, 31)
+    if season == FALL:
+        return date(year, 8, 1), date(year + 1, 1, 31)
+    raise ValueError(f'无效的学期: {key}')
+
+def previous_semester(key):
+    """返回上一个学期的标识，如 '2026-spring' -> '2025-fall'"""
+    semester_range(key)
+    year, season = key.split('-')
+    if season == SPRING:
+        return f'{int(year) - 1}-{FALL}'
+    return f'{year}-{SPRING}'
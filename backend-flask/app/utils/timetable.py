@@ -0,0 +1,484 @@
+import random
+import time
+from datetime import date, timedelta
+from app import db
+from app.models.course import Course
+from app.utils.rooms import parse_time_slot, format_minutes, MINUTES_PER_DAY
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+# 与 Course.check_time_conflict 的时长规则一致
+MIN_DURATION = 30
+MAX_DURATION = 240
+# 单次最多排的课程数：课程两两之间要比较是否共享人员，每次赋值都要检查所有未排课程
+MAX_CLASSES = 1000
+
+class TimetableProblem:
+    """排课问题：在日期范围内为每门课选择（星期, 开始时间, 地点），每周同一时间上课
+
+    课程在范围内每个对应星期都上课，因此每个（地点/人员, 星期）的占用是一个位图，
+    已有课程在范围内任一周的占用都会并入该星期的位图。
+    """
+
+    def __init__(self, start_date, end_date, locations, classes, window=(480, 1320),
+                 start_step=30, slot_minutes=15):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.locations = locations
+        self.classes = classes
+        self.window = window
+        self.start_step = start_step
+        self.slot_minutes = slot_minutes
+        self.room_busy = {}
+        self.person_busy = {}
+
+    @classmethod
+    def from_dict(cls, data, default_window, slot_minutes):
+        """解析排课请求，格式错误时抛出 ValueError"""
+        try:
+            start_date = date.fromisoformat(data['startDate'])
+            end_date = date.fromisoformat(data['endDate'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('请提供有效的日期范围: startDate, endDate（YYYY-MM-DD）')
+        if end_date < start_date:
+            raise ValueError('结束日期不能早于开始日期')
+
+        locations = data.get('locations')
+        if not isinstance(locations, list) or not locations or not all(isinstance(location, str) for location in locations):
+            raise ValueError('请提供可用地点列表: locations')
+
+        window = parse_time_slot(data.get('window') or default_window)
+        if window is None:
+            raise ValueError('时间窗口格式无效，请使用HH:MM-HH:MM格式')
+
+        try:
+            start_step = int(data.get('startStep', 30))
+            if start_step <= 0 or start_step % slot_minutes:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError(f'开始时间步长必须是{slot_minutes}分钟的整数倍')
+
+        raw_classes = data.get('classes')
+        if not isinstance(raw_classes, list) or not raw_classes:
+            raise ValueError('请提供待排课程列表: classes')
+        if len(raw_classes) > MAX_CLASSES:
+            raise ValueError(f'单次最多排{MAX_CLASSES}门课程')
+
+        classes = []
+        for index, item in enumerate(raw_classes):
+            if not isinstance(item, dict) or not item.get('name'):
+                raise ValueError(f'第{index + 1}门课程缺少名称')
+            try:
+                duration = int(item.get('duration', 90))
+            except (TypeError, ValueError):
+                duration = 0
+            if not MIN_DURATION <= duration <= MAX_DURATION:
+                raise ValueError(f'课程"{item["name"]}"的时长必须在{MIN_DURATION}到{MAX_DURATION}分钟之间')
+
+            allowed = item.get('locations') or locations
+            if not isinstance(allowed, list) or not all(isinstance(location, str) for location in allowed):
+                raise ValueError(f'课程"{item["name"]}"的地点必须是字符串列表')
+            unknown = [location for location in allowed if location not in locations]
+            if unknown:
+                raise ValueError(f'课程"{item["name"]}"的地点不在可用地点中: {", ".join(unknown)}')
+
+            windows = []
+            for preferred in item.get('preferredWindows') or []:
+                try:
+                    weekday = int(preferred['weekday'])
+                    time_range = parse_time_slot(preferred.get('timeRange') or data.get('window') or default_window)
+                    if not 0 <= weekday <= 6 or time_range is None:
+                        raise ValueError
+                except (KeyError, TypeError, ValueError):
+                    raise ValueError(f'课程"{item["name"]}"的偏好时间格式无效')
+                windows.append((weekday, time_range[0], time_range[1]))
+
+            instructor = item.get('instructor') or None
+            if instructor is not None and not isinstance(instructor, str):
+                raise ValueError(f'课程"{item["name"]}"的教练必须是字符串')
+
+            leader_id = item.get('leaderId')
+            if isinstance(leader_id, str) and leader_id.isdigit():
+                leader_id = int(leader_id)
+            elif leader_id in (None, ''):
+                leader_id = None
+            elif not isinstance(leader_id, int) or isinstance(leader_id, bool):
+                raise ValueError(f'课程"{item["name"]}"的领队ID无效')
+
+            classes.append({
+                'name': item['name'],
+                'instructor': instructor,
+                'leaderId': leader_id,
+                'danceType': item.get('danceType'),
+                'maxCapacity': item.get('maxCapacity'),
+                'duration': duration,
+                'locations': allowed,
+                'windows': windows
+            })
+
+        return cls(start_date, end_date, locations, classes, window, start_step, slot_minutes)
+
+    def slot_mask(self, start, end):
+        first = start // self.slot_minutes
+        last = -(-end // self.slot_minutes)
+        return ((1 << (last - first)) - 1) << first
+
+    def add_busy(self, location, instructor, leader_id, weekday, start, end):
+        """登记一段已有占用（地点和人员）"""
+        mask = self.slot_mask(start, end)
+        self.room_busy[(location, weekday)] = self.room_busy.get((location, weekday), 0) | mask
+        for person in self._people(instructor, leader_id):
+            self.person_busy[(person, weekday)] = self.person_busy.get((person, weekday), 0) | mask
+
+    def load_existing_courses(self):
+        """把日期范围内已有课程的占用并入位图（需在应用上下文中调用）"""
+        rows = db.session.query(
+            Course.location, Course.course_date, Course.time_slot, Course.instructor, Course.leader_id
+        ).filter(
+            Course.course_date >= self.start_date,
+            Course.course_date <= self.end_date
+        )
+        for location, course_date, time_slot, instructor, leader_id in rows:
+            minutes = parse_time_slot(time_slot) or (0, MINUTES_PER_DAY)
+            self.add_busy(location, instructor, leader_id, course_date.weekday(), *minutes)
+
+    @staticmethod
+    def _people(instructor, leader_id):
+        people = []
+        if instructor:
+            people.append(('instructor', instructor))
+        if leader_id:
+            people.append(('leader', leader_id))
+        return people
+
+    def weekday_dates(self, weekday):
+        """范围内某个星期对应的所有日期"""
+        day = self.start_date + timedelta(days=(weekday - self.start_date.weekday()) % 7)
+        dates = []
+        while day <= self.end_date:
+            dates.append(day)
+            day += timedelta(weeks=1)
+        return dates
+
+    def build_domains(self):
+        """每门课的候选取值：{(星期, 地点): [(开始分钟, 位图, 偏好序号), ...]}"""
+        active_weekdays = [weekday for weekday in range(7) if self.weekday_dates(weekday)]
+        domains = []
+        for item in self.classes:
+            windows = item['windows'] or [(weekday, *self.window) for weekday in range(7)]
+            people = self._people(item['instructor'], item['leaderId'])
+            domain = {}
+            for rank, (weekday, window_start, window_end) in enumerate(windows):
+                if weekday not in active_weekdays:
+                    continue
+                first_start = -(-window_start // self.start_step) * self.start_step
+                for start in range(first_start, window_end - item['duration'] + 1, self.start_step):
+                    mask = self.slot_mask(start, start + item['duration'])
+                    if any(self.person_busy.get((person, weekday), 0) & mask for person in people):
+                        continue
+                    for location in item['locations']:
+                        if self.room_busy.get((location, weekday), 0) & mask:
+                            continue
+                        domain.setdefault((weekday, location), []).append((start, mask, rank))
+            domains.append(domain)
+        return domains
+
+    def solve(self, time_budget=5.0):
+        """求解，返回 TimetableSolver 的结果"""
+        return TimetableSolver(self).solve(time_budget)
+
+class TimetableSolver:
+    """回溯搜索 + 前向检查
+
+    每次选择剩余候选最少的课程（MRV，相同时优先与其他课程共享人员多的），
+    按偏好顺序尝试取值，赋值后立即从其他未排课程的候选中删除冲突取值：
+    同一（星期, 地点）的重叠时段，以及共享教练/领队的课程在同一星期的重叠时段。
+    某门课候选被删空即回溯。无法全部排入时（超时或约束过紧），在搜索过程中排得最多的方案上
+    再贪心补排其余课程。
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        classes = problem.classes
+        people = [set(TimetableProblem._people(item['instructor'], item['leaderId'])) for item in classes]
+        self.shares_people = [
+            {j for j in range(len(classes)) if j != i and people[i] & people[j]}
+            for i in range(len(classes))
+        ]
+
+    def solve(self, time_budget):
+        started = time.perf_counter()
+        deadline = started + time_budget
+        domains = self.problem.build_domains()
+        sizes = [sum(len(values) for values in domain.values()) for domain in domains]
+
+        # 初始候选为空的课程无法排入，其余课程照常求解
+        infeasible = [i for i, size in enumerate(sizes) if size == 0]
+        unassigned = {i for i, size in enumerate(sizes) if size > 0}
+        assignment = {}
+        best = {}
+        nodes = 0
+        timed_out = False
+        trail = []
+
+        def prune(i, weekday, location, mask):
+            """从其他未排课程的候选中删除与该取值冲突的取值，返回是否出现空候选"""
+            for j in unassigned:
+                domain = domains[j]
+                if j in self.shares_people[i]:
+                    keys = [key for key in domain if key[0] == weekday]
+                else:
+                    keys = [(weekday, location)]
+                for key in keys:
+                    values = domain.get(key)
+                    if not values:
+                        continue
+                    kept = [value for value in values if not value[1] & mask]
+                    if len(kept) != len(values):
+                        trail.append((j, key, values))
+                        domain[key] = kept
+                        sizes[j] -= len(values) - len(kept)
+                if sizes[j] == 0:
+                    return False
+            return True
+
+        def undo(mark):
+            while len(trail) > mark:
+                j, key, values = trail.pop()
+                sizes[j] += len(values) - len(domains[j][key])
+                domains[j][key] = values
+
+        def candidates_of(i):
+            return sorted(
+                ((rank, start, weekday, location, mask)
+                 for (weekday, location), values in domains[i].items()
+                 for start, mask, rank in values),
+                key=lambda value: value[:3]
+            )
+
+        # 深度优先搜索用显式栈实现（课程数不受递归深度限制），
+        # 每层为 [课程, 按偏好排序的候选, 下一个候选的位置, 当前取值前的 trail 位置]
+        stack = []
+        complete = False
+        descend = True
+        while True:
+            if descend:
+                if not unassigned:
+                    complete = True
+                    break
+                if time.perf_counter() > deadline:
+                    timed_out = True
+                else:
+                    i = min(unassigned, key=lambda j: (sizes[j], -len(self.shares_people[j])))
+                    unassigned.discard(i)
+                    stack.append([i, candidates_of(i), 0, None])
+
+            # 在栈顶课程上尝试下一个候选；候选用完（或超时）时退回上一层
+            descend = False
+            while stack:
+                frame = stack[-1]
+                i, candidates, position, mark = frame
+                if mark is not None:
+                    undo(mark)
+                    del assignment[i]
+                    frame[3] = None
+                if timed_out or position >= len(candidates):
+                    unassigned.add(i)
+                    stack.pop()
+                    continue
+
+                rank, start, weekday, location, mask = candidates[position]
+                frame[2] = position + 1
+                frame[3] = len(trail)
+                nodes += 1
+                assignment[i] = (weekday, start, location, rank)
+                if len(assignment) > len(best):
+                    best = dict(assignment)
+                if prune(i, weekday, location, mask):
+                    descend = True
+                    break
+            if not descend:
+                break
+
+        result = dict(assignment) if complete else self._extend_greedily(domains, best)
+        return {
+            'assignment': result,
+            'infeasible': infeasible,
+            'complete': complete and not infeasible,
+            'timedOut': timed_out,
+            'nodes': nodes,
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    def _extend_greedily(self, domains, assignment):
+        """在部分方案上按候选数从少到多逐个补排课程，取第一个不冲突的取值"""
+        problem = self.problem
+        assignment = dict(assignment)
+        room_used = {}
+        person_used = {}
+
+        def occupy(i, weekday, start, location):
+            item = problem.classes[i]
+            mask = problem.slot_mask(start, start + item['duration'])
+            room_used[(location, weekday)] = room_used.get((location, weekday), 0) | mask
+            for person in TimetableProblem._people(item['instructor'], item['leaderId']):
+                person_used[(person, weekday)] = person_used.get((person, weekday), 0) | mask
+
+        for i, (weekday, start, location, _) in assignment.items():
+            occupy(i, weekday, start, location)
+
+        remaining = sorted(
+            (i for i, domain in enumerate(domains) if domain and i not in assignment),
+            key=lambda i: sum(len(values) for values in domains[i].values())
+        )
+        for i in remaining:
+            people = TimetableProblem._people(problem.classes[i]['instructor'], problem.classes[i]['leaderId'])
+            candidates = sorted(
+                (rank, start, weekday, location, mask)
+                for (weekday, location), values in domains[i].items()
+                for start, mask, rank in values
+            )
+            for rank, start, weekday, location, mask in candidates:
+                if room_used.get((location, weekday), 0) & mask:
+                    continue
+                if any(person_used.get((person, weekday), 0) & mask for person in people):
+                    continue
+                assignment[i] = (weekday, start, location, rank)
+                occupy(i, weekday, start, location)
+                break
+        return assignment
+
+def format_solution(problem, solution):
+    """把求解结果转换为接口返回格式"""
+    placements = []
+    for index, (weekday, start, location, rank) in sorted(solution['assignment'].items()):
+        item = problem.classes[index]
+        placements.append({
+            'index': index,
+            'name': item['name'],
+            'instructor': item['instructor'],
+            'leaderId': item['leaderId'],
+            'danceType': item['danceType'],
+            'maxCapacity': item['maxCapacity'],
+            'location': location,
+            'weekday': weekday,
+            'weekdayName': WEEKDAY_NAMES[weekday],
+            'timeSlot': f'{format_minutes(start)}-{format_minutes(start + item["duration"])}',
+            'preferenceRank': rank,
+            'dates': [day.isoformat() for day in problem.weekday_dates(weekday)]
+        })
+
+    unplaced = []
+    for index, item in enumerate(problem.classes):
+        if index in solution['assignment']:
+            continue
+        if index in solution['infeasible']:
+            reason = '没有满足地点、时间窗口和人员空闲的候选时段'
+        elif solution['timedOut']:
+            reason = '超过时间预算，未能排入'
+        else:
+            reason = '与其他课程的约束冲突，无法同时排入'
+        unplaced.append({'index': index, 'name': item['name'], 'reason': reason})
+
+    return {
+        'complete': solution['complete'],
+        'placements': placements,
+        'unplaced': unplaced,
+        'stats': {
+            'nodes': solution['nodes'],
+            'elapsedMs': solution['elapsedMs'],
+            'timedOut': solution['timedOut']
+        }
+    }
+
+def generate_benchmark_problem(seed=1, classes=60, rooms=8, leaders=8, weeks=18, existing=40, slot_minutes=15):
+    """生成一个接近真实学期规模的排课问题，用于基准测试
+
+    每个领队带若干舞种课，另有公共课；工作日晚上和周末白天为偏好时间，
+    部分地点在某些时段已被其他课程占用。
+    """
+    rng = random.Random(seed)
+    start_date = date(2025, 9, 1)
+    end_date = start_date + timedelta(weeks=weeks) - timedelta(days=1)
+    locations = [f'排练室{i + 1}' for i in range(rooms)]
+
+    class_list = []
+    for index in range(classes):
+        leader_id = index % (leaders + 1)
+        windows = []
+        for weekday in rng.sample(range(5), 3):
+            windows.append({'weekday': weekday, 'timeRange': '18:00-22:00'})
+        for weekday in rng.sample([5, 6], 1):
+            windows.append({'weekday': weekday, 'timeRange': '09:00-18:00'})
+        class_list.append({
+            'name': f'课程{index + 1}',
+            'instructor': f'教练{index % (leaders * 2) + 1}',
+            'leaderId': leader_id or None,
+            'duration': rng.choice([60, 90, 90, 120]),
+            'locations': rng.sample(locations, max(2, rooms // 2)),
+            'preferredWindows': windows
+        })
+
+    problem = TimetableProblem.from_dict({
+        'startDate': start_date.isoformat(),
+        'endDate': end_date.isoformat(),
+        'locations': locations,
+        'classes': class_list
+    }, '08:00-22:00', slot_minutes)
+
+    for _ in range(existing):
+        start = rng.choice(range(9 * 60, 21 * 60, 30))
+        problem.add_busy(rng.choice(locations), None, None, rng.randrange(7), start, start + 90)
+    return problem
+
+def generate_tight_benchmark_problem(seed=1, classes=60, rooms=4, leaders=8, weeks=18, decoys=1, slot_minutes=15):
+    """生成地点和领队都很紧张、但一定有解的排课问题，用于测试回溯搜索
+
+    先随机选取若干（时间窗口, 地点）格子，用时长随机的课程把每个格子恰好排满作为隐藏的解，
+    同一窗口不同地点的课程由不同领队负责；每门课的可选地点和偏好窗口只在隐藏解之外再加
+    decoys 个干扰项。按偏好顺序贪心往往会把课程放进别的格子导致后面排不下，必须回溯。
+    rooms 不能超过 leaders。
+    """
+    rng = random.Random(seed)
+    start_date = date(2025, 9, 1)
+    end_date = start_date + timedelta(weeks=weeks) - timedelta(days=1)
+    locations = [f'排练室{i + 1}' for i in range(rooms)]
+    windows = [(weekday, '18:00-22:00') for weekday in range(5)] + [(weekday, '09:00-18:00') for weekday in (5, 6)]
+
+    cells = [(window, room) for window in range(len(windows)) for room in range(rooms)]
+    rng.shuffle(cells)
+    class_list = []
+    for window, room in cells:
+        weekday, time_range = windows[window]
+        window_start, window_end = parse_time_slot(time_range)
+        leader_id = (room + weekday) % leaders + 1
+        start = window_start
+        while len(class_list) < classes:
+            durations = [duration for duration in (60, 90, 120) if start + duration <= window_end]
+            if not durations:
+                break
+            duration = rng.choice(durations)
+            preferred = [windows[window]] + [
+                windows[other] for other in rng.sample([k for k in range(len(windows)) if k != window], decoys)
+            ]
+            rng.shuffle(preferred)
+            other_rooms = [location for location in locations if location != locations[room]]
+            class_list.append({
+                'name': f'课程{len(class_list) + 1}',
+                'instructor': f'教练{leader_id}',
+                'leaderId': leader_id,
+                'duration': duration,
+                'locations': [locations[room]] + rng.sample(other_rooms, min(decoys, len(other_rooms))),
+                'preferredWindows': [{'weekday': day, 'timeRange': hours} for day, hours in preferred]
+            })
+            start += duration
+        if len(class_list) >= classes:
+            break
+    rng.shuffle(class_list)
+
+    return TimetableProblem.from_dict({
+        'startDate': start_date.isoformat(),
+        'endDate': end_date.isoformat(),
+        'locations': locations,
+        'classes': class_list
+    }, '08:00-22:00', slot_minutes)
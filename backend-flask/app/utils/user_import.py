@@ -0,0 +1,295 @@
+import csv
+import io
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.user import User
+from app.models.user_import import UserImportJob
+from app.utils.passwords import hash_passwords, password_hasher
+
+IMPORT_COLUMNS = ['username', 'name', 'email', 'password', 'role', 'dance_type']
+REQUIRED_COLUMNS = ['username', 'name', 'email', 'password']
+VALID_ROLES = ['admin', 'leader', 'member']
+MIN_PASSWORD_LENGTH = 6
+
+_EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_MAX_LENGTHS = {
+    'username': User.username.type.length,
+    'name': User.name.type.length,
+    'email': User.email.type.length,
+    'dance_type': User.dance_type.type.length
+}
+
+def parse_user_csv(content):
+    """解析导入文件，返回 [(行号, 行字典), ...]
+
+    第一行为表头，列名见 IMPORT_COLUMNS（role 默认为 member，dance_type 仅领队需要），
+    多余的列忽略。
+
+    Raises:
+        ValueError: 缺少必需的列
+    """
+    # Excel 保存的 UTF-8 CSV 带有BOM
+    content = content.lstrip('\ufeff')
+    reader = csv.DictReader(io.StringIO(content))
+    headers = [header.strip() for header in (reader.fieldnames or [])]
+    missing = [column for column in REQUIRED_COLUMNS if column not in headers]
+    if missing:
+        raise ValueError(f"导入文件缺少必需的列: {', '.join(missing)}")
+    reader.fieldnames = headers
+
+    rows = []
+    for row in reader:
+        values = {column: (row.get(column) or '').strip() for column in IMPORT_COLUMNS}
+        # 跳过空行
+        if any(values.values()):
+            rows.append((reader.line_num, values))
+    return rows
+
+def _validate_row(values):
+    """校验单行字段，返回错误信息列表"""
+    errors = [f'缺少必要字段: {column}' for column in REQUIRED_COLUMNS if not values[column]]
+    for column, max_length in _MAX_LENGTHS.items():
+        if len(values[column]) > max_length:
+            errors.append(f'{column} 不能超过{max_length}个字符')
+    if values['email'] and not _EMAIL_PATTERN.match(values['email']):
+        errors.append('邮箱格式无效')
+    if values['password'] and len(values['password']) < MIN_PASSWORD_LENGTH:
+        errors.append(f'密码长度不能少于{MIN_PASSWORD_LENGTH}个字符')
+
+    values['role'] = values['role'] or 'member'
+    if values['role'] not in VALID_ROLES:
+        errors.append(f'无效的角色，有效值为: {", ".join(VALID_ROLES)}')
+    elif values['role'] == 'leader' and not values['dance_type']:
+        errors.append('领队必须指定舞种类型')
+    return errors
+
+def import_users(rows, rounds, dry_run=False, batch_size=500, hash_workers=None, use_password_hasher=False,
+                 on_progress=None):
+    """批量导入用户
+
+    先逐行校验字段，再用一条查询找出与数据库中已有用户名/邮箱重复的行（文件内重复的行
+    只保留第一次出现的），通过校验的行按批并行哈希密码后插入。
+    某一批插入时违反唯一约束（期间有人注册了同名用户）时，该批回退为逐行插入，只跳过冲突的行。
+
+    Args:
+        rows: parse_user_csv 的结果
+        rounds: bcrypt 的 cost
+        dry_run: 只校验，不哈希也不写入
+        hash_workers: 进程池的进程数；use_password_hasher 时为同时占用的哈希线程数上限
+        use_password_hasher: 在 web worker 中使用，哈希交给与登录共用的有界线程池（password_hasher.hash_many），
+            而不是另起进程池
+        on_progress: 每批插入后的回调，参数为 (已处理行数, 需创建的行数)。应在回调中提交事务，
+            否则第一批插入后 SQLite 的写锁会一直持有到调用方提交，后续批次哈希期间其他写入都要等待
+
+    Returns:
+        {'total', 'created', 'failed', 'dryRun', 'errors': [{line, username, errors}], 'users': [...]}
+    """
+    errors = {}
+    valid = []
+    seen_usernames = {}
+    seen_emails = {}
+    for line, values in rows:
+        row_errors = _validate_row(values)
+        # 用户名区分大小写（与数据库唯一约束一致），邮箱不区分
+        email_key = values['email'].lower()
+        if values['username'] and values['username'] in seen_usernames:
+            row_errors.append(f"用户名与第{seen_usernames[values['username']]}行重复")
+        if values['email'] and email_key in seen_emails:
+            row_errors.append(f'邮箱与第{seen_emails[email_key]}行重复')
+        if values['username']:
+            seen_usernames.setdefault(values['username'], line)
+        if values['email']:
+            seen_emails.setdefault(email_key, line)
+
+        if row_errors:
+            errors[line] = row_errors
+        else:
+            valid.append((line, values))
+
+    # 一条查询找出数据库中已存在的用户名和邮箱
+    if valid:
+        usernames = [values['username'] for _, values in valid]
+        emails = [values['email'].lower() for _, values in valid]
+        existing_usernames = set()
+        existing_emails = set()
+        for username, email in db.session.query(User.username, User.email).filter(
+            User.username.in_(usernames) | db.func.lower(User.email).in_(emails)
+        ):
+            existing_usernames.add(username)
+            existing_emails.add(email.lower())
+
+        remaining = []
+        for line, values in valid:
+            row_errors = []
+            if values['username'] in existing_usernames:
+                row_errors.append('用户名已存在')
+            if values['email'].lower() in existing_emails:
+                row_errors.append('邮箱已存在')
+            if row_errors:
+                errors[line] = row_errors
+            else:
+                remaining.append((line, values))
+        valid = remaining
+
+    created = []
+    if valid and not dry_run:
+        table = User.__table__
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            passwords = [values['password'] for _, values in batch]
+            if use_password_hasher:
+                password_hashes = password_hasher.hash_many(passwords, rounds, hash_workers)
+            else:
+                password_hashes = hash_passwords(passwords, rounds, hash_workers)
+            now = datetime.utcnow()
+            records = [
+                (line, {
+                    'username': values['username'],
+                    'name': values['name'],
+                    'email': values['email'],
+                    'password_hash': password_hash,
+                    'role': values['role'],
+                    'dance_type': values['dance_type'] or None,
+                    # 管理员导入的用户默认已验证，与单个创建一致
+                    'email_verified': True,
+                    'created_at': now
+                })
+                for (line, values), password_hash in zip(batch, password_hashes)
+            ]
+
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert(), [record for _, record in records])
+                created.extend(records)
+            except IntegrityError:
+                for line, record in records:
+                    try:
+                        with db.session.begin_nested():
+                            db.session.execute(table.insert(), [record])
+                        created.append((line, record))
+                    except IntegrityError:
+                        errors[line] = ['用户名或邮箱已存在']
+            if on_progress:
+                on_progress(start + len(batch), len(valid))
+    elif dry_run:
+        created = [(line, values) for line, values in valid]
+
+    usernames_by_line = {line: values['username'] for line, values in rows}
+    return {
+        'total': len(rows),
+        'created': len(created),
+        'failed': len(errors),
+        'dryRun': dry_run,
+        'errors': [
+            {'line': line, 'username': usernames_by_line.get(line), 'errors': errors[line]}
+            for line in sorted(errors)
+        ],
+        'users': [
+            {'line': line, 'username': record['username'], 'name': record['name'], 'role': record['role']}
+            for line, record in created
+        ]
+    }
+
+def run_user_import_job(job_id, rows, rounds, batch_size, hash_workers=None):
+    """执行用户导入任务（需在应用上下文中调用）
+
+    每批插入后提交，已创建的用户和进度随之保存；中途失败时已提交的批次保留，
+    任务报告中只缺少失败后的行。
+
+    Returns:
+        导入报告，任务不存在或已开始时返回 None
+    """
+    job = UserImportJob.query.get(job_id)
+    if job is None or job.status != 'pending':
+        return None
+
+    try:
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        def save_progress(processed, valid_rows):
+            job.valid_rows = valid_rows
+            job.processed_rows = processed
+            db.session.commit()
+
+        report = import_users(
+            rows,
+            rounds=rounds,
+            batch_size=batch_size,
+            hash_workers=hash_workers,
+            use_password_hasher=True,
+            on_progress=save_progress
+        )
+        job.status = 'completed'
+        job.valid_rows = job.valid_rows or 0
+        job.result = json.dumps(report, ensure_ascii=False)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return report
+    except Exception as e:
+        db.session.rollback()
+        job = UserImportJob.query.get(job_id)
+        job.status = 'failed'
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        raise
+
+def purge_expired_user_imports(retention_hours):
+    """删除超过保留时间的导入任务记录（未提交）
+
+    任务执行时进程异常退出的话，上传的内容随进程一起丢失，任务一直停留在 pending / running，
+    到期后同样删除。
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    return UserImportJob.query.filter(UserImportJob.created_at < cutoff).delete(synchronize_session=False)
+
+class UserImportRunner:
+    """后台用户导入线程池（进程内）
+
+    导入主要耗时在 bcrypt 哈希上（cost 12 每个约几百毫秒），几百行就会超过请求超时，
+    因此请求只负责校验文件和创建任务记录，导入在线程池中执行。
+    线程池在第一次提交任务时创建，同时只执行一个导入；密码哈希与登录共用 password_hasher 的线程池，
+    同时占用的线程数不超过 USER_IMPORT_HASH_WORKERS，登录请求最多排在这几个导入哈希之后。
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, app, job_id, rows, rounds, on_complete=None):
+        """提交导入任务
+
+        Args:
+            on_complete: 导入完成后在任务线程中调用，参数为导入报告
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='user-import')
+        return self._executor.submit(self._run, app, job_id, rows, rounds, on_complete)
+
+    @staticmethod
+    def _run(app, job_id, rows, rounds, on_complete):
+        with app.app_context():
+            try:
+                report = run_user_import_job(
+                    job_id,
+                    rows,
+                    rounds,
+                    app.config['USER_IMPORT_BATCH_SIZE'],
+                    app.config['USER_IMPORT_HASH_WORKERS'] or None
+                )
+                if report is not None and on_complete:
+                    on_complete(report)
+            except Exception as e:
+                app.logger.warning(f"用户导入任务 {job_id} 失败: {str(e)}")
+            finally:
+                db.session.remove()
+
+user_import_runner = UserImportRunner()
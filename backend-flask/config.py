@@ -20,6 +20,116 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'default-jwt-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=1)  # 将访问令牌过期时间从1小时改为1天
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)  # 刷新令牌过期时间
+    
+    # 座位保留有效期（秒），过期后保留自动失效
+    SEAT_HOLD_TTL_SECONDS = int(os.environ.get('SEAT_HOLD_TTL_SECONDS', 300))
+    
+    # 共享课表摘要的缓存时间（秒），多进程部署时其他worker最多滞后这么久
+    SCHEDULE_CACHE_TTL_SECONDS = int(os.environ.get('SCHEDULE_CACHE_TTL_SECONDS', 10))
+    
+    # 课程分配统计的缓存时间（秒），0 表示不缓存
+    ASSIGNMENTS_CACHE_TTL_SECONDS = int(os.environ.get('ASSIGNMENTS_CACHE_TTL_SECONDS', 30))
+    
+    # 当前学期满员率统计的缓存时间（秒），已结束的学期固定缓存一天
+    ANALYTICS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYTICS_CACHE_TTL_SECONDS', 300))
+    
+    # 场地占用位图的时间粒度（分钟，建议5~15）和默认的每日可排课时间窗口
+    ROOM_SLOT_MINUTES = int(os.environ.get('ROOM_SLOT_MINUTES', 15))
+    ROOM_DAY_WINDOW = os.environ.get('ROOM_DAY_WINDOW', '08:00-22:00')
+    
+    # 自动排课单次求解的最长时间（秒）
+    TIMETABLE_MAX_BUDGET_SECONDS = float(os.environ.get('TIMETABLE_MAX_BUDGET_SECONDS', 5))
+    
+    # 课程推荐：检查数据变化并重建索引的间隔（秒）、每个用户预先计算的数量、推荐的课程日期范围（天）
+    RECOMMENDATION_REFRESH_SECONDS = int(os.environ.get('RECOMMENDATION_REFRESH_SECONDS', 300))
+    RECOMMENDATION_TOP_K = int(os.environ.get('RECOMMENDATION_TOP_K', 20))
+    RECOMMENDATION_HORIZON_DAYS = int(os.environ.get('RECOMMENDATION_HORIZON_DAYS', 28))
+    
+    # 日历订阅：包含的日期范围（今天之前/之后的天数）、课程所在时区、建议日历应用缓存的时间（秒）
+    CALENDAR_FEED_PAST_DAYS = int(os.environ.get('CALENDAR_FEED_PAST_DAYS', 30))
+    CALENDAR_FEED_FUTURE_DAYS = int(os.environ.get('CALENDAR_FEED_FUTURE_DAYS', 180))
+    CALENDAR_TIMEZONE = os.environ.get('CALENDAR_TIMEZONE', 'Asia/Shanghai')
+    CALENDAR_FEED_MAX_AGE_SECONDS = int(os.environ.get('CALENDAR_FEED_MAX_AGE_SECONDS', 300))
+    
+    # 报表导出：文件目录、后台线程数、每页行数、游标每次读取的行数、任务和文件的保留时间（小时）
+    EXPORT_DIR = os.environ.get('EXPORT_DIR', os.path.join(basedir, 'exports'))
+    EXPORT_MAX_WORKERS = int(os.environ.get('EXPORT_MAX_WORKERS', 2))
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 5000))
+    EXPORT_FETCH_SIZE = int(os.environ.get('EXPORT_FETCH_SIZE', 500))
+    EXPORT_RETENTION_HOURS = int(os.environ.get('EXPORT_RETENTION_HOURS', 24))
+    
+    # 批量导入用户：单次最多行数、每批插入行数、哈希并行数、导入任务记录保留小时数
+    # 哈希并行数在命令行导入时为进程数（0 表示CPU核心数）；接口的后台导入任务与登录共用 PASSWORD_HASH_WORKERS 线程池，
+    # 此时为导入同时占用的线程数上限（0 表示该线程池的一半，至少1，不超过线程池大小）
+    USER_IMPORT_MAX_ROWS = int(os.environ.get('USER_IMPORT_MAX_ROWS', 5000))
+    USER_IMPORT_BATCH_SIZE = int(os.environ.get('USER_IMPORT_BATCH_SIZE', 500))
+    USER_IMPORT_HASH_WORKERS = int(os.environ.get('USER_IMPORT_HASH_WORKERS', 0))
+    USER_IMPORT_RETENTION_HOURS = int(os.environ.get('USER_IMPORT_RETENTION_HOURS', 24))
+    
+    # 批量导入课程单次最多的课程数（ICS 重复事件按展开后的数量计算）
+    COURSE_IMPORT_MAX_ROWS = int(os.environ.get('COURSE_IMPORT_MAX_ROWS', 2000))
+    
+    # 认证接口限流（令牌桶）：后端为 memory（每个worker单独计数）或 sqlite（同一台机器的worker共享）
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH', os.path.join(basedir, 'ratelimit.db'))
+    # 部署在反向代理之后时设为1，按 X-Forwarded-For 识别客户端IP
+    RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', '0') == '1'
+    # 格式为“容量/秒数”：最多连续请求的次数，以及令牌从0补满所需的秒数
+    RATE_LIMIT_LOGIN_IP = os.environ.get('RATE_LIMIT_LOGIN_IP', '30/300')
+    # 以下两项只计密码错误的次数：同一用户名在同一IP上的错误次数，以及同一用户名在所有IP上的总错误次数
+    RATE_LIMIT_LOGIN_ACCOUNT_IP = os.environ.get('RATE_LIMIT_LOGIN_ACCOUNT_IP', '5/300')
+    RATE_LIMIT_LOGIN_ACCOUNT = os.environ.get('RATE_LIMIT_LOGIN_ACCOUNT', '100/3600')
+    RATE_LIMIT_EMAIL_IP = os.environ.get('RATE_LIMIT_EMAIL_IP', '10/3600')
+    RATE_LIMIT_EMAIL_ACCOUNT = os.environ.get('RATE_LIMIT_EMAIL_ACCOUNT', '3/900')
+    RATE_LIMIT_VERIFY_IP = os.environ.get('RATE_LIMIT_VERIFY_IP', '30/300')
+    RATE_LIMIT_VERIFY_ACCOUNT = os.environ.get('RATE_LIMIT_VERIFY_ACCOUNT', '10/600')
+    
+    # 密码哈希：bcrypt cost，设为 auto 时按目标耗时自动测定（不低于最小值，各进程分别测定，
+    # 生产环境用 manage.py benchmark-passwords --write 测定一次写入 .env）；调高后用户下次登录时自动重新哈希
+    BCRYPT_LOG_ROUNDS = os.environ.get('BCRYPT_LOG_ROUNDS', '12')
+    PASSWORD_HASH_TARGET_MS = int(os.environ.get('PASSWORD_HASH_TARGET_MS', 250))
+    PASSWORD_HASH_MIN_ROUNDS = int(os.environ.get('PASSWORD_HASH_MIN_ROUNDS', 10))
+    # 同时进行哈希的线程数（0 表示CPU核心数）和排队上限，排队超过上限时返回503
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 32))
+    
+    # 往期数据归档：热表保留当前学期和之前若干个学期，更早的课程和预订移入归档表
+    ARCHIVE_KEEP_SEMESTERS = int(os.environ.get('ARCHIVE_KEEP_SEMESTERS', 1))
+    # 取消超过该天数的预订也移入归档表
+    ARCHIVE_CANCELED_BOOKING_DAYS = int(os.environ.get('ARCHIVE_CANCELED_BOOKING_DAYS', 30))
+    # 验证码过期超过该天数仍未验证邮箱的账号会被删除
+    ARCHIVE_UNVERIFIED_USER_DAYS = int(os.environ.get('ARCHIVE_UNVERIFIED_USER_DAYS', 30))
+    # 已删除课程的墓碑保留天数
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+    
+    # 数据库在线备份：备份目录、保留个数、是否gzip压缩
+    BACKUP_DIR = os.environ.get('BACKUP_DIR', os.path.join(basedir, 'backups'))
+    BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', 14))
+    BACKUP_COMPRESS = os.environ.get('BACKUP_COMPRESS', '1') == '1'
+    # 每步复制的页数和两步之间的暂停（毫秒），期间写入不受影响；被写入打断重来超过次数后改为一步复制完
+    BACKUP_PAGES_PER_STEP = int(os.environ.get('BACKUP_PAGES_PER_STEP', 256))
+    BACKUP_STEP_PAUSE_MS = int(os.environ.get('BACKUP_STEP_PAUSE_MS', 10))
+    BACKUP_MAX_RESTARTS = int(os.environ.get('BACKUP_MAX_RESTARTS', 3))
+    
+    # 数据库迁移（python manage.py migrate）：回填每批的行数和两批之间的暂停（毫秒），每批单独提交
+    MIGRATION_BATCH_SIZE = int(os.environ.get('MIGRATION_BATCH_SIZE', 500))
+    MIGRATION_BATCH_PAUSE_MS = int(os.environ.get('MIGRATION_BATCH_PAUSE_MS', 50))
+    
+    # 幂等键（Idempotency-Key 请求头）及其响应的保留时间（秒），过期后同一个键会被当作新请求
+    IDEMPOTENCY_KEY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_KEY_TTL_SECONDS', 86400))
+    
+    # 座位变化事件：跨进程轮询间隔（秒）、事件保留时间（秒）、SSE心跳间隔（秒）
+    SEAT_EVENT_POLL_INTERVAL = float(os.environ.get('SEAT_EVENT_POLL_INTERVAL', 1.0))
+    SEAT_EVENT_RETENTION_SECONDS = int(os.environ.get('SEAT_EVENT_RETENTION_SECONDS', 3600))
+    SSE_KEEPALIVE_SECONDS = int(os.environ.get('SSE_KEEPALIVE_SECONDS', 15))
+    
+    # 进程内剩余座位表的整表重建间隔（秒），用于收敛过期的座位保留
+    AVAILABILITY_RELOAD_SECONDS = int(os.environ.get('AVAILABILITY_RELOAD_SECONDS', 60))
+    
+    # 增量同步接口每页最多返回的变化条数
+    SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 500))
 
 class DevelopmentConfig(Config):
     """开发环境配置"""
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+"""后端维护命令
+
+使用方式：
+python manage.py rebuild-projections    从源表整表重建课程摘要读模型
+python manage.py solve-timetable 排课需求.json [--output 结果.json]    生成无冲突的排课建议
+python manage.py benchmark-timetable    在模拟的学期规模数据上测试排课求解速度
+python manage.py import-users 用户.csv [--dry-run]    从CSV批量导入用户
+"""
+
+import argparse
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+from app import create_app, db
+
+def rebuild_projections(args):
+    """整表重建课程摘要读模型（course_summaries）"""
+    from app.models.projections import rebuild_course_summaries
+    
+    try:
+        count = rebuild_course_summaries(batch_size=args.batch_size)
+        db.session.commit()
+        print(f"课程摘要重建完成，共 {count} 门课程")
+    except Exception as e:
+        db.session.rollback()
+        print(f"课程摘要重建失败: {str(e)}")
+        return 1
+    return 0
+
+def solve_timetable(args):
+    """读取排课需求文件（格式同 POST /api/admin/timetable/solve），输出排课建议"""
+    from flask import current_app
+    from app.utils.timetable import TimetableProblem, format_solution
+    
+    with open(args.input, encoding='utf-8') as f:
+        data = json.load(f)
+    try:
+        problem = TimetableProblem.from_dict(
+            data,
+            current_app.config['ROOM_DAY_WINDOW'],
+            current_app.config['ROOM_SLOT_MINUTES']
+        )
+    except ValueError as e:
+        print(f"排课需求格式错误: {str(e)}")
+        return 1
+    
+    if not args.ignore_existing:
+        problem.load_existing_courses()
+    result = format_solution(problem, problem.solve(args.budget))
+    
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    
+    stats = result['stats']
+    print(f"已排入 {len(result['placements'])} 门，未排入 {len(result['unplaced'])} 门，"
+          f"搜索节点 {stats['nodes']}，耗时 {stats['elapsedMs']} ms", file=sys.stderr)
+    return 0 if result['complete'] else 2
+
+def benchmark_timetable(args):
+    """在随机生成的学期规模排课问题上测试求解速度（不读写数据库）"""
+    from app.utils.timetable import generate_benchmark_problem, generate_tight_benchmark_problem
+    
+    generate = generate_tight_benchmark_problem if args.tight else generate_benchmark_problem
+    print(f"{'课程数':>6} {'地点数':>6} {'周数':>4} {'排入':>6} {'节点':>8} {'耗时(ms)':>10} {'超时':>4}")
+    for classes in args.classes:
+        elapsed = []
+        for seed in range(1, args.runs + 1):
+            problem = generate(
+                seed=seed, classes=classes, rooms=args.rooms, leaders=args.leaders, weeks=args.weeks
+            )
+            solution = problem.solve(args.budget)
+            elapsed.append(solution['elapsedMs'])
+            print(f"{classes:>6} {args.rooms:>6} {args.weeks:>4} "
+                  f"{len(solution['assignment']):>3}/{classes:<3} {solution['nodes']:>8} "
+                  f"{solution['elapsedMs']:>10} {'是' if solution['timedOut'] else '否':>4}")
+        elapsed.sort()
+        print(f"  {classes} 门课程：中位耗时 {elapsed[len(elapsed) // 2]} ms，最长 {elapsed[-1]} ms")
+    return 0
+
+def benchmark_passwords(args):
+    """实测各 bcrypt cost 的哈希耗时，给出目标耗时下推荐的 cost"""
+    from flask import current_app
+    from app.utils.passwords import time_hash, benchmark_rounds
+    
+    target_ms = args.target_ms or current_app.config['PASSWORD_HASH_TARGET_MS']
+    print(f"{'cost':>4} {'耗时(ms)':>10}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        print(f"{rounds:>4} {time_hash(rounds, samples=args.runs):>10.1f}")
+    
+    rounds = benchmark_rounds(target_ms, min_rounds=current_app.config['PASSWORD_HASH_MIN_ROUNDS'])
+    print(f"目标耗时 {target_ms} ms，推荐 BCRYPT_LOG_ROUNDS={rounds}"
+          f"（当前配置 {current_app.config['BCRYPT_LOG_ROUNDS']}）")
+    
+    if args.write:
+        # 写入 .env 固定 cost，所有worker使用同一个值，不再各自测定
+        from dotenv import set_key
+        env_path = args.env_file or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+        set_key(env_path, 'BCRYPT_LOG_ROUNDS', str(rounds), quote_mode='never')
+        print(f"已写入 {env_path}，重启应用后生效")
+    return 0
+
+def archive(args):
+    """归档往期课程和预订，并清理过期墓碑和未验证账号（同 POST /api/admin/archive）"""
+    from datetime import date
+    from flask import current_app
+    from app import db
+    from app.utils.archive import archive_cutoff, run_archive
+    
+    config = current_app.config
+    keep_semesters = config['ARCHIVE_KEEP_SEMESTERS'] if args.keep_semesters is None else args.keep_semesters
+    try:
+        report = run_archive(
+            archive_cutoff(date.today(), keep_semesters),
+            canceled_days=config['ARCHIVE_CANCELED_BOOKING_DAYS'],
+            unverified_days=config['ARCHIVE_UNVERIFIED_USER_DAYS'],
+            tombstone_days=config['SYNC_TOMBSTONE_RETENTION_DAYS'],
+            batch_size=config['ARCHIVE_BATCH_SIZE'],
+            dry_run=args.dry_run
+        )
+    except Exception as e:
+        db.session.rollback()
+        print(f"归档失败: {str(e)}")
+        return 1
+    
+    print(f"{'预计' if args.dry_run else '已'}归档 {report['cutoffDate']} 之前的课程 {report['courses']} 门、"
+          f"预订 {report['bookings']} 条，归档已取消的预订 {report['canceledBookings']} 条，"
+          f"清理墓碑 {report['tombstones']} 个、未验证账号 {report['unverifiedUsers']} 个")
+    return 0
+
+def backup_database(args):
+    """在线备份数据库（同 POST /api/admin/backups），可立即做恢复校验"""
+    import os
+    from flask import current_app
+    from app.utils.backup import database_path, backup_options, create_backup, verify_backup
+    
+    config = current_app.config
+    options = backup_options(config)
+    if args.no_compress:
+        options['compress'] = False
+    if args.keep:
+        options['keep'] = args.keep
+    try:
+        manifest = create_backup(database_path(config['SQLALCHEMY_DATABASE_URI']), config['BACKUP_DIR'], **options)
+    except Exception as e:
+        print(f"数据库备份失败: {str(e)}")
+        return 1
+    
+    print(f"已备份到 {os.path.join(config['BACKUP_DIR'], manifest['file'])}（数据库 {manifest['databaseSize']} 字节，"
+          f"备份 {manifest['size']} 字节，耗时 {manifest['elapsedMs']} ms）")
+    for file_name in manifest['rotated']:
+        print(f"已删除旧备份 {file_name}")
+    
+    if args.verify:
+        return _print_verification(verify_backup(os.path.join(config['BACKUP_DIR'], manifest['file'])))
+    return 0
+
+def _print_verification(result):
+    if result['ok']:
+        print(f"{result['file']} 校验通过：完整性检查 {result['integrity']}，共 {len(result['tables'])} 张表行数一致")
+        return 0
+    for error in result['errors']:
+        print(f"{result['file']}: {error}")
+    return 2
+
+def verify_database_backup(args):
+    """恢复校验：恢复到临时文件，检查完整性并与清单中的行数比对"""
+    from app.utils.backup import verify_backup
+    return _print_verification(verify_backup(args.backup))
+
+def restore_database_backup(args):
+    """校验通过后把备份恢复到指定路径（恢复到正在使用的数据库前请先停止服务）"""
+    import os
+    from app.utils.backup import verify_backup, restore_backup
+    
+    if _print_verification(verify_backup(args.backup)):
+        return 2
+    if os.path.exists(args.output) and not args.force:
+        print(f"{args.output} 已存在，确认覆盖请加 --force")
+        return 1
+    restore_backup(args.backup, args.output)
+    print(f"已恢复到 {args.output}")
+    return 0
+
+def migrate(args):
+    """按版本号顺序执行 migrations/versions 中尚未执行的迁移，已执行的版本记录在 schema_migrations"""
+    from flask import current_app
+    from app.models.migration import SchemaMigration
+    from app.utils.migrations import discover_migrations, run_migrations
+    
+    if args.status:
+        applied = {migration.version: migration for migration in SchemaMigration.query.all()}
+        for migration in discover_migrations():
+            record = applied.get(migration.version)
+            state = f"已执行 {record.applied_at:%Y-%m-%d %H:%M:%S}" if record else '未执行'
+            print(f"{migration.version} {migration.name:<32} {state}  {migration.description}")
+        return 0
+    
+    config = current_app.config
+    batch_size = args.batch_size or config['MIGRATION_BATCH_SIZE']
+    pause_ms = config['MIGRATION_BATCH_PAUSE_MS'] if args.pause_ms is None else args.pause_ms
+    try:
+        executed = run_migrations(
+            target=args.target,
+            batch_size=batch_size,
+            pause=pause_ms / 1000,
+            dry_run=args.dry_run,
+            log=print
+        )
+    except Exception as e:
+        db.session.rollback()
+        print(f"数据库迁移失败: {str(e)}（已完成的步骤已提交，修复后重新执行即可继续）")
+        return 1
+    
+    if not executed:
+        print("没有需要执行的迁移")
+    elif not args.dry_run:
+        print(f"已执行 {len(executed)} 个迁移，共耗时 {sum(item['elapsedMs'] for item in executed)} ms")
+    return 0
+
+def import_users_csv(args):
+    """从CSV批量导入用户（格式同 POST /api/users/import）"""
+    import time
+    from flask import current_app
+    from app.utils.user_import import parse_user_csv, import_users
+    from app.utils.passwords import password_hasher
+    
+    with open(args.input, encoding='utf-8-sig') as f:
+        try:
+            rows = parse_user_csv(f.read())
+        except ValueError as e:
+            print(str(e))
+            return 1
+    
+    def save_progress(processed, valid_rows):
+        # 每批提交一次，后续批次哈希期间不占用数据库写锁
+        db.session.commit()
+        print(f"已处理 {processed}/{valid_rows} 行")
+    
+    started = time.perf_counter()
+    try:
+        report = import_users(
+            rows,
+            rounds=password_hasher.rounds(),
+            dry_run=args.dry_run,
+            batch_size=current_app.config['USER_IMPORT_BATCH_SIZE'],
+            hash_workers=args.workers or current_app.config['USER_IMPORT_HASH_WORKERS'] or None,
+            on_progress=save_progress
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"用户导入失败: {str(e)}（已处理的批次已提交）")
+        return 1
+    
+    for error in report['errors']:
+        print(f"第{error['line']}行 {error['username'] or ''}: {'；'.join(error['errors'])}")
+    print(f"{'校验' if args.dry_run else '导入'}完成：共 {report['total']} 行，成功 {report['created']} 行，"
+          f"失败 {report['failed']} 行，耗时 {time.perf_counter() - started:.2f} 秒")
+    return 0 if not report['failed'] else 2
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='街舞社官网后端维护命令')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    rebuild = subparsers.add_parser('rebuild-projections', help='从源表整表重建课程摘要读模型')
+    rebuild.add_argument('--batch-size', type=int, default=500, help='每批重建的课程数')
+    rebuild.set_defaults(func=rebuild_projections)
+    
+    solve = subparsers.add_parser('solve-timetable', help='根据排课需求文件生成无冲突的排课建议')
+    solve.add_argument('input', help='排课需求JSON文件')
+    solve.add_argument('--output', help='结果写入的文件，默认输出到终端')
+    solve.add_argument('--budget', type=float, default=10, help='求解时间预算（秒）')
+    solve.add_argument('--ignore-existing', action='store_true', help='不考虑数据库中已有的课程')
+    solve.set_defaults(func=solve_timetable)
+    
+    benchmark = subparsers.add_parser('benchmark-timetable', help='测试排课求解速度')
+    benchmark.add_argument('--classes', type=int, nargs='+', default=[40, 60, 100], help='课程数（可多个）')
+    benchmark.add_argument('--rooms', type=int, default=8, help='地点数')
+    benchmark.add_argument('--leaders', type=int, default=8, help='领队数')
+    benchmark.add_argument('--weeks', type=int, default=18, help='学期周数')
+    benchmark.add_argument('--runs', type=int, default=5, help='每种规模的随机样本数')
+    benchmark.add_argument('--budget', type=float, default=5, help='求解时间预算（秒）')
+    benchmark.add_argument('--tight', action='store_true', help='地点和领队紧张、需要回溯才能排满的问题（一定有解）')
+    benchmark.set_defaults(func=benchmark_timetable)
+    
+    users = subparsers.add_parser('import-users', help='从CSV批量导入用户')
+    users.add_argument('input', help='CSV文件，表头为 username,name,email,password,role,dance_type')
+    users.add_argument('--dry-run', action='store_true', help='只校验，不创建用户')
+    users.add_argument('--workers', type=int, help='并行哈希密码的进程数，默认为CPU核心数')
+    users.set_defaults(func=import_users_csv)
+    
+    passwords = subparsers.add_parser('benchmark-passwords', help='测试bcrypt各cost的哈希耗时')
+    passwords.add_argument('--target-ms', type=int, help='单次哈希的目标耗时（毫秒），默认为 PASSWORD_HASH_TARGET_MS')
+    passwords.add_argument('--min-rounds', type=int, default=10, help='测试的最小cost')
+    passwords.add_argument('--max-rounds', type=int, default=13, help='测试的最大cost')
+    passwords.add_argument('--runs', type=int, default=3, help='每个cost测试次数（取最快一次）')
+    passwords.add_argument('--write', action='store_true', help='把推荐的cost写入 .env 的 BCRYPT_LOG_ROUNDS')
+    passwords.add_argument('--env-file', help='写入的配置文件，默认为 backend-flask/.env')
+    passwords.set_defaults(func=benchmark_passwords)
+    
+    archive_parser = subparsers.add_parser('archive', help='归档往期课程和预订，清理过期墓碑和未验证账号')
+    archive_parser.add_argument('--keep-semesters', type=int, help='除当前学期外保留的学期数，默认为 ARCHIVE_KEEP_SEMESTERS')
+    archive_parser.add_argument('--dry-run', action='store_true', help='只统计，不修改数据')
+    archive_parser.set_defaults(func=archive)
+    
+    backup = subparsers.add_parser('backup', help='在线备份数据库')
+    backup.add_argument('--no-compress', action='store_true', help='不压缩')
+    backup.add_argument('--keep', type=int, help='保留的备份个数，默认为 BACKUP_KEEP')
+    backup.add_argument('--verify', action='store_true', help='备份后立即做恢复校验')
+    backup.set_defaults(func=backup_database)
+    
+    verify = subparsers.add_parser('verify-backup', help='校验备份能否正确恢复')
+    verify.add_argument('backup', help='备份文件（.db.gz 或 .db）')
+    verify.set_defaults(func=verify_database_backup)
+    
+    restore = subparsers.add_parser('restore-backup', help='校验并恢复备份到指定路径')
+    restore.add_argument('backup', help='备份文件（.db.gz 或 .db）')
+    restore.add_argument('output', help='恢复出的数据库文件路径')
+    restore.add_argument('--force', action='store_true', help='覆盖已存在的文件')
+    restore.set_defaults(func=restore_database_backup)
+    
+    migrate_parser = subparsers.add_parser('migrate', help='执行尚未执行的数据库迁移')
+    migrate_parser.add_argument('--status', action='store_true', help='只列出各迁移的执行状态')
+    migrate_parser.add_argument('--dry-run', action='store_true', help='只打印将执行的操作和回填行数')
+    migrate_parser.add_argument('--target', help='只执行到该版本号（含）')
+    migrate_parser.add_argument('--batch-size', type=int, help='回填每批的行数，默认为 MIGRATION_BATCH_SIZE')
+    migrate_parser.add_argument('--pause-ms', type=int, help='两批回填之间暂停的毫秒数，默认为 MIGRATION_BATCH_PAUSE_MS')
+    migrate_parser.set_defaults(func=migrate)
+    
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    app = create_app()
+    with app.app_context():
+        return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
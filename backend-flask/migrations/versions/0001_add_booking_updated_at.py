@@ -0,0 +1,4 @@
+"""为 bookings 表添加 updated_at 字段"""
+
+def upgrade(migration):
+    migration.add_column('bookings', 'updated_at', 'DATETIME')
@@ -0,0 +1,14 @@
+"""为 bookings 和 courses 表添加查询索引
+
+create_all 只会为新建的表创建索引，已有数据库需要补建。
+"""
+
+INDEXES = [
+    ('ix_bookings_user_course', 'bookings', ['user_id', 'course_id']),
+    ('ix_bookings_course_status', 'bookings', ['course_id', 'status']),
+    ('ix_courses_course_date', 'courses', ['course_date']),
+]
+
+def upgrade(migration):
+    for name, table, columns in INDEXES:
+        migration.create_index(name, table, columns)
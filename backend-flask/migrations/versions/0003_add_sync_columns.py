@@ -0,0 +1,23 @@
+"""添加增量同步所需的字段和索引
+
+为 courses 表添加 updated_at、deleted_at、change_seq 字段，为 bookings 表添加 change_seq 字段。
+sync_sequence 表由应用启动时的 create_all 自动创建。
+"""
+
+COLUMNS = [
+    ('courses', 'updated_at', 'DATETIME'),
+    ('courses', 'deleted_at', 'DATETIME'),
+    ('courses', 'change_seq', 'INTEGER'),
+    ('bookings', 'change_seq', 'INTEGER'),
+]
+
+INDEXES = [
+    ('ix_courses_change_seq', 'courses', ['change_seq']),
+    ('ix_bookings_user_change_seq', 'bookings', ['user_id', 'change_seq']),
+]
+
+def upgrade(migration):
+    for table, column, column_type in COLUMNS:
+        migration.add_column(table, column, column_type)
+    for name, table, columns in INDEXES:
+        migration.create_index(name, table, columns)
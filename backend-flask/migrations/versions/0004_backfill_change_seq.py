@@ -0,0 +1,26 @@
+"""为添加同步字段之前的课程和预订回填 change_seq
+
+这些记录没有同步序号，增量同步只能在全量快照中拿到它们。回填时从 sync_sequence 预留序号，
+与应用分配序号的方式一致（见 app/models/sync.py），已有客户端会在下次增量同步时收到这些记录。
+"""
+
+from sqlalchemy import text
+
+def _assign_change_seqs(table):
+    def apply(connection, rowids):
+        count = len(rowids)
+        updated = connection.execute(
+            text('UPDATE sync_sequence SET value = value + :count WHERE id = 1'), {'count': count}
+        ).rowcount
+        if not updated:
+            connection.execute(text('INSERT INTO sync_sequence (id, value) VALUES (1, :count)'), {'count': count})
+        last = connection.execute(text('SELECT value FROM sync_sequence WHERE id = 1')).scalar()
+        connection.execute(
+            text(f'UPDATE {table} SET change_seq = :seq WHERE rowid = :rowid'),
+            [{'seq': last - count + 1 + i, 'rowid': rowid} for i, rowid in enumerate(rowids)]
+        )
+    return apply
+
+def upgrade(migration):
+    for table in ('courses', 'bookings'):
+        migration.backfill(table, 'change_seq IS NULL', apply=_assign_change_seqs(table))
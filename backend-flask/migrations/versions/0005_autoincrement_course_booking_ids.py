@@ -0,0 +1,53 @@
+"""courses 和 bookings 表的主键改为 AUTOINCREMENT，已删除的ID不再分配给新记录
+
+SQLite 的 INTEGER PRIMARY KEY 默认取当前最大ID加1，删除最大ID的记录（归档、清理墓碑）后
+新记录会得到同一个ID。SQLite 不能修改已有列的定义，需要重建表。
+重建后把自增序号设为表中和归档、座位事件等处出现过的最大ID，已经删除的ID也不会再被分配。
+"""
+import re
+
+# 表名 -> 其他表中引用过该表ID的列（可能指向已删除的记录）
+TABLES = {
+    'courses': [
+        ('archived_courses', 'course_id'),
+        ('archived_bookings', 'course_id'),
+        ('seat_events', 'course_id'),
+    ],
+    'bookings': [
+        ('archived_bookings', 'booking_id'),
+    ],
+}
+
+_ID_COLUMN = re.compile(r'(\(\s*"?id"?\s+INTEGER\s+NOT\s+NULL)(\s*,)', re.IGNORECASE)
+_PRIMARY_KEY = re.compile(r',\s*PRIMARY\s+KEY\s*\(\s*"?id"?\s*\)', re.IGNORECASE)
+
+def upgrade(migration):
+    for table, references in TABLES.items():
+        create_sql = migration.table_sql(table)
+        if create_sql is None:
+            continue
+        if 'AUTOINCREMENT' in create_sql.upper():
+            migration.log(f'{table} 表已使用 AUTOINCREMENT，跳过')
+        else:
+            new_sql, replaced = _ID_COLUMN.subn(r'\1 PRIMARY KEY AUTOINCREMENT\2', create_sql, count=1)
+            new_sql, removed = _PRIMARY_KEY.subn('', new_sql, count=1)
+            if not replaced or not removed:
+                raise RuntimeError(f'无法识别 {table} 表的主键定义，请手动迁移: {create_sql}')
+            migration.rebuild_table(table, new_sql)
+
+        # 自增序号不小于曾经出现过的最大ID
+        floors = [f'(SELECT MAX(id) FROM "{table}")']
+        floors += [
+            f'(SELECT MAX("{column}") FROM "{other}")'
+            for other, column in references if column in migration.columns(other)
+        ]
+        # 多个参数的 MAX 是取最大值的标量函数（单个参数时是聚合函数）
+        highest = 'MAX(0, ' + ', '.join(f'COALESCE({floor}, 0)' for floor in floors) + ')'
+        migration.execute(
+            f'UPDATE sqlite_sequence SET seq = MAX(seq, {highest}) WHERE name = :name', {'name': table}
+        )
+        migration.execute(
+            f'INSERT INTO sqlite_sequence (name, seq) SELECT :name, {highest} '
+            f'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)',
+            {'name': table}
+        )
@@ -0,0 +1,7 @@
+"""为 idempotency_keys 表添加 applied_at 字段
+
+接口提交写入时在同一事务中标记幂等键已执行，响应保存之前进程退出也不会在重试时重复执行。
+"""
+
+def upgrade(migration):
+    migration.add_column('idempotency_keys', 'applied_at', 'DATETIME')
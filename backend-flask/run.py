@@ -161,6 +161,9 @@ if __name__ == '__main__':
             db.drop_all()
             db.create_all()
             
+            from app.utils.migrations import stamp_migrations
+            stamp_migrations()
+            
             # 可以在这里添加初始数据导入
             try:
                 from app.seed import seed_database
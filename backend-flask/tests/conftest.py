@@ -0,0 +1,85 @@
+import itertools
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+
+# 测试使用临时数据库和最低的 bcrypt cost，需在导入配置之前设置
+_db_dir = tempfile.mkdtemp(prefix='streetdance-test-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+os.environ['RATE_LIMIT_BACKEND'] = 'memory'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.course import Course
+from app.models.user import User
+
+# 测试登录使用的客户端地址
+_login_addresses = itertools.count(1)
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def create_user(app):
+    """创建已验证邮箱的用户，返回用户ID
+
+    会话级数据库在测试之间共享，用户名需在各测试中唯一。
+    """
+    def create(username, role='member', dance_type=None, password='password'):
+        with app.app_context():
+            user = User(
+                username=username, name=username, email=f'{username}@example.com',
+                role=role, dance_type=dance_type, email_verified=True
+            )
+            user.password = password
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return create
+
+@pytest.fixture
+def auth_headers(client):
+    """登录并返回带访问令牌的请求头；登录设置的 cookie 随即清除，请求只凭请求头认证
+
+    每次登录使用不同的客户端地址，整个测试会话的登录次数不受按IP的登录限流影响。
+    """
+    def login(username, password='password'):
+        address = next(_login_addresses)
+        response = client.post(
+            '/api/auth/login', json={'username': username, 'password': password},
+            environ_base={'REMOTE_ADDR': f'10.{address >> 16 & 255}.{address >> 8 & 255}.{address & 255}'}
+        )
+        client.delete_cookie('access_token_cookie')
+        return {'Authorization': 'Bearer ' + response.get_json()['data']['token']}
+    return login
+
+@pytest.fixture
+def create_course(app):
+    """创建课程（默认一周后的晚课，容量10），返回课程ID"""
+    def create(**fields):
+        values = dict(
+            name='测试课程', instructor='教练', location='测试馆',
+            course_date=date.today() + timedelta(days=7), time_slot='19:00-20:30', max_capacity=10
+        )
+        values.update(fields)
+        with app.app_context():
+            course = Course(**values)
+            db.session.add(course)
+            db.session.commit()
+            return course.id
+    return create
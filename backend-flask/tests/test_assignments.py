@@ -0,0 +1,16 @@
+from app.api.routes import _assignments_cache
+from app.models.course import Course
+
+def test_leader_without_dance_type_counts_courses_without_dance_type(app, client, create_user, auth_headers, create_course):
+    """未设置舞种的领队与逐个查询时一致，计入未设置舞种的课程"""
+    create_user('assign_admin', role='admin')
+    leader_id = create_user('assign_leader_null', role='leader')
+    create_course(name='分配测试')
+    with app.app_context():
+        expected = Course.query.filter(Course.dance_type.is_(None)).count()
+
+    _assignments_cache.clear()
+    data = client.get('/api/admin/courses/assignments', headers=auth_headers('assign_admin')).get_json()['data']
+    leader = next(item for item in data if item.get('leaderId') == leader_id)
+    assert expected >= 1
+    assert leader['courseCount'] == expected
@@ -0,0 +1,31 @@
+def _login(client, username, password, ip):
+    return client.post(
+        '/api/auth/login',
+        json={'username': username, 'password': password},
+        environ_base={'REMOTE_ADDR': ip}
+    )
+
+def test_wrong_passwords_from_one_ip_do_not_lock_out_other_ips(client, create_user):
+    """攻击者的IP耗尽该用户名的错误次数后，正常用户从其他IP用正确密码仍可登录"""
+    create_user('ratelimit_victim', password='correct-password')
+
+    for _ in range(5):
+        assert _login(client, 'ratelimit_victim', 'wrong', '1.1.1.1').status_code == 401
+    response = _login(client, 'ratelimit_victim', 'wrong', '1.1.1.1')
+    assert response.status_code == 429
+    assert response.headers['Retry-After']
+
+    response = _login(client, 'ratelimit_victim', 'correct-password', '2.2.2.2')
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+
+def test_account_wide_backstop_limits_guesses_spread_over_ips(app, client, create_user):
+    """换IP分散猜测时由用户名总限额兜底"""
+    create_user('ratelimit_spread', password='correct-password')
+    app.config['RATE_LIMIT_LOGIN_ACCOUNT'] = '3/3600'
+    try:
+        for i in range(3):
+            assert _login(client, 'ratelimit_spread', 'wrong', f'3.3.3.{i}').status_code == 401
+        assert _login(client, 'ratelimit_spread', 'correct-password', '4.4.4.4').status_code == 429
+    finally:
+        app.config['RATE_LIMIT_LOGIN_ACCOUNT'] = '100/3600'
@@ -0,0 +1,50 @@
+import json
+import os
+import sqlite3
+from app.utils.backup import create_backup, list_backups, restore_backup, verify_backup
+
+def _source(tmp_path, rows=3):
+    path = str(tmp_path / 'source.db')
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE bookings (id INTEGER PRIMARY KEY, status TEXT)')
+    connection.executemany('INSERT INTO bookings (status) VALUES (?)', [('confirmed',)] * rows)
+    connection.commit()
+    connection.close()
+    return path
+
+def test_backup_round_trip_and_rotation(tmp_path):
+    source = _source(tmp_path)
+    backup_dir = str(tmp_path / 'backups')
+    for _ in range(3):
+        manifest = create_backup(source, backup_dir, compress=True, keep=2, step_pause=0)
+    assert manifest['tables'] == {'bookings': 3}
+    assert [backup['file'] for backup in list_backups(backup_dir)][0] == manifest['file']
+    assert len(list_backups(backup_dir)) == 2
+
+    backup_path = os.path.join(backup_dir, manifest['file'])
+    assert verify_backup(backup_path)['ok']
+    restored = str(tmp_path / 'restored.db')
+    restore_backup(backup_path, restored)
+    connection = sqlite3.connect(restored)
+    assert connection.execute('SELECT COUNT(*) FROM bookings').fetchone()[0] == 3
+    connection.close()
+
+def test_verify_detects_row_count_mismatch_and_corruption(tmp_path):
+    backup_dir = str(tmp_path / 'backups')
+    manifest = create_backup(_source(tmp_path), backup_dir, compress=False, step_pause=0)
+    backup_path = os.path.join(backup_dir, manifest['file'])
+    manifest_path = backup_path[:-len('.db')] + '.json'
+
+    with open(manifest_path, encoding='utf-8') as f:
+        stored = json.load(f)
+    stored['tables']['bookings'] = 4
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(stored, f)
+    result = verify_backup(backup_path)
+    assert not result['ok']
+    assert result['errors'] == ['表 bookings 行数不一致: 清单 4，恢复后 3']
+
+    with open(backup_path, 'ab') as f:
+        f.write(b'\0')
+    result = verify_backup(backup_path)
+    assert not result['ok'] and '哈希' in result['errors'][0]
@@ -0,0 +1,32 @@
+import pytest
+from app import db
+from app.models.user import User
+
+@pytest.mark.parametrize('raw_id', [True, 1.7, '1.7', '-1', '', None, [1]])
+def test_batch_book_rejects_non_integer_course_ids(client, create_user, auth_headers, raw_id):
+    """布尔值、小数和非数字字符串不能当作课程ID"""
+    username = f'batch_invalid_{abs(hash(repr(raw_id)))}'
+    create_user(username)
+    response = client.post('/api/courses/batch/book', headers=auth_headers(username), json={'courseIds': [raw_id]})
+    assert response.status_code == 400
+    assert response.get_json()['message'].startswith('无效的课程ID')
+
+def test_batch_book_and_cancel_accept_integers_and_digit_strings(client, create_user, auth_headers, create_course):
+    create_user('batch_digits')
+    course_id = create_course(name='批量测试')
+
+    headers = auth_headers('batch_digits')
+    data = client.post('/api/courses/batch/book', headers=headers, json={'courseIds': [course_id, str(course_id)]}).get_json()['data']
+    assert data['bookedCount'] == 1
+    data = client.post('/api/courses/batch/cancel', headers=headers, json={'courseIds': [str(course_id)]}).get_json()['data']
+    assert data['canceledCount'] == 1
+
+def test_batch_cancel_rejects_deleted_user(app, client, create_user, auth_headers):
+    """与单个取消一致，令牌对应的用户已被删除时返回404"""
+    user_id = create_user('batch_deleted')
+    headers = auth_headers('batch_deleted')
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+    response = client.post('/api/courses/batch/cancel', headers=headers, json={'courseIds': [1]})
+    assert response.status_code == 404
@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+def test_bulk_booking_status_by_ids_and_week(client, create_user, auth_headers, create_course):
+    """一次返回多门课程的预订状态，不存在的课程不出现在结果中"""
+    create_user('status_member')
+    course_date = date.today() + timedelta(days=21)
+    booked = create_course(name='状态已约', course_date=course_date)
+    free = create_course(name='状态未约', course_date=course_date)
+    headers = auth_headers('status_member')
+    assert client.post(f'/api/courses/{booked}/book', headers=headers).status_code == 201
+
+    response = client.get(f'/api/users/booking-status?courseIds={booked},{free},999999', headers=headers)
+    assert response.status_code == 200
+    statuses = {item['courseId']: item for item in response.get_json()['data']}
+    assert set(statuses) == {booked, free}
+    assert statuses[booked]['status'] == 'confirmed' and 'bookingId' in statuses[booked]
+    assert statuses[free]['status'] == 'not_booked'
+
+    week = client.get(f'/api/users/booking-status?date={course_date.isoformat()}', headers=headers).get_json()['data']
+    assert {booked, free} <= {item['courseId'] for item in week}
+
+def test_bulk_booking_status_rejects_bad_parameters(client, create_user, auth_headers):
+    create_user('status_invalid')
+    headers = auth_headers('status_invalid')
+    assert client.get('/api/users/booking-status', headers=headers).status_code == 400
+    assert client.get('/api/users/booking-status?courseIds=1,abc', headers=headers).status_code == 400
+    assert client.get('/api/users/booking-status?date=2025-13-01', headers=headers).status_code == 400
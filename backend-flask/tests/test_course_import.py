@@ -0,0 +1,21 @@
+from datetime import date
+import pytest
+from app.utils.course_import import _expand_weekly
+
+START = date(2025, 10, 6)
+
+def test_weekly_rule_expands_forward():
+    assert _expand_weekly(START, 'FREQ=WEEKLY;INTERVAL=2;COUNT=3', set()) == [
+        date(2025, 10, 6), date(2025, 10, 20), date(2025, 11, 3)
+    ]
+
+@pytest.mark.parametrize('rule', [
+    'FREQ=WEEKLY;INTERVAL=0;COUNT=4',
+    'FREQ=WEEKLY;INTERVAL=-1;COUNT=4',
+    'FREQ=WEEKLY;INTERVAL=x;COUNT=4',
+    'FREQ=WEEKLY;COUNT=0',
+    'FREQ=WEEKLY;COUNT=-3',
+])
+def test_non_positive_interval_or_count_is_rejected(rule):
+    with pytest.raises(ValueError, match='必须是正整数'):
+        _expand_weekly(START, rule, set())
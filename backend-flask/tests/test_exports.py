@@ -0,0 +1,13 @@
+import csv
+from app.utils.exports import _CsvSink
+
+def test_csv_cells_starting_with_formula_characters_are_escaped(tmp_path):
+    """会员填写的姓名以 = + - @ 开头时，Excel 打开导出的CSV不能把它当公式执行"""
+    path = tmp_path / 'report.csv'
+    sink = _CsvSink(path)
+    sink.write_row(['=HYPERLINK("http://x","点我")', '+1', '-2+3', '@SUM(A1)', '张三', -5, 0.5])
+    sink.close()
+
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        row = next(csv.reader(f))
+    assert row == ['\'=HYPERLINK("http://x","点我")', "'+1", "'-2+3", "'@SUM(A1)", '张三', '-5', '0.5']
@@ -0,0 +1,30 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+from app.utils.ical import course_event
+
+def _course(**fields):
+    values = dict(
+        id=1, name='Breaking 基础', instructor='教练', location='体育馆', description=None, dance_type=None,
+        course_date=date(2025, 9, 1), time_slot='18:00-19:30',
+        created_at=datetime(2025, 8, 1), updated_at=None
+    )
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+def test_course_times_are_written_in_utc():
+    """课程时间换算为UTC输出，不使用需要 VTIMEZONE 的 TZID"""
+    event = course_event(_course(), 'Asia/Shanghai')
+    assert 'DTSTART:20250901T100000Z\r\n' in event
+    assert 'DTEND:20250901T113000Z\r\n' in event
+    assert 'TZID' not in event
+
+def test_utc_conversion_follows_daylight_saving():
+    summer = course_event(_course(course_date=date(2025, 7, 1)), 'Europe/Berlin')
+    winter = course_event(_course(course_date=date(2025, 12, 1)), 'Europe/Berlin')
+    assert 'DTSTART:20250701T160000Z' in summer
+    assert 'DTSTART:20251201T170000Z' in winter
+
+def test_invalid_time_slot_is_all_day_event():
+    event = course_event(_course(time_slot='待定'), 'Asia/Shanghai')
+    assert 'DTSTART;VALUE=DATE:20250901' in event
+    assert 'DTEND;VALUE=DATE:20250902' in event
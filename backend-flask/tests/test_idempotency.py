@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.course import Booking
+from app.models.idempotency import IdempotencyKey
+from app.utils import idempotency
+
+def test_replay_returns_stored_response_without_running_the_view(app, client, create_user, auth_headers, create_course):
+    """同一个键重放时返回第一次的响应，不会再次预订"""
+    user_id = create_user('idem_replay')
+    course_id = create_course(name='幂等重放')
+    headers = dict(auth_headers('idem_replay'), **{'Idempotency-Key': 'replay-1'})
+
+    first = client.post(f'/api/courses/{course_id}/book', headers=headers)
+    assert first.status_code == 201
+    with app.app_context():
+        record = IdempotencyKey.query.filter_by(user_id=user_id, key='replay-1').one()
+        assert record.applied_at is not None and record.response_status == 201
+
+    # 清空进程内缓存，确认从数据库读取保存的响应
+    idempotency._responses.clear()
+    replay = client.post(f'/api/courses/{course_id}/book', headers=headers)
+    assert replay.status_code == 201
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.get_json() == first.get_json()
+
+    other = client.post(f'/api/courses/{course_id + 1}/book', headers=headers)
+    assert other.status_code == 422
+
+def test_committed_request_without_saved_response_is_not_rerun(app, client, create_user, auth_headers, create_course):
+    """写入已提交、响应未保存（进程在两次提交之间退出）时，超时后的重试也不重新执行"""
+    user_id = create_user('idem_crash')
+    course_id = create_course(name='幂等崩溃')
+    headers = dict(auth_headers('idem_crash'), **{'Idempotency-Key': 'crash-1'})
+    assert client.post(f'/api/courses/{course_id}/book', headers=headers).status_code == 201
+
+    with app.app_context():
+        IdempotencyKey.query.filter_by(user_id=user_id, key='crash-1').update({
+            'response_status': None,
+            'response_body': None,
+            'created_at': datetime.utcnow() - idempotency.PENDING_TIMEOUT - timedelta(seconds=1)
+        })
+        db.session.commit()
+    idempotency._responses.clear()
+
+    retry = client.post(f'/api/courses/{course_id}/book', headers=headers)
+    assert retry.status_code == 409
+    assert '已经执行' in retry.get_json()['message']
+    with app.app_context():
+        assert Booking.query.filter_by(user_id=user_id, course_id=course_id).count() == 1
+
+def test_stale_reservation_without_writes_is_rerun(app, client, create_user, auth_headers, create_course):
+    """从未提交过写入的预留在超时后删除，重试正常执行"""
+    user_id = create_user('idem_stale')
+    course_id = create_course(name='幂等超时')
+    with app.test_request_context(f'/api/courses/{course_id}/book', method='POST'):
+        fingerprint = idempotency._fingerprint()
+    with app.app_context():
+        db.session.add(IdempotencyKey(
+            user_id=user_id, key='stale-1', fingerprint=fingerprint,
+            created_at=datetime.utcnow() - idempotency.PENDING_TIMEOUT - timedelta(seconds=1),
+            expires_at=datetime.utcnow() + timedelta(hours=1)
+        ))
+        db.session.commit()
+
+    headers = dict(auth_headers('idem_stale'), **{'Idempotency-Key': 'stale-1'})
+    response = client.post(f'/api/courses/{course_id}/book', headers=headers)
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
@@ -0,0 +1,27 @@
+from datetime import date
+from app import db
+from app.models.course import Course, Booking
+
+def test_deleted_course_and_booking_ids_are_not_reused(app):
+    """归档、清理墓碑会物理删除课程和预订，新记录不能拿到被删除的最大ID"""
+    with app.app_context():
+        course = Course(name='ID测试', instructor='教练', location='ID馆', course_date=date(2025, 9, 1), time_slot='18:00-19:30')
+        db.session.add(course)
+        db.session.flush()
+        booking = Booking(user_id=1, course_id=course.id)
+        db.session.add(booking)
+        db.session.commit()
+        course_id, booking_id = course.id, booking.id
+
+        db.session.execute(db.delete(Booking).where(Booking.id == booking_id))
+        db.session.execute(db.delete(Course).where(Course.id == course_id))
+        db.session.commit()
+
+        course = Course(name='ID测试2', instructor='教练', location='ID馆', course_date=date(2025, 9, 2), time_slot='18:00-19:30')
+        db.session.add(course)
+        db.session.flush()
+        booking = Booking(user_id=1, course_id=course.id)
+        db.session.add(booking)
+        db.session.commit()
+        assert course.id > course_id
+        assert booking.id > booking_id
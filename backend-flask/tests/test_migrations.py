@@ -0,0 +1,52 @@
+from sqlalchemy import text
+from app import db
+from app.utils.migrations import run_migrations, pending_migrations
+
+CREATE_PROBE = '''"""创建测试表"""
+
+def upgrade(migration):
+    migration.execute('CREATE TABLE IF NOT EXISTS migration_probe (id INTEGER PRIMARY KEY, name TEXT)')
+    if not migration.dry_run:
+        migration.execute("INSERT INTO migration_probe (name) SELECT 'Row' || value FROM json_each('[1,2,3,4,5,6,7]') "
+                          "WHERE NOT EXISTS (SELECT 1 FROM migration_probe)")
+'''
+
+ADD_SLUG = '''"""添加并回填 slug 字段"""
+
+def upgrade(migration):
+    migration.add_column('migration_probe', 'slug', 'TEXT')
+    migration.create_index('ix_migration_probe_slug', 'migration_probe', ['slug'])
+    migration.backfill('migration_probe', 'slug IS NULL', update='slug = lower(name)')
+'''
+
+def _slugs():
+    return [slug for slug, in db.session.execute(text('SELECT slug FROM migration_probe ORDER BY id'))]
+
+def test_runner_applies_in_order_and_is_idempotent_on_rerun(app, tmp_path):
+    """迁移按版本号执行并记录；重新执行时跳过已执行的版本，中途失败后从未完成的部分继续"""
+    (tmp_path / '9001_create_probe.py').write_text(CREATE_PROBE, encoding='utf-8')
+    (tmp_path / '9002_add_probe_slug.py').write_text(ADD_SLUG, encoding='utf-8')
+    directory = str(tmp_path)
+
+    with app.app_context():
+        assert run_migrations(dry_run=True, target='9001', directory=directory)[0]['version'] == '9001'
+        assert [migration.version for migration in pending_migrations(directory)] == ['9001', '9002']
+
+        messages = []
+        executed = run_migrations(batch_size=3, pause=0, directory=directory, log=messages.append)
+        assert [migration['version'] for migration in executed] == ['9001', '9002']
+        assert _slugs() == [f'row{i}' for i in range(1, 8)]
+        assert 'migration_probe 已回填 7 行' in messages
+        assert pending_migrations(directory) == []
+        assert run_migrations(directory=directory) == []
+
+        # 模拟 9002 在回填途中失败：版本未记录，部分行尚未回填
+        db.session.execute(text("DELETE FROM schema_migrations WHERE version = '9002'"))
+        db.session.execute(text('UPDATE migration_probe SET slug = NULL WHERE id > 5'))
+        db.session.commit()
+        messages = []
+        executed = run_migrations(batch_size=3, pause=0, directory=directory, log=messages.append)
+        assert [migration['version'] for migration in executed] == ['9002']
+        assert 'migration_probe.slug 列已存在，跳过' in messages
+        assert 'migration_probe 已回填 2 行' in messages
+        assert _slugs() == [f'row{i}' for i in range(1, 8)]
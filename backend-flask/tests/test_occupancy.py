@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from app.utils.occupancy import compute_occupancy_stats
+
+def _course(course_id, course_date, time_slot='19:00-20:30', capacity=2, dance_type='breaking'):
+    return (course_id, dance_type, course_date, time_slot, capacity, datetime(2025, 9, 1, 0, 0))
+
+def test_lead_hours_convert_local_course_start_to_utc():
+    """上课时间是北京时间，预约时间是UTC：19:00 开始的课（11:00 UTC）提前 28.5 小时预约"""
+    stats = compute_occupancy_stats(
+        [_course(1, date(2025, 9, 10))],
+        [(1, datetime(2025, 9, 9, 6, 30))],
+        'Asia/Shanghai'
+    )
+    assert stats['velocity']['leadHoursBeforeStart']['percentiles'] == {'p10': 28.5, 'p25': 28.5, 'p50': 28.5, 'p75': 28.5}
+
+def test_fill_rate_and_time_to_fill():
+    stats = compute_occupancy_stats(
+        [_course(1, date(2025, 9, 10)), _course(2, date(2025, 9, 11), dance_type=None)],
+        [(1, datetime(2025, 9, 1, 1)), (1, datetime(2025, 9, 1, 3)), (2, datetime(2025, 9, 2)), (99, datetime(2025, 9, 2))],
+        'Asia/Shanghai'
+    )
+    assert stats['bookingCount'] == 3
+    assert stats['fillRate']['mean'] == 0.75
+    assert {row['danceType']: row['avgFillRate'] for row in stats['byDanceType']} == {'breaking': 1.0, 'public': 0.5}
+    assert stats['velocity']['timeToFill'] == {'fullCourseCount': 1, 'percentiles': {'p50': 3.0, 'p90': 3.0}}
+
+def test_empty_semester():
+    stats = compute_occupancy_stats([], [], 'Asia/Shanghai')
+    assert stats['courseCount'] == 0
+    assert stats['fillRate']['mean'] is None
+
+def test_leader_without_dance_type_only_sees_public_courses(client, create_user, auth_headers):
+    """未设置舞种的领队不能拿到全社或其他舞种的统计"""
+    create_user('occupancy_leader_null', role='leader')
+    headers = auth_headers('occupancy_leader_null')
+
+    response = client.get('/api/analytics/occupancy', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['data']['danceType'] == 'public'
+    assert client.get('/api/analytics/occupancy?danceType=breaking', headers=headers).status_code == 403
@@ -0,0 +1,36 @@
+import threading
+import time
+from app.utils import passwords
+from app.utils.passwords import password_hasher
+
+def _hash_with_cost(rounds):
+    return f'$2b${rounds:02d}$' + 'a' * 53
+
+def test_rehash_only_when_stored_cost_is_below_policy(app):
+    """只在存储的 cost 低于当前策略时重新哈希，不会把更高的 cost 降下来"""
+    with app.app_context():
+        policy = password_hasher.rounds()
+        assert password_hasher.needs_rehash(_hash_with_cost(policy - 1))
+        assert not password_hasher.needs_rehash(_hash_with_cost(policy))
+        assert not password_hasher.needs_rehash(_hash_with_cost(policy + 1))
+
+def test_import_hashing_shares_the_bounded_pool_and_caps_its_threads(app, monkeypatch):
+    """后台导入的哈希走登录共用的线程池，同时占用的线程不超过上限，结果按输入顺序返回"""
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_hash(password, rounds):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return f'hash-{password}'
+
+    monkeypatch.setattr(passwords, 'hash_password', fake_hash)
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 4)
+    with app.app_context():
+        hashes = password_hasher.hash_many([str(i) for i in range(12)], 4, max_in_flight=2)
+    assert hashes == [f'hash-{i}' for i in range(12)]
+    assert peak[0] == 2
@@ -0,0 +1,48 @@
+import json
+from app import db
+from app.models.course import Booking
+from app.models.projections import CourseSummary, mark_courses_changed, rebuild_course_summaries
+from app.models.user import User
+
+def test_summary_follows_bookings_renames_and_deletes(app, client, create_user, auth_headers, create_course):
+    """预订、改名和删除课程在同一事务中刷新摘要行"""
+    user_id = create_user('projection_member')
+    create_user('projection_admin', role='admin')
+    course_id = create_course(name='读模型')
+    assert client.post(f'/api/courses/{course_id}/book', headers=auth_headers('projection_member')).status_code == 201
+
+    with app.app_context():
+        summary = db.session.get(CourseSummary, course_id)
+        assert summary.booked_count == 1
+        assert [user['id'] for user in json.loads(summary.roster)] == [user_id]
+
+        db.session.get(User, user_id).name = '改名后'
+        db.session.commit()
+        assert json.loads(db.session.get(CourseSummary, course_id).roster)[0]['name'] == '改名后'
+
+        # 批量删除不经过ORM对象，需显式标记
+        Booking.query.filter_by(course_id=course_id).delete()
+        mark_courses_changed([course_id])
+        db.session.commit()
+        assert db.session.get(CourseSummary, course_id).booked_count == 0
+
+    assert client.delete(f'/api/admin/courses/{course_id}', headers=auth_headers('projection_admin')).status_code == 200
+    with app.app_context():
+        assert db.session.get(CourseSummary, course_id) is None
+
+def test_rebuild_restores_drifted_summaries(app, create_user, create_course):
+    user_id = create_user('projection_rebuild')
+    course_id = create_course(name='读模型重建')
+    with app.app_context():
+        db.session.add(Booking(user_id=user_id, course_id=course_id, status='confirmed'))
+        db.session.commit()
+        db.session.execute(CourseSummary.__table__.update().where(
+            CourseSummary.course_id == course_id
+        ).values(booked_count=99, roster='[]'))
+        db.session.commit()
+
+        assert rebuild_course_summaries(batch_size=2) > 0
+        db.session.commit()
+        summary = db.session.get(CourseSummary, course_id)
+        assert summary.booked_count == 1
+        assert [user['id'] for user in json.loads(summary.roster)] == [user_id]
@@ -0,0 +1,55 @@
+import threading
+from app.api import recommendations as recommendations_api
+from app.utils.recommendations import RecommendationIndex
+
+def test_limit_is_clamped_to_top_k(app, client, monkeypatch, create_user, auth_headers, create_course):
+    """limit 缺省、非法或过大时都不超过 RECOMMENDATION_TOP_K"""
+    monkeypatch.setattr(recommendations_api, 'recommendation_index', RecommendationIndex())
+    monkeypatch.setitem(app.config, 'RECOMMENDATION_TOP_K', 3)
+    create_user('recommend_clamp')
+    for i in range(5):
+        create_course(name=f'推荐截断{i}')
+
+    headers = auth_headers('recommend_clamp')
+    for query in ('', '?limit=abc', '?limit=-1', '?limit=50'):
+        response = client.get(f'/api/courses/recommended{query}', headers=headers)
+        assert response.status_code == 200
+        assert len(response.get_json()['data']) == 3
+    assert len(client.get('/api/courses/recommended?limit=2', headers=headers).get_json()['data']) == 2
+
+def test_index_rebuilds_in_background_and_serves_stale_state(app, client, create_user, auth_headers, create_course):
+    """已有索引时重建在后台进行，完成前读取旧的索引"""
+    index = RecommendationIndex()
+    create_user('recommend_a')
+    reader_id = create_user('recommend_b')
+    first = create_course(name='共现甲', dance_type='hiphop')
+    paired = create_course(name='共现乙', dance_type='hiphop')
+    upcoming = create_course(name='共现乙', dance_type='hiphop')
+    with app.app_context():
+        assert index.ensure_fresh(app, 0, 20, 28) is None
+    assert all(score == 0 for _, score in index.recommend(reader_id, 20))
+
+    a, b = auth_headers('recommend_a'), auth_headers('recommend_b')
+    assert client.post(f'/api/courses/{first}/book', headers=a).status_code == 201
+    assert client.post(f'/api/courses/{paired}/book', headers=a).status_code == 201
+    assert client.post(f'/api/courses/{first}/book', headers=b).status_code == 201
+
+    release = threading.Event()
+    build = index._build
+    def slow_build(top_k, horizon_days):
+        release.wait(5)
+        build(top_k, horizon_days)
+    index._build = slow_build
+
+    with app.app_context():
+        future = index.ensure_fresh(app, 0, 20, 28)
+        assert future is not None
+        # 重建进行中不会重复启动
+        assert index.ensure_fresh(app, 0, 20, 28) is None
+    assert all(score == 0 for _, score in index.recommend(reader_id, 20))
+
+    release.set()
+    future.result(timeout=5)
+    scores = {course['id']: score for course, score in index.recommend(reader_id, 20)}
+    assert scores[upcoming] > 0 and scores[paired] > 0
+    assert first not in scores
@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+def _free(client, headers, day, min_duration=60):
+    response = client.get(
+        f'/api/admin/rooms/availability?from={day}&to={day}&locations=位图馆&minDuration={min_duration}&window=08:00-22:00',
+        headers=headers
+    )
+    assert response.status_code == 200
+    [location] = response.get_json()['data']['locations']
+    return [(interval['start'], interval['end']) for interval in location['days'][0]['free']]
+
+def test_free_intervals_follow_course_writes(client, create_user, auth_headers, create_course):
+    """空闲区间由课程占用位图计算，课程删除后增量释放"""
+    create_user('rooms_admin', role='admin')
+    headers = auth_headers('rooms_admin')
+    day = date.today() + timedelta(days=60)
+
+    assert _free(client, headers, day) == [('08:00', '22:00')]
+    course_id = create_course(name='位图课', location='位图馆', course_date=day, time_slot='10:00-11:30')
+    assert _free(client, headers, day) == [('08:00', '10:00'), ('11:30', '22:00')]
+    assert _free(client, headers, day, min_duration=150) == [('11:30', '22:00')]
+
+    assert client.delete(f'/api/admin/courses/{course_id}', headers=headers).status_code == 200
+    assert _free(client, headers, day) == [('08:00', '22:00')]
+
+def test_room_availability_requires_admin_or_leader(client, create_user, auth_headers):
+    create_user('rooms_member')
+    assert client.get('/api/admin/rooms/availability', headers=auth_headers('rooms_member')).status_code == 403
@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+def _courses(schedule):
+    return {course['id']: course for day in schedule for course in day['courses']}
+
+def test_personal_schedule_marks_own_bookings_without_rosters(client, create_user, auth_headers, create_course):
+    """共享的周课表缓存在预订后失效，每个用户只看到自己的 bookedByMe"""
+    create_user('schedule_me_booker')
+    create_user('schedule_me_viewer')
+    course_date = date.today() + timedelta(days=35)
+    course_id = create_course(name='个人课表', course_date=course_date, max_capacity=5)
+    booker, viewer = auth_headers('schedule_me_booker'), auth_headers('schedule_me_viewer')
+    url = f'/api/schedule/me?date={course_date.isoformat()}'
+
+    course = _courses(client.get(url, headers=viewer).get_json()['data']['schedule'])[course_id]
+    assert course['bookedCount'] == 0 and not course['bookedByMe']
+
+    assert client.post(f'/api/courses/{course_id}/book', headers=booker).status_code == 201
+    mine = _courses(client.get(url, headers=booker).get_json()['data']['schedule'])[course_id]
+    theirs = _courses(client.get(url, headers=viewer).get_json()['data']['schedule'])[course_id]
+    assert mine['bookedByMe'] and not theirs['bookedByMe']
+    assert mine['bookedCount'] == theirs['bookedCount'] == 1
+    assert theirs['remaining'] == 4
+    assert 'bookedBy' not in theirs
+
+    assert client.get(url).status_code == 401
+
+def test_availability_map_tracks_bookings_and_supports_etags(client, create_user, auth_headers, create_course):
+    """剩余座位表随预订和删除课程更新，内容不变时按 ETag 返回304"""
+    create_user('availability_member')
+    create_user('availability_admin', role='admin')
+    course_date = date.today() + timedelta(days=49)
+    course_id = create_course(name='余座轮询', course_date=course_date, max_capacity=3)
+    url = f'/api/schedule/availability?from={course_date.isoformat()}&to={course_date.isoformat()}'
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.get_json()['data'][str(course_id)] == 3
+    etag = first.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    assert client.post(f'/api/courses/{course_id}/book', headers=auth_headers('availability_member')).status_code == 201
+    second = client.get(url, headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.get_json()['data'][str(course_id)] == 2
+
+    assert client.delete(f'/api/admin/courses/{course_id}', headers=auth_headers('availability_admin')).status_code == 200
+    assert str(course_id) not in client.get(url).get_json()['data']
+
+def test_availability_rejects_ranges_over_the_limit(client):
+    start = date.today()
+    assert client.get(f'/api/schedule/availability?from={start}&to={start + timedelta(days=62)}').status_code == 400
+    assert client.get(f'/api/schedule/availability?from={start}&to={start - timedelta(days=1)}').status_code == 400
+
+def test_range_schedule_groups_every_day_across_weeks(client, create_course):
+    """区间课表跨多周一次返回，每天一组（包括没有课程的日期），组内按时间排序"""
+    start = date.today() + timedelta(days=90)
+    late = create_course(name='区间晚课', course_date=start, time_slot='20:00-21:00')
+    early = create_course(name='区间早课', course_date=start, time_slot='09:00-10:00')
+    later_week = create_course(name='区间下周', course_date=start + timedelta(days=10))
+    end = start + timedelta(days=13)
+
+    response = client.get(f'/api/schedule/range?from={start}&to={end}')
+    assert response.status_code == 200
+    schedule = response.get_json()['data']['schedule']
+    assert [day['date'] for day in schedule] == [(start + timedelta(days=i)).isoformat() for i in range(14)]
+
+    first_day = [course['id'] for course in schedule[0]['courses']]
+    assert first_day.index(early) < first_day.index(late)
+    assert later_week in [course['id'] for course in schedule[10]['courses']]
+    assert all('bookedBy' not in course for day in schedule for course in day['courses'])
+
+def test_range_schedule_is_capped_at_a_semester(client):
+    start = date.today()
+    assert client.get(f'/api/schedule/range?from={start}&to={start + timedelta(days=140)}').status_code == 400
+    assert client.get(f'/api/schedule/range?from={start}&to={start + timedelta(days=139)}').status_code == 200
+    assert client.get(f'/api/schedule/range?from={start}').status_code == 400
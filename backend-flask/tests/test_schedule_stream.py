@@ -0,0 +1,28 @@
+import json
+from datetime import date, timedelta
+from app import db
+from app.models.course import Booking
+
+def test_stream_snapshot_is_not_served_from_stale_schedule_cache(app, client, create_user, auth_headers, create_course):
+    """SSE 快照直接查询数据库，其他worker提交的变化（本进程缓存尚未失效）也能反映出来"""
+    course_date = date.today() + timedelta(days=14)
+    user_id = create_user('stream_member')
+    course_id = create_course(name='推送测试', location='推送馆', course_date=course_date)
+
+    # 填充本进程的课表缓存
+    headers = auth_headers('stream_member')
+    assert client.get(f'/api/schedule/me?date={course_date.isoformat()}', headers=headers).status_code == 200
+
+    # 模拟另一个worker提交的预订：直接写库，不清除本进程缓存
+    with app.app_context():
+        db.session.add(Booking(user_id=user_id, course_id=course_id, status='confirmed'))
+        db.session.commit()
+
+    response = client.get(f'/api/schedule/stream?date={course_date.isoformat()}', buffered=False)
+    try:
+        message = next(iter(response.response)).decode('utf-8')
+    finally:
+        response.close()
+    assert message.startswith('event: snapshot')
+    snapshot = json.loads(message.split('data: ', 1)[1])
+    assert snapshot['courses'][str(course_id)]['bookedCount'] == 1
@@ -0,0 +1,17 @@
+from app.utils import search
+
+def test_search_falls_back_to_like_without_trigram_tokenizer(app, client, create_user, auth_headers, monkeypatch):
+    """SQLite 不支持 trigram 分词器时不创建索引，搜索改用 LIKE 而不是返回500"""
+    create_user('search_admin', role='admin')
+    create_user('search_target_user')
+    monkeypatch.setattr(search, 'TOKENIZER', 'no_such_tokenizer')
+    monkeypatch.setattr(search, '_fts_available', {})
+    with app.app_context():
+        search.ensure_search_index()
+        assert not search.fts_enabled()
+
+    headers = auth_headers('search_admin')
+    response = client.get('/api/users/search?q=target_user', headers=headers)
+    assert response.status_code == 200
+    assert [user['username'] for user in response.get_json()['data']['items']] == ['search_target_user']
+    assert client.get('/api/admin/courses/search?q=不存在的课程', headers=headers).status_code == 200
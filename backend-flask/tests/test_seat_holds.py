@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.course import Course, SeatHold
+
+def test_capacity_check_counts_live_holds_and_ignores_expired_ones(app, client, create_user, auth_headers, create_course):
+    """有效保留占用座位；过期保留在计数时忽略，容量检查不删除也不写入"""
+    create_user('hold_first')
+    create_user('hold_second')
+    course_id = create_course(name='保留测试', max_capacity=1)
+
+    first, second = auth_headers('hold_first'), auth_headers('hold_second')
+    assert client.post(f'/api/courses/{course_id}/hold', headers=first).status_code == 201
+    assert client.post(f'/api/courses/{course_id}/book', headers=second).get_json()['message'] == '课程已满员'
+    # 持有保留的用户不受自己的保留影响
+    assert client.post(f'/api/courses/{course_id}/book', headers=first).status_code == 201
+    assert client.delete(f'/api/courses/{course_id}/cancel', headers=first).status_code == 200
+
+    assert client.post(f'/api/courses/{course_id}/hold', headers=first).status_code == 201
+    with app.app_context():
+        SeatHold.query.filter_by(course_id=course_id).update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        assert Course.count_taken_seats(course_id) == 0
+        assert SeatHold.query.filter_by(course_id=course_id).count() == 1
+
+    assert client.post(f'/api/courses/{course_id}/book', headers=second).status_code == 201
+    with app.app_context():
+        assert Course.count_taken_seats(course_id) == 1
@@ -0,0 +1,49 @@
+def test_other_users_booking_changes_course_seat_counts_in_delta_sync(client, create_user, auth_headers, create_course):
+    """其他用户预订或取消后，增量同步应重新下发课程的已预订数"""
+    create_user('sync_reader')
+    create_user('sync_booker')
+    course_id = create_course(name='同步测试', location='同步馆')
+
+    reader, booker = auth_headers('sync_reader'), auth_headers('sync_booker')
+    cursor = client.get('/api/sync', headers=reader).get_json()['data']['cursor']
+
+    assert client.post(f'/api/courses/{course_id}/book', headers=booker).status_code == 201
+    data = client.get(f'/api/sync?since={cursor}', headers=reader).get_json()['data']
+    synced = {course['id']: course for course in data['courses']}
+    assert synced[course_id]['bookedCount'] == 1
+
+    assert client.delete(f'/api/courses/{course_id}/cancel', headers=booker).status_code == 200
+    data = client.get(f"/api/sync?since={data['cursor']}", headers=reader).get_json()['data']
+    synced = {course['id']: course for course in data['courses']}
+    assert synced[course_id]['bookedCount'] == 0
+
+def test_full_snapshot_is_paged_and_followed_by_changes_made_during_it(app, client, monkeypatch, create_user, auth_headers, create_course):
+    """全量快照按 SYNC_PAGE_SIZE 分页，快照期间删除的课程在之后的增量同步中以墓碑返回"""
+    monkeypatch.setitem(app.config, 'SYNC_PAGE_SIZE', 2)
+    create_user('sync_snapshot')
+    create_user('sync_snapshot_admin', role='admin')
+    course_ids = [create_course(name=f'快照分页{i}') for i in range(5)]
+    reader, admin = auth_headers('sync_snapshot'), auth_headers('sync_snapshot_admin')
+
+    data = client.get('/api/sync', headers=reader).get_json()['data']
+    assert data['full'] and data['hasMore'] and len(data['courses']) == 2
+    cursor, seen, pages, deleted = data['cursor'], set(), 1, None
+    while True:
+        seen.update(course['id'] for course in data['courses'])
+        # 已下发的课程在快照期间被删除
+        if deleted is None and seen & set(course_ids):
+            deleted = min(seen & set(course_ids))
+            assert client.delete(f'/api/admin/courses/{deleted}', headers=admin).status_code == 200
+        if not data['hasMore']:
+            break
+        data = client.get(
+            f"/api/sync?since={cursor}&snapshotAfter={data['snapshotAfter']}", headers=reader
+        ).get_json()['data']
+        assert not data['full'] and data['cursor'] == cursor and len(data['courses']) <= 2
+        pages += 1
+    assert pages > 2
+    assert set(course_ids) - {deleted} <= seen
+
+    data = client.get(f'/api/sync?since={cursor}', headers=reader).get_json()['data']
+    tombstones = {course['id'] for course in data['courses'] if course['deleted']}
+    assert deleted in tombstones
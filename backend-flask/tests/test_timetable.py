@@ -0,0 +1,46 @@
+import pytest
+from app.utils.timetable import TimetableProblem, generate_tight_benchmark_problem
+
+def _problem(classes, locations=('排练室1',)):
+    return TimetableProblem.from_dict({
+        'startDate': '2025-09-01',
+        'endDate': '2025-12-31',
+        'locations': list(locations),
+        'classes': classes
+    }, '08:00-22:00', 15)
+
+def test_search_depth_is_not_limited_by_recursion():
+    """课程数超过Python递归深度时也能排完"""
+    locations = [f'排练室{i}' for i in range(150)]
+    classes = [{'name': f'课程{i}', 'duration': 60, 'locations': [locations[i % 150]]} for i in range(1000)]
+    solution = _problem(classes, locations).solve(30)
+    assert solution['complete']
+    assert len(solution['assignment']) == 1000
+
+def test_tight_problem_needs_backtracking():
+    solution = generate_tight_benchmark_problem(seed=2, classes=100, rooms=6).solve(10)
+    assert solution['complete']
+    assert solution['nodes'] > 100
+
+@pytest.mark.parametrize('leader_id', ['abc', 1.5, True, {'id': 1}])
+def test_invalid_leader_id_is_rejected(leader_id):
+    with pytest.raises(ValueError, match='领队ID无效'):
+        _problem([{'name': '课程', 'leaderId': leader_id}])
+
+@pytest.mark.parametrize('item, message', [
+    ({'locations': '排练室1'}, '地点必须是字符串列表'),
+    ({'locations': [['排练室1']]}, '地点必须是字符串列表'),
+    ({'instructor': ['教练甲']}, '教练必须是字符串'),
+    ({'instructor': {'name': '教练甲'}}, '教练必须是字符串')
+])
+def test_malformed_locations_and_instructor_are_rejected(item, message):
+    with pytest.raises(ValueError, match=message):
+        _problem([dict(item, name='课程')])
+
+def test_non_string_problem_locations_are_rejected():
+    with pytest.raises(ValueError, match='可用地点列表'):
+        _problem([{'name': '课程'}], locations=[{'name': '排练室1'}])
+
+def test_numeric_string_leader_id_is_accepted():
+    problem = _problem([{'name': '课程', 'leaderId': '3'}])
+    assert problem.classes[0]['leaderId'] == 3
@@ -0,0 +1,45 @@
+import time
+from app.models.user import User
+
+def _wait_for_job(client, headers, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/api/users/import/{job_id}', headers=headers).get_json()['data']
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'导入任务 {job_id} 未在 {timeout} 秒内完成')
+
+def test_import_runs_as_background_job(client, create_user, auth_headers):
+    """导入请求只创建任务并返回202，哈希和插入在后台完成，报告通过任务查询"""
+    create_user('import_admin', role='admin')
+    headers = auth_headers('import_admin')
+    lines = ['username,name,email,password,role,dance_type']
+    lines += [f'bg{i},新生{i},bg{i}@example.com,password{i},,' for i in range(20)]
+    lines.append('bg0,重复,bg-dup@example.com,password,,')
+
+    response = client.post('/api/users/import', headers=headers, data='\n'.join(lines).encode(), content_type='text/csv')
+    assert response.status_code == 202
+    job = response.get_json()['data']
+    assert job['status'] == 'pending'
+    assert job['totalRows'] == 21
+
+    job = _wait_for_job(client, headers, job['id'])
+    assert job['status'] == 'completed'
+    assert job['processedRows'] == job['validRows'] == 20
+    assert job['result']['created'] == 20
+    assert [error['line'] for error in job['result']['errors']] == [22]
+
+    login = client.post('/api/auth/login', json={'username': 'bg7', 'password': 'password7'})
+    assert login.status_code == 200
+
+def test_dry_run_returns_report_directly(app, client, create_user, auth_headers):
+    create_user('import_admin_dry', role='admin')
+    headers = auth_headers('import_admin_dry')
+    data = 'username,name,email,password\ndry1,试运行,dry1@example.com,password\n'.encode()
+
+    response = client.post('/api/users/import?dryRun=true', headers=headers, data=data, content_type='text/csv')
+    assert response.status_code == 200
+    assert response.get_json()['data']['created'] == 1
+    with app.app_context():
+        assert User.query.filter_by(username='dry1').first() is None
@@ -5,7 +5,7 @@ import { useAuth } from '@/context/AuthContext';
 import CourseForm from '@/components/CourseForm';
 import CourseCard from '@/components/CourseCard';
 import { Course, CourseFormData, User } from '@/types';
-import api from '@/services/api';
+import api, { IdempotencyKeys, isNetworkError } from '@/services/api';
 
 const AdminCourses = () => {
     const { user } = useAuth();
@@ -18,6 +18,8 @@ const AdminCourses = () => {
     const [isCreateModalOpen, setIsCreateModalOpen] = useState(false);
     const [isEditModalOpen, setIsEditModalOpen] = useState(false);
     const [currentCourse, setCurrentCourse] = useState<Course | null>(null);
+    // 创建课程提交的幂等键，网络出错后重新提交相同内容时沿用，不会重复创建
+    const [createKeys] = useState(() => new IdempotencyKeys());
 
     // 加载数据
     useEffect(() => {
@@ -49,12 +51,16 @@ const AdminCourses = () => {
     // 创建课程
     const handleCreateCourse = async (data: CourseFormData) => {
         try {
-            const response = await api.adminCourses.createCourse(data);
+            const response = await api.adminCourses.createCourse(data, createKeys.get('create', data));
+            createKeys.settle('create');
             if (response.success && response.data) {
                 setCourses(prev => [...prev, response.data]);
                 setIsCreateModalOpen(false);
             }
         } catch (err) {
+            if (!isNetworkError(err)) {
+                createKeys.settle('create');
+            }
             throw err;
         }
     };
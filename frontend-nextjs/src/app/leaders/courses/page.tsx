@@ -5,7 +5,7 @@ import { useAuth } from '@/context/AuthContext';
 import CourseForm from '@/components/CourseForm';
 import CourseCard from '@/components/CourseCard';
 import { Course, CourseFormData } from '@/types';
-import api from '@/services/api';
+import api, { IdempotencyKeys, isNetworkError } from '@/services/api';
 
 const LeaderCoursesPage = () => {
     const { user } = useAuth();
@@ -17,6 +17,8 @@ const LeaderCoursesPage = () => {
     const [isCreateModalOpen, setIsCreateModalOpen] = useState(false);
     const [isEditModalOpen, setIsEditModalOpen] = useState(false);
     const [currentCourse, setCurrentCourse] = useState<Course | null>(null);
+    // 创建课程提交的幂等键，网络出错后重新提交相同内容时沿用，不会重复创建
+    const [createKeys] = useState(() => new IdempotencyKeys());
 
     // 加载数据
     useEffect(() => {
@@ -49,12 +51,16 @@ const LeaderCoursesPage = () => {
                 leaderId: user?.id ? String(user.id) : ''
             };
 
-            const response = await api.adminCourses.createCourse(courseData);
+            const response = await api.adminCourses.createCourse(courseData, createKeys.get('create', courseData));
+            createKeys.settle('create');
             if (response.success && response.data) {
                 setCourses(prev => [...prev, response.data]);
                 setIsCreateModalOpen(false);
             }
         } catch (err) {
+            if (!isNetworkError(err)) {
+                createKeys.settle('create');
+            }
             throw err;
         }
     };
@@ -3,7 +3,7 @@
 import React, { useEffect, useState, useMemo } from 'react';
 import { useRouter } from 'next/navigation';
 import { useAuth } from '@/context/AuthContext';
-import { bookingApi, courseApi } from '@/services/api';
+import { bookingApi, courseApi, IdempotencyKeys, isNetworkError } from '@/services/api';
 import { Course } from '@/types';
 import Link from 'next/link';
 import { toast } from 'react-hot-toast';
@@ -147,6 +147,8 @@ const ScheduleTable = () => {
     const [weekStartDate, setWeekStartDate] = useState(getWeekStartDate(new Date()));
     const [weekSchedule, setWeekSchedule] = useState<WeekSchedule>({});
     const [bookingStatus, setBookingStatus] = useState<BookingStatusMap>({});
+    // 每门课程预约操作的幂等键，网络出错后再次点击预约时沿用
+    const [bookingKeys] = useState(() => new IdempotencyKeys());
     const [isLoading, setIsLoading] = useState(true);
     const [apiError, setApiError] = useState<string | null>(null);
     const [loadingCourseId, setLoadingCourseId] = useState<string>('');
@@ -545,7 +547,9 @@ const ScheduleTable = () => {
 
         try {
             // 调用预约API
-            const bookingResponse = await bookingApi.bookCourse(courseId);
+            const bookingResponse = await bookingApi.bookCourse(courseId, bookingKeys.get(courseId));
+            // 已收到服务器的明确结果，下次预约使用新的幂等键
+            bookingKeys.settle(courseId);
 
             // 检查API响应是否成功
             if (bookingResponse && bookingResponse.success) {
@@ -574,6 +578,10 @@ const ScheduleTable = () => {
         } catch (error: any) {
             // 捕获网络错误或其他异常
             console.error('预约课程错误:', error);
+            // 网络错误时预约可能已经成功，保留幂等键，用户再次点击时服务器会返回那次的结果而不会重复预约
+            if (!isNetworkError(error)) {
+                bookingKeys.settle(courseId);
+            }
             const errorMessage = error.message || '预约课程时发生错误，请重试';
             toast.error(`预约失败: ${errorMessage}`, {
                 position: 'top-center',
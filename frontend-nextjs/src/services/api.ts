@@ -9,6 +9,75 @@ const getAuthToken = () => {
     return null;
 };
 
+// 辅助函数 - 生成幂等键
+export const newIdempotencyKey = () => {
+    if (typeof crypto !== 'undefined' && typeof crypto.randomUUID === 'function') {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+};
+
+// 一次用户操作（点一次预约、提交一次表单）的幂等键
+// 操作没有得到服务器的明确结果（网络错误、超时）时，再次提交相同内容沿用同一个键，
+// 服务器已经处理过的话直接返回上次的结果而不会重复执行；收到服务器响应后调用 settle 换新键，
+// 提交内容变化时也会换新键（同一个键用于不同的请求会被服务器拒绝）
+export class IdempotencyKeys {
+    private keys = new Map<string, { key: string; payload: string }>();
+
+    get(action: string, payload: unknown = null) {
+        const serialized = JSON.stringify(payload);
+        const current = this.keys.get(action);
+        if (current && current.payload === serialized) {
+            return current.key;
+        }
+        const key = newIdempotencyKey();
+        this.keys.set(action, { key, payload: serialized });
+        return key;
+    }
+
+    settle(action: string) {
+        this.keys.delete(action);
+    }
+}
+
+// 辅助函数 - 请求没有到达服务器或没有收到响应（fetch 抛出 TypeError），此时操作结果未知，可以用同一个幂等键重试
+export const isNetworkError = (error: unknown) => error instanceof TypeError;
+
+// 带幂等键的写请求自动重试的次数
+const IDEMPOTENT_RETRY_LIMIT = 3;
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+// 辅助函数 - 发送请求；带幂等键的请求在网络错误、网关超时和"相同请求正在处理中"(409 + Retry-After)时
+// 用同一个键自动重试，服务器只会执行一次
+const fetchWithRetry = async (url: string, config: RequestInit) => {
+    const headers = config.headers as Record<string, string> | undefined;
+    if (!headers || !headers['Idempotency-Key']) {
+        return fetch(url, config);
+    }
+
+    for (let attempt = 0; ; attempt++) {
+        let response: Response;
+        try {
+            response = await fetch(url, config);
+        } catch (error) {
+            if (attempt >= IDEMPOTENT_RETRY_LIMIT) {
+                throw error;
+            }
+            await sleep(500 * 2 ** attempt);
+            continue;
+        }
+
+        const retryAfter = response.headers.get('Retry-After');
+        const inProgress = response.status === 409 && retryAfter !== null;
+        const gatewayError = [502, 503, 504].includes(response.status);
+        if ((!inProgress && !gatewayError) || attempt >= IDEMPOTENT_RETRY_LIMIT) {
+            return response;
+        }
+        await sleep((Number(retryAfter) || 2 ** attempt) * 1000);
+    }
+};
+
 // 基础请求函数
 const apiRequest = async (endpoint: string, options: RequestInit = {}) => {
     const token = getAuthToken();
@@ -35,7 +104,7 @@ const apiRequest = async (endpoint: string, options: RequestInit = {}) => {
             console.log('发送getCurrentUser请求，令牌:', token ? `${token.substring(0, 10)}...` : '无');
         }
 
-        const response = await fetch(`${API_BASE_URL}${endpoint}`, config);
+        const response = await fetchWithRetry(`${API_BASE_URL}${endpoint}`, config);
 
         if (isCurrentUserRequest) {
             console.log('getCurrentUser响应状态:', response.status);
@@ -104,7 +173,7 @@ const apiRequest = async (endpoint: string, options: RequestInit = {}) => {
                             };
 
                             // 重试请求
-                            const retryResponse = await fetch(`${API_BASE_URL}${endpoint}`, newConfig);
+                            const retryResponse = await fetchWithRetry(`${API_BASE_URL}${endpoint}`, newConfig);
 
                             // 如果重试成功，返回结果
                             if (retryResponse.ok) {
@@ -340,9 +409,11 @@ export const bookingApi = {
     },
 
     // 预订课程 - 更新为正确的API路径
-    bookCourse: async (courseId: string) => {
+    // idempotencyKey: 本次预约操作的幂等键，用户重试同一次操作时传入同一个值
+    bookCourse: async (courseId: string, idempotencyKey: string = newIdempotencyKey()) => {
         return apiRequest(`/courses/${courseId}/book`, {
             method: 'POST',
+            headers: { 'Idempotency-Key': idempotencyKey },
         });
     },
 
@@ -523,9 +594,11 @@ export const adminCourseApi = {
     },
 
     // 创建新课程
-    createCourse: async (courseData: any) => {
+    // idempotencyKey: 本次提交的幂等键，用户重试同一次提交时传入同一个值
+    createCourse: async (courseData: any, idempotencyKey: string = newIdempotencyKey()) => {
         return apiRequest('/admin/courses', {
             method: 'POST',
+            headers: { 'Idempotency-Key': idempotencyKey },
             body: JSON.stringify(courseData),
         });
     },
@@ -534,6 +607,7 @@ export const adminCourseApi = {
     updateCourse: async (courseId: string, courseData: any) => {
         return apiRequest(`/admin/courses/${courseId}`, {
             method: 'PUT',
+            headers: { 'Idempotency-Key': newIdempotencyKey() },
             body: JSON.stringify(courseData),
         });
     },
@@ -542,6 +616,7 @@ export const adminCourseApi = {
     deleteCourse: async (courseId: string) => {
         return apiRequest(`/admin/courses/${courseId}`, {
             method: 'DELETE',
+            headers: { 'Idempotency-Key': newIdempotencyKey() },
         });
     },
 